@@ -1,7 +1,6 @@
 import os
 from flask import Flask
 from flask_mail import Mail
-from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_assets import Environment
 from flask_wtf import CsrfProtect
@@ -12,7 +11,8 @@ from flask_wtf import CsrfProtect
 from flask_restful import Api
 
 from config import config
-from .assets import app_css, app_js, vendor_css, vendor_js
+from .assets import bundles
+from .database import SQLAlchemy
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -37,6 +37,11 @@ def create_app(config_name):
 
     config[config_name].init_app(app)
 
+    # JSON logs written by a background thread, after the config's handlers
+    # are in place
+    from .log_pipeline import register_logging
+    register_logging(app)
+
     # Set up extensions
     mail.init_app(app)
     db.init_app(app)
@@ -48,21 +53,47 @@ def create_app(config_name):
     RQ(app)
     api = Api(app)
 
+    # Per-request SQL tracking, N+1 warnings and query budgets
+    from .query_tracker import register_query_tracker
+    register_query_tracker(app)
+
+    # Log slow statements with their EXPLAIN output
+    from .slow_query_log import register_slow_query_log
+    register_slow_query_log(app)
+
+    # Request metrics; registered before compression so that response
+    # sizes are measured after it
+    from .metrics import register_metrics
+    register_metrics(app)
+
+    # Compress API responses by size, everything else with Flask-Compress
+    from .compression import register_compression
+    register_compression(app, compress)
+
+    # Per-client API usage counts, saved in batches
+    from .usage import register_usage_metering
+    register_usage_metering(app)
+
     # Register Jinja template functions
     from .utils import register_template_utils
     register_template_utils(app)
 
+    # Load compiled templates from the Jinja bytecode cache
+    from .template_cache import register_template_cache
+    register_template_cache(app)
+
     # Set up asset pipeline
     assets_env = Environment(app)
     dirs = ['assets/styles', 'assets/scripts']
     for path in dirs:
         assets_env.append_path(os.path.join(basedir, path))
-    assets_env.url_expire = True
 
-    assets_env.register('app_css', app_css)
-    assets_env.register('app_js', app_js)
-    assets_env.register('vendor_css', vendor_css)
-    assets_env.register('vendor_js', vendor_js)
+    for name, bundle in bundles.items():
+        assets_env.register(name, bundle)
+
+    # Bundle URLs from the build_assets manifest in production
+    from .asset_manifest import register_asset_manifest
+    register_asset_manifest(app)
 
     # Configure SSL if platform supports it
     if not app.debug and not app.testing and not app.config['SSL_DISABLE']:
@@ -113,7 +144,10 @@ def create_app(config_name):
             }
     )
 
-    from app.api.v1.building import Building, BuildingList
+    from app.api.v1.building import (Building, BuildingChanges,
+                                     BuildingExport, BuildingList,
+                                     BuildingNear, BuildingSearch,
+                                     BuildingStats, BuildingWithin)
 
     building_view = Building.as_view('Building')
     app.add_url_rule('/v1/buildings/<int:building_id>', view_func=building_view)
@@ -121,8 +155,40 @@ def create_app(config_name):
     building_list_view = BuildingList.as_view('BuildingList')
     app.add_url_rule('/v1/buildings', view_func=building_list_view)
 
+    building_search_view = BuildingSearch.as_view('BuildingSearch')
+    app.add_url_rule('/v1/buildings/search', view_func=building_search_view)
+
+    building_near_view = BuildingNear.as_view('BuildingNear')
+    app.add_url_rule('/v1/buildings/near', view_func=building_near_view)
+
+    building_within_view = BuildingWithin.as_view('BuildingWithin')
+    app.add_url_rule('/v1/buildings/within', view_func=building_within_view)
+
+    building_stats_view = BuildingStats.as_view('BuildingStats')
+    app.add_url_rule('/v1/buildings/stats', view_func=building_stats_view)
+
+    building_export_view = BuildingExport.as_view('BuildingExport')
+    app.add_url_rule('/v1/buildings/export', view_func=building_export_view)
+
+    building_changes_view = BuildingChanges.as_view('BuildingChanges')
+    app.add_url_rule('/v1/buildings/changes', view_func=building_changes_view)
+
     with app.test_request_context():
         spec.add_path(view=building_view)
         spec.add_path(view=building_list_view)
+        spec.add_path(view=building_search_view)
+        spec.add_path(view=building_near_view)
+        spec.add_path(view=building_within_view)
+        spec.add_path(view=building_stats_view)
+        spec.add_path(view=building_export_view)
+        spec.add_path(view=building_changes_view)
+
+    # Serve the Swagger spec built once, compressed and with an ETag
+    from .api_spec import register_api_spec_cache
+    register_api_spec_cache(app)
+
+    # Serve prebuilt .br/.gz static files (after all blueprints exist)
+    from .static_files import register_precompressed_static
+    register_precompressed_static(app)
 
     return app
@@ -1,4 +1,4 @@
-from flask import flash, redirect, render_template, request, url_for, current_app
+from flask import flash, redirect, render_template, request, url_for
 from flask_login import (current_user, login_required, login_user,
                          logout_user)
 from flask_rq import get_queue
@@ -8,6 +8,7 @@ from . import account
 from .. import db
 from ..email import send_email
 from ..models import User, App, Client
+from ..usage import recent_app_usage
 from .forms import (ChangeEmailForm, ChangePasswordForm, CreatePasswordForm,
                     LoginForm, RegistrationForm, RequestResetPasswordForm,
                     ResetPasswordForm, CreateAppForm, UpdateAppForm)
@@ -312,8 +313,6 @@ def create_app():
 @account.route('/manage/apps/<int:application_id>', methods=['GET', 'POST'])
 @login_required
 def update_app(application_id):
-    current_app.logger.info("RadhaKrishnaHanuman")
-    current_app.logger.info(application_id)
     app = App.query.filter_by(application_id=application_id).first()
     client = Client.query.filter_by(app_id=application_id).first()
     client_id = client.client_id
@@ -339,17 +338,14 @@ def update_app(application_id):
 @account.route('/manage/apps', methods=['GET', 'POST'])
 @login_required
 def all_apps():
-    current_app.logger.info("RadhaKrishnaHanuman")
     apps_list = App.query.filter_by(user_id=current_user.id).all()
-    current_app.logger.info(apps_list)
-    return render_template('account/all_apps.html', user=current_user, apps_list=apps_list)
+    usage = recent_app_usage([app.application_id for app in apps_list])
+    return render_template('account/all_apps.html', user=current_user, apps_list=apps_list, usage=usage)
 
 
 @account.route('/manage/apps/<int:application_id>/delete', methods=['GET', 'POST'])
 @login_required
 def delete_app(application_id):
-    current_app.logger.info("RadhaKrishnaHanuman")
-    current_app.logger.info(application_id)
     App.query.filter_by(application_id=application_id).delete()
     flash('You application has been deleted.', 'danger')
     return redirect(url_for('account.all_apps'))
@@ -1,6 +1,9 @@
-from flask import abort, flash, redirect, render_template, url_for, request
+from flask import (abort, current_app, flash, redirect, render_template,
+                   url_for, request)
 from flask_login import current_user, login_required
 from flask_rq import get_queue
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
 
 from .forms import (ChangeAccountTypeForm, ChangeUserEmailForm, InviteUserForm,
                     NewUserForm)
@@ -9,6 +12,20 @@ from .. import db
 from ..decorators import admin_required
 from ..email import send_email
 from ..models import Role, User
+from ..pagination import decode_cursor, keyset_page
+from ..slow_query_log import recent_slow_queries
+
+USER_SORT_COLUMNS = {
+    'first_name': User.first_name,
+    'last_name': User.last_name,
+    'email': User.email,
+}
+
+
+def prefix_match(column, prefix):
+    """Values starting with ``prefix``, as a range the column's index can
+    scan (LIKE cannot use it on SQLite, being case-insensitive there)."""
+    return and_(column >= prefix, column < prefix + '\uffff')
 
 
 @admin.route('/')
@@ -75,11 +92,53 @@ def invite_user():
 @login_required
 @admin_required
 def registered_users():
-    """View all registered users."""
-    users = User.query.all()
-    roles = Role.query.all()
+    """View registered users a page at a time, searched and sorted in the
+    database."""
+    sort = request.args.get('sort')
+    if sort not in USER_SORT_COLUMNS:
+        sort = 'last_name'
+    descending = request.args.get('order') == 'desc'
+    q = request.args.get('q', '').strip()
+    role_id = request.args.get('role', type=int)
+
+    query = User.query.options(joinedload(User.role))
+    if q:
+        query = query.filter(or_(*[
+            prefix_match(column, prefix)
+            for column in (User.first_name, User.last_name, User.email)
+            for prefix in {q, q.lower(), q.capitalize()}]))
+    if role_id is not None:
+        query = query.filter(User.role_id == role_id)
+    after, before = (decode_cursor(request.args[name])
+                     if request.args.get(name) else None
+                     for name in ('after', 'before'))
+    users, previous_cursor, next_cursor = keyset_page(
+        query, USER_SORT_COLUMNS[sort], User.id,
+        current_app.config['ADMIN_USERS_PER_PAGE'], descending, after, before)
+
+    def page_url(**args):
+        params = {'q': q or None, 'role': role_id, 'sort': sort,
+                  'order': 'desc' if descending else None}
+        params.update(args)
+        return url_for('admin.registered_users', **{
+            k: v for k, v in params.items() if v is not None})
+
+    return render_template(
+        'admin/registered_users.html', users=users, roles=Role.query.all(),
+        q=q, role_id=role_id, sort=sort, descending=descending,
+        page_url=page_url,
+        previous_url=previous_cursor and page_url(before=previous_cursor),
+        next_url=next_cursor and page_url(after=next_cursor))
+
+
+@admin.route('/slow-queries')
+@login_required
+@admin_required
+def slow_queries():
+    """View the most recent slow SQL statements and their query plans."""
     return render_template(
-        'admin/registered_users.html', users=users, roles=roles)
+        'admin/slow_queries.html', entries=recent_slow_queries(),
+        threshold=current_app.config['SLOW_QUERY_THRESHOLD'])
 
 
 @admin.route('/user/<int:user_id>')
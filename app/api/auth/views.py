@@ -1,4 +1,4 @@
-from flask import flash, redirect, render_template, request, url_for, session, jsonify, current_app
+from flask import flash, redirect, render_template, request, url_for, session, jsonify
 from flask_rq import get_queue
 from werkzeug.security import gen_salt
 from datetime import datetime, timedelta
@@ -21,8 +21,6 @@ def home():
     if request.method == 'POST':
         username = request.form.get('username')
         user = User.query.filter_by(email=username).first()
-        current_app.logger.info("RadhaKrishnaHanuman")
-        current_app.logger.info(user)
         if not user:
             user = User(email=username)
             db.session.add(user)
@@ -60,7 +58,12 @@ def client():
 
 @oauth.clientgetter
 def load_client(client_id):
-    return Client.query.filter_by(client_id=client_id).first()
+    with db.replica():
+        client = Client.query.filter_by(client_id=client_id).first()
+    if client is None and db.has_replica():
+        # The replica may not have caught up with a just-created client.
+        client = Client.query.filter_by(client_id=client_id).first()
+    return client
 
 
 @oauth.grantgetter
@@ -88,7 +91,12 @@ def save_grant(client_id, code, request, *args, **kwargs):
 @oauth.tokengetter
 def load_token(access_token=None):
     if access_token:
-        return Token.query.filter_by(access_token=access_token).first()
+        with db.replica():
+            token = Token.query.filter_by(access_token=access_token).first()
+        if token is None and db.has_replica():
+            # The replica may not have caught up with a just-issued token.
+            token = Token.query.filter_by(access_token=access_token).first()
+        return token
 
 
 @oauth.tokensetter
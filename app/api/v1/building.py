@@ -1,12 +1,27 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import logging
+
 from ...models.building import BuildingModel
 from ... import oauth, csrf, db
+from ...building_changes import (DELETE, UPSERT, changes_since,
+                                 record_change)
+from ...building_stats import (GROUPINGS, building_stats, count_building,
+                               move_building, stats_key)
+from ...export import CHUNKS, MIMETYPES, export_rows
+from ...geo import box_condition, nearest
+from ...idempotency import idempotent
+from ...metrics import serialization_timer
+from ...query_tracker import query_budget
+from ...search import (index_buildings, search_buildings, search_enabled,
+                       unindex_building)
 from ...schemas.building import BuildingSchema
-from flask import jsonify, request, current_app
+from flask import (Response, current_app, jsonify, request,
+                   stream_with_context)
 from flasgger import Schema, Swagger, SwaggerView, fields
 
+logger = logging.getLogger(__name__)
 
 building_schema = BuildingSchema()
 buildings_schema = BuildingSchema(many=True)
@@ -17,6 +32,8 @@ class Building(SwaggerView):
     decorators = [csrf.exempt, oauth.require_oauth('building')]
     definitions = {'BuildingSchema': BuildingSchema}
 
+    @query_budget(5)
+    @db.replica_read
     def get(self, building_id):
         """
         Get a Building By its ID.
@@ -65,10 +82,13 @@ class Building(SwaggerView):
 
         building = BuildingModel.find_by_building_id(building_id)
         if building:
-            result = building_schema.dump(building)
+            with serialization_timer():
+                result = building_schema.dump(building)
             return jsonify(result.data)
         return (jsonify({'message': 'Building not found.'}), 404)
 
+    @query_budget(11)
+    @idempotent
     def put(self, building_id):
         """
         Update a Building By its ID.
@@ -83,6 +103,11 @@ class Building(SwaggerView):
           required: 'True'
           type: 'string'
           description: "Your app's access token."
+        - name: Idempotency-Key
+          in: header
+          type: string
+          description: Retries sent with the same key return the first
+            response instead of writing again.
         - name: building_id
           in: path
           type: int
@@ -111,6 +136,14 @@ class Building(SwaggerView):
                 type: string
                 description: Building Name
                 example: US
+              BUILDINGLATITUDE:
+                type: number
+                description: Building Latitude
+                example: 42.3601
+              BUILDINGLONGITUDE:
+                type: number
+                description: Building Longitude
+                example: -71.0589
         consumes:
         - application/json
         produces:
@@ -145,19 +178,27 @@ class Building(SwaggerView):
             if errors:
                 return (jsonify(errors), 422)
 
+            old_key = stats_key(building)
             building.BUILDINGNAME = data.BUILDINGNAME
             building.BUILDINGCITY = data.BUILDINGCITY
             building.BUILDINGSTATE = data.BUILDINGSTATE
             building.BUILDINGCOUNTRY = data.BUILDINGCOUNTRY
+            building.BUILDINGLATITUDE = data.BUILDINGLATITUDE
+            building.BUILDINGLONGITUDE = data.BUILDINGLONGITUDE
+            move_building(old_key, stats_key(building))
+            record_change(building, UPSERT)
 
             db.session.commit()
-            result = \
-                building_schema.dump(BuildingModel.query.get(building.BUILDINGID))
+            building = BuildingModel.query.get(building.BUILDINGID)
+            index_buildings(building)
+            with serialization_timer():
+                result = building_schema.dump(building)
             return jsonify({'message': 'Updated building %s'
                            % building_id, 'building': result})
 
         else:
-            current_app.logger.info(input_data)
+            logger.info('Creating building %s', building_id,
+                        extra={'payload': input_data})
             if not input_data:
                 return (jsonify({'message': 'No input data provided'}), 400)
 
@@ -171,16 +212,24 @@ class Building(SwaggerView):
                 BUILDINGNAME=data.BUILDINGNAME,
                 BUILDINGCITY=data.BUILDINGCITY,
                 BUILDINGSTATE=data.BUILDINGSTATE,
-                BUILDINGCOUNTRY=data.BUILDINGCOUNTRY
+                BUILDINGCOUNTRY=data.BUILDINGCOUNTRY,
+                BUILDINGLATITUDE=data.BUILDINGLATITUDE,
+                BUILDINGLONGITUDE=data.BUILDINGLONGITUDE
                 )
 
             db.session.add(building)
+            count_building(stats_key(building), 1)
+            record_change(building, UPSERT)
             db.session.commit()
-            result = \
-                building_schema.dump(BuildingModel.query.get(building.BUILDINGID))
+            building = BuildingModel.query.get(building.BUILDINGID)
+            index_buildings(building)
+            with serialization_timer():
+                result = building_schema.dump(building)
             return jsonify({'message': 'Created new building.',
                            'building': result})
 
+    @query_budget(11)
+    @idempotent
     def patch(self, building_id):
         """
         Update one or more parameters of a Building By its ID.
@@ -197,6 +246,11 @@ class Building(SwaggerView):
           required: 'True'
           type: 'string'
           description: "Your app's access token."
+        - name: Idempotency-Key
+          in: header
+          type: string
+          description: Retries sent with the same key return the first
+            response instead of writing again.
         - name: building_id
           in: path
           type: int
@@ -225,6 +279,14 @@ class Building(SwaggerView):
                 type: string
                 description: Building Name
                 example: US
+              BUILDINGLATITUDE:
+                type: number
+                description: Building Latitude
+                example: 42.3601
+              BUILDINGLONGITUDE:
+                type: number
+                description: Building Longitude
+                example: -71.0589
         consumes:
         - application/json
         produces:
@@ -260,18 +322,27 @@ class Building(SwaggerView):
                 return (jsonify(errors), 422)
 
 
+            old_key = stats_key(building)
             building.BUILDINGNAME = (data.BUILDINGNAME if data.BUILDINGNAME else building.BUILDINGNAME)
             building.BUILDINGCITY = (data.BUILDINGCITY if data.BUILDINGCITY else building.BUILDINGCITY)
             building.BUILDINGSTATE = (data.BUILDINGSTATE if data.BUILDINGSTATE else building.BUILDINGSTATE)
             building.BUILDINGCOUNTRY = (data.BUILDINGCOUNTRY if data.BUILDINGCOUNTRY else building.BUILDINGCOUNTRY)
+            # 0 is a valid coordinate, so only a missing value keeps the old one
+            building.BUILDINGLATITUDE = (data.BUILDINGLATITUDE if data.BUILDINGLATITUDE is not None else building.BUILDINGLATITUDE)
+            building.BUILDINGLONGITUDE = (data.BUILDINGLONGITUDE if data.BUILDINGLONGITUDE is not None else building.BUILDINGLONGITUDE)
+            move_building(old_key, stats_key(building))
+            record_change(building, UPSERT)
 
             db.session.commit()
-            result = \
-                building_schema.dump(BuildingModel.query.get(building.BUILDINGID))
+            building = BuildingModel.query.get(building.BUILDINGID)
+            index_buildings(building)
+            with serialization_timer():
+                result = building_schema.dump(building)
             return jsonify({'message': 'Updated building %s'
                            % building_id, 'building': result})
         return (jsonify({'message': 'Building not found.'}), 404)
 
+    @query_budget(7)
     def delete(self, building_id):
         """
         Delete a Building By its ID.
@@ -311,8 +382,11 @@ class Building(SwaggerView):
 
         building = BuildingModel.find_by_building_id(building_id)
         if building:
+            count_building(stats_key(building), -1)
+            record_change(building, DELETE)
             BuildingModel.query.filter_by(BUILDINGID=building_id).delete()
             db.session.commit()
+            unindex_building(building_id)
             return (jsonify({'message': 'Building has been deleted.'}),
                     204)
         return (jsonify({'message': 'Building not found.'}), 404)
@@ -323,6 +397,8 @@ class BuildingList(SwaggerView):
     decorators = [csrf.exempt, oauth.require_oauth('buildings')]
     definitions = {'BuildingSchema': BuildingSchema}
 
+    @query_budget(5)
+    @db.replica_read
     def get(self):
         """
         Get all the Buildings.
@@ -367,10 +443,13 @@ class BuildingList(SwaggerView):
         """
 
         buildings = BuildingModel.query.all()
-        result = buildings_schema.dump(buildings)
+        with serialization_timer():
+            result = buildings_schema.dump(buildings)
         return jsonify(result.data)
 
     @oauth.require_oauth('buildings:write')
+    @query_budget(9)
+    @idempotent
     def post(self):
         """
         Insert a Building.
@@ -384,6 +463,11 @@ class BuildingList(SwaggerView):
           required: 'True'
           type: 'string'
           description: "Your app's access token."
+        - name: Idempotency-Key
+          in: header
+          type: string
+          description: Retries sent with the same key return the first
+            response instead of writing again.
         - name: body
           in: body
           required: 'True'
@@ -406,6 +490,14 @@ class BuildingList(SwaggerView):
                 type: string
                 description: Building Country
                 example: US
+              BUILDINGLATITUDE:
+                type: number
+                description: Building Latitude
+                example: 42.3601
+              BUILDINGLONGITUDE:
+                type: number
+                description: Building Longitude
+                example: -71.0589
         consumes:
         - application/json
         produces:
@@ -427,7 +519,7 @@ class BuildingList(SwaggerView):
         """
 
         input_data = request.get_json()
-        current_app.logger.info(input_data)
+        logger.info('Creating building', extra={'payload': input_data})
         if not input_data:
             return (jsonify({'message': 'No input data provided'}), 400)
 
@@ -441,12 +533,491 @@ class BuildingList(SwaggerView):
             BUILDINGNAME=data.BUILDINGNAME,
             BUILDINGCITY=data.BUILDINGCITY,
             BUILDINGSTATE=data.BUILDINGSTATE,
-            BUILDINGCOUNTRY=data.BUILDINGCOUNTRY
+            BUILDINGCOUNTRY=data.BUILDINGCOUNTRY,
+            BUILDINGLATITUDE=data.BUILDINGLATITUDE,
+            BUILDINGLONGITUDE=data.BUILDINGLONGITUDE
             )
 
         db.session.add(building)
+        count_building(stats_key(building), 1)
+        record_change(building, UPSERT)
         db.session.commit()
-        result = \
-            building_schema.dump(BuildingModel.query.get(building.BUILDINGID))
+        building = BuildingModel.query.get(building.BUILDINGID)
+        index_buildings(building)
+        with serialization_timer():
+            result = building_schema.dump(building)
         return jsonify({'message': 'Created new building.',
                        'building': result})
+
+
+class BuildingSearch(SwaggerView):
+
+    decorators = [csrf.exempt, oauth.require_oauth('buildings')]
+    definitions = {'BuildingSchema': BuildingSchema}
+
+    @query_budget(5)
+    @db.replica_read
+    def get(self):
+        """
+        Search the Buildings.
+        Full-text search over the name, city, state and country of all
+        Buildings, best matches first.
+        ---
+        tags:
+        - v1
+        parameters:
+        - name: access_token
+          in: query
+          required: 'True'
+          type: 'string'
+          description: "Your app's access token."
+        - name: q
+          in: query
+          required: 'True'
+          type: 'string'
+          description: Words to search for.
+        - name: page
+          in: query
+          type: int
+          default: 1
+          description: Page of results to return.
+        - name: per_page
+          in: query
+          type: int
+          default: 20
+          description: Results per page (at most 100).
+        consumes:
+        - application/json
+        produces:
+        - application/json
+        responses:
+          200:
+            description: 'Success: Everything worked as expected.'
+            examples:
+              query: boston
+              page: 1
+              per_page: 20
+              total: 1
+              buildings:
+              - BUILDINGCITY: Boston
+                BUILDINGCOUNTRY: US
+                BUILDINGID: 1
+                BUILDINGNAME: Building 1
+                BUILDINGSTATE: MA
+          400:
+            description: 'Bad Request: The request was unacceptable due to wrong parameter(s).'
+          401:
+            description: 'Unauthorized: Inavlid access_token used.'
+          500:
+            description: 'Server Error: Something went wrong on our end.'
+          503:
+            description: 'Search is not enabled on this server.'
+        """
+
+        if not search_enabled():
+            return (jsonify({'message': 'Search is not enabled.'}), 503)
+        q = request.args.get('q', '').strip()
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        if not q:
+            return (jsonify({'message': 'No search query provided'}), 400)
+        if page < 1 or not 1 <= per_page <= \
+                current_app.config['SEARCH_MAX_PER_PAGE']:
+            return (jsonify({'message': 'Invalid page or per_page.'}), 400)
+
+        ids, total = search_buildings(q, page, per_page)
+        buildings = BuildingModel.query.filter(
+            BuildingModel.BUILDINGID.in_(ids)).all() if ids else []
+        rank = {building_id: i for i, building_id in enumerate(ids)}
+        buildings.sort(key=lambda building: rank[building.BUILDINGID])
+        with serialization_timer():
+            result = buildings_schema.dump(buildings)
+        return jsonify({'query': q, 'page': page, 'per_page': per_page,
+                        'total': total, 'buildings': result.data})
+
+
+def coordinate_args(*names):
+    """Read float query arguments, or None if any is missing or invalid."""
+    values = [request.args.get(name, type=float) for name in names]
+    return None if None in values else values
+
+
+class BuildingNear(SwaggerView):
+
+    decorators = [csrf.exempt, oauth.require_oauth('buildings')]
+    definitions = {'BuildingSchema': BuildingSchema}
+
+    # Authentication, up to three rings (app/geo.py) and the buildings
+    @query_budget(6)
+    @db.replica_read
+    def get(self):
+        """
+        Get the Buildings near a point.
+        Get the Buildings within a radius of a coordinate, nearest first.
+        ---
+        tags:
+        - v1
+        parameters:
+        - name: access_token
+          in: query
+          required: 'True'
+          type: 'string'
+          description: "Your app's access token."
+        - name: lat
+          in: query
+          required: 'True'
+          type: number
+          description: Latitude of the center.
+        - name: lon
+          in: query
+          required: 'True'
+          type: number
+          description: Longitude of the center.
+        - name: radius
+          in: query
+          type: number
+          default: 1
+          description: Radius in kilometres (at most 50).
+        - name: limit
+          in: query
+          type: int
+          default: 50
+          description: Maximum number of Buildings (at most 500).
+        consumes:
+        - application/json
+        produces:
+        - application/json
+        responses:
+          200:
+            description: 'Success: Everything worked as expected.'
+            examples:
+              buildings:
+              - BUILDINGCITY: Boston
+                BUILDINGCOUNTRY: US
+                BUILDINGID: 1
+                BUILDINGLATITUDE: 42.3601
+                BUILDINGLONGITUDE: -71.0589
+                BUILDINGNAME: Building 1
+                BUILDINGSTATE: MA
+                DISTANCE_KM: 0.12
+          400:
+            description: 'Bad Request: The request was unacceptable due to wrong parameter(s).'
+          401:
+            description: 'Unauthorized: Inavlid access_token used.'
+          500:
+            description: 'Server Error: Something went wrong on our end.'
+        """
+
+        center = coordinate_args('lat', 'lon')
+        radius = request.args.get('radius', 1.0, type=float)
+        limit = request.args.get('limit', 50, type=int)
+        if center is None or not -90 <= center[0] <= 90 or \
+                not -180 <= center[1] <= 180:
+            return (jsonify({'message': 'Invalid lat or lon.'}), 400)
+        if not 0 < radius <= current_app.config['GEO_MAX_RADIUS_KM'] or \
+                not 1 <= limit <= current_app.config['GEO_MAX_RESULTS']:
+            return (jsonify({'message': 'Invalid radius or limit.'}), 400)
+
+        lat, lon = center
+        nearby = nearest(db.session, BuildingModel, lat, lon, radius, limit,
+                         current_app.config['GEO_MAX_CANDIDATES'])
+        buildings = {b.BUILDINGID: b for b in BuildingModel.query.filter(
+            BuildingModel.BUILDINGID.in_([i for _, i in nearby]))} \
+            if nearby else {}
+        nearby = [(distance, buildings[i]) for distance, i in nearby
+                  if i in buildings]
+        with serialization_timer():
+            result = buildings_schema.dump([b for _, b in nearby])
+        for (distance, _), building in zip(nearby, result.data):
+            building['DISTANCE_KM'] = round(distance, 3)
+        return jsonify({'buildings': result.data})
+
+
+class BuildingWithin(SwaggerView):
+
+    decorators = [csrf.exempt, oauth.require_oauth('buildings')]
+    definitions = {'BuildingSchema': BuildingSchema}
+
+    @query_budget(5)
+    @db.replica_read
+    def get(self):
+        """
+        Get the Buildings in a bounding box.
+        Get the Buildings inside a box given by its south-west and
+        north-east corners. A box whose min_lon is greater than its
+        max_lon crosses the antimeridian.
+        ---
+        tags:
+        - v1
+        parameters:
+        - name: access_token
+          in: query
+          required: 'True'
+          type: 'string'
+          description: "Your app's access token."
+        - name: min_lat
+          in: query
+          required: 'True'
+          type: number
+        - name: min_lon
+          in: query
+          required: 'True'
+          type: number
+        - name: max_lat
+          in: query
+          required: 'True'
+          type: number
+        - name: max_lon
+          in: query
+          required: 'True'
+          type: number
+        - name: limit
+          in: query
+          type: int
+          default: 50
+          description: Maximum number of Buildings (at most 500).
+        consumes:
+        - application/json
+        produces:
+        - application/json
+        responses:
+          200:
+            description: 'Success: Everything worked as expected.'
+            schema:
+              $ref: '#/definitions/BuildingSchema'
+          400:
+            description: 'Bad Request: The request was unacceptable due to wrong parameter(s).'
+          401:
+            description: 'Unauthorized: Inavlid access_token used.'
+          500:
+            description: 'Server Error: Something went wrong on our end.'
+        """
+
+        box = coordinate_args('min_lat', 'min_lon', 'max_lat', 'max_lon')
+        limit = request.args.get('limit', 50, type=int)
+        if box is None or not -90 <= box[0] <= box[2] <= 90 or \
+                not -180 <= min(box[1], box[3]) <= \
+                max(box[1], box[3]) <= 180:
+            return (jsonify({'message': 'Invalid bounding box.'}), 400)
+        lon_span = (box[3] - box[1]) % 360
+        max_span = current_app.config['GEO_MAX_SPAN_DEGREES']
+        if box[2] - box[0] > max_span or lon_span > max_span:
+            return (jsonify({'message': 'Bounding box larger than {} '
+                             'degrees.'.format(max_span)}), 400)
+        if not 1 <= limit <= current_app.config['GEO_MAX_RESULTS']:
+            return (jsonify({'message': 'Invalid limit.'}), 400)
+
+        buildings = BuildingModel.query.filter(
+            box_condition(BuildingModel, *box)).order_by(
+                BuildingModel.BUILDINGID).limit(limit).all()
+        with serialization_timer():
+            result = buildings_schema.dump(buildings)
+        return jsonify({'buildings': result.data})
+
+
+class BuildingStats(SwaggerView):
+
+    decorators = [csrf.exempt, oauth.require_oauth('buildings')]
+
+    @query_budget(5)
+    @db.replica_read
+    def get(self):
+        """
+        Count the Buildings by location.
+        Get the number of Buildings per country, state or city.
+        ---
+        tags:
+        - v1
+        parameters:
+        - name: access_token
+          in: query
+          required: 'True'
+          type: 'string'
+          description: "Your app's access token."
+        - name: group_by
+          in: query
+          type: string
+          enum: [country, state, city]
+          default: country
+          description: States are grouped within their country, and cities
+            within their state.
+        consumes:
+        - application/json
+        produces:
+        - application/json
+        responses:
+          200:
+            description: 'Success: Everything worked as expected.'
+            examples:
+              group_by: state
+              total: 3
+              groups:
+              - BUILDINGCOUNTRY: US
+                BUILDINGSTATE: MA
+                count: 2
+              - BUILDINGCOUNTRY: US
+                BUILDINGSTATE: NY
+                count: 1
+          400:
+            description: 'Bad Request: The request was unacceptable due to wrong parameter(s).'
+          401:
+            description: 'Unauthorized: Inavlid access_token used.'
+          500:
+            description: 'Server Error: Something went wrong on our end.'
+        """
+
+        group_by = request.args.get('group_by', 'country')
+        if group_by not in GROUPINGS:
+            return (jsonify({'message': 'group_by must be one of {}.'.format(
+                ', '.join(sorted(GROUPINGS)))}), 400)
+
+        groups = []
+        for key, count in building_stats(group_by):
+            group = dict(zip(GROUPINGS[group_by], key))
+            group['count'] = count
+            groups.append(group)
+        return jsonify({'group_by': group_by,
+                        'total': sum(group['count'] for group in groups),
+                        'groups': groups})
+
+
+class BuildingExport(SwaggerView):
+
+    decorators = [csrf.exempt, oauth.require_oauth('buildings')]
+
+    @query_budget(5)
+    @db.replica_read
+    def get(self):
+        """
+        Export all Buildings.
+        Stream every Building as CSV or NDJSON, in BUILDINGID order. The
+        response is compressed when the client sends Accept-Encoding.
+        ---
+        tags:
+        - v1
+        parameters:
+        - name: access_token
+          in: query
+          required: 'True'
+          type: 'string'
+          description: "Your app's access token."
+        - name: format
+          in: query
+          type: string
+          enum: [csv, ndjson]
+          default: csv
+        produces:
+        - text/csv
+        - application/x-ndjson
+        responses:
+          200:
+            description: 'Success: Everything worked as expected.'
+          400:
+            description: 'Bad Request: The request was unacceptable due to wrong parameter(s).'
+          401:
+            description: 'Unauthorized: Inavlid access_token used.'
+          500:
+            description: 'Server Error: Something went wrong on our end.'
+        """
+
+        format = request.args.get('format', 'csv')
+        if format not in CHUNKS:
+            return (jsonify({'message': 'format must be csv or ndjson.'}),
+                    400)
+        batch_size = current_app.config['EXPORT_BATCH_SIZE']
+        # Run the query here, so it uses the replica, and stream the rows
+        # after the view returns.
+        rows = export_rows(batch_size)
+        response = Response(stream_with_context(
+            CHUNKS[format](rows, batch_size)), mimetype=MIMETYPES[format])
+        response.headers['Content-Disposition'] = \
+            'attachment; filename=buildings.{}'.format(format)
+        return response
+
+
+class BuildingChanges(SwaggerView):
+
+    decorators = [csrf.exempt, oauth.require_oauth('buildings')]
+    definitions = {'BuildingSchema': BuildingSchema}
+
+    @query_budget(5)
+    @db.replica_read
+    def get(self):
+        """
+        Get the changes to Buildings since a cursor.
+        Page through the Building change log, oldest first. Start with
+        since=0, then pass the returned cursor until has_more is false.
+        Deleted Buildings appear once with OPERATION delete and no
+        building.
+        ---
+        tags:
+        - v1
+        parameters:
+        - name: access_token
+          in: query
+          required: 'True'
+          type: 'string'
+          description: "Your app's access token."
+        - name: since
+          in: query
+          type: int
+          default: 0
+          description: The cursor returned by the previous page.
+        - name: limit
+          in: query
+          type: int
+          default: 100
+          description: Maximum number of changes (at most 1000).
+        consumes:
+        - application/json
+        produces:
+        - application/json
+        responses:
+          200:
+            description: 'Success: Everything worked as expected.'
+            examples:
+              cursor: 2
+              has_more: false
+              changes:
+              - CHANGEID: 1
+                BUILDINGID: 1
+                OPERATION: upsert
+                CHANGEDAT: '2019-02-01T12:00:00'
+                building:
+                  BUILDINGID: 1
+                  BUILDINGNAME: Building 1
+              - CHANGEID: 2
+                BUILDINGID: 2
+                OPERATION: delete
+                CHANGEDAT: '2019-02-01T12:05:00'
+                building: null
+          400:
+            description: 'Bad Request: The request was unacceptable due to wrong parameter(s).'
+          401:
+            description: 'Unauthorized: Inavlid access_token used.'
+          500:
+            description: 'Server Error: Something went wrong on our end.'
+        """
+
+        since = request.args.get('since', 0, type=int)
+        limit = request.args.get('limit', 100, type=int)
+        if since is None or since < 0 or \
+                not 1 <= limit <= current_app.config['CHANGES_MAX_PAGE']:
+            return (jsonify({'message': 'Invalid since or limit.'}), 400)
+
+        changes, has_more = changes_since(
+            since, limit, current_app.config['CHANGES_SETTLE_SECONDS'])
+        with serialization_timer():
+            result = buildings_schema.dump(
+                [building for _, building in changes if building is not None])
+        buildings = iter(result.data)
+        return jsonify({
+            'cursor': changes[-1][0].CHANGEID if changes else since,
+            'has_more': has_more,
+            'changes': [{
+                'CHANGEID': change.CHANGEID,
+                'BUILDINGID': change.BUILDINGID,
+                'OPERATION': change.OPERATION,
+                'CHANGEDAT': change.CHANGEDAT.isoformat(),
+                'building': None if building is None else next(buildings),
+            } for change, building in changes]})
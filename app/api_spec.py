@@ -0,0 +1,64 @@
+import hashlib
+import threading
+
+from flask import current_app, json, request
+
+from .compression import available_encodings, compress
+
+# flasgger's view of the spec behind /apispec_1.json
+SPEC_ENDPOINT = 'flasgger.apispec_1'
+# The spec is compressed once, so use the highest levels.
+SPEC_COMPRESS_LEVELS = {'zstd': 19, 'br': 11, 'gzip': 9}
+
+_lock = threading.Lock()
+
+
+def spec_json(app):
+    """The Swagger spec of ``app`` as JSON bytes, with stable key order so
+    that the same spec always hashes to the same ETag."""
+    with app.test_request_context():
+        spec = app.swag.get_apispecs(SPEC_ENDPOINT.split('.')[1])
+        return json.dumps(spec, sort_keys=True).encode('utf-8')
+
+
+def cached_spec(app):
+    """``(etag, {encoding or None: body})`` of the spec, built on first use
+    and then kept for the life of ``app``."""
+    cached = app.extensions.get('api_spec')
+    if cached is None:
+        with _lock:
+            cached = app.extensions.get('api_spec')
+            if cached is None:
+                body = spec_json(app)
+                bodies = {None: body}
+                for encoding in available_encodings():
+                    bodies[encoding] = compress(
+                        body, encoding, SPEC_COMPRESS_LEVELS[encoding])
+                etag = hashlib.sha256(body).hexdigest()[:32]
+                cached = app.extensions['api_spec'] = etag, bodies
+    return cached
+
+
+def serve_spec():
+    """The cached spec in the best encoding the client accepts. Each
+    encoding gets its own strong ETag, and matching If-None-Match gets a
+    304."""
+    etag, bodies = cached_spec(current_app)
+    encoding = next((e for e in bodies
+                     if e is not None and request.accept_encodings[e]), None)
+    response = current_app.response_class(bodies[encoding],
+                                          mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+        etag = '{}-{}'.format(etag, encoding)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['API_SPEC_MAX_AGE']
+    return response.make_conditional(request)
+
+
+def register_api_spec_cache(app):
+    """Serve flasgger's /apispec_1.json from the cache (called from
+    __init__.py, once the API views are registered)."""
+    app.view_functions[SPEC_ENDPOINT] = serve_spec
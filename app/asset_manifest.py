@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import shutil
+
+from flask import url_for
+
+from .assets import bundles
+
+# Characters of the content hash put in built file names
+HASH_LENGTH = 12
+
+
+def hashed_name(path, data):
+    """``styles/app.css`` -> ``styles/app.<hash of data>.css``."""
+    root, ext = os.path.splitext(path)
+    return '{}.{}{}'.format(root, hashlib.sha256(data).hexdigest()
+                            [:HASH_LENGTH], ext)
+
+
+def build_assets(app):
+    """Build every webassets bundle, copy each output to a file named after
+    its content and write the manifest of bundle name -> static path.
+
+    Files of earlier builds are kept, so pages rendered by workers that are
+    still running keep working. Returns the manifest.
+    """
+    env = app.jinja_env.assets_environment
+    manifest = {}
+    with app.app_context():
+        for name in sorted(bundles):
+            bundle = env[name]
+            bundle.build(force=True)
+            output = bundle.resolve_output(env)
+            with open(output, 'rb') as f:
+                data = f.read()
+            path = hashed_name(os.path.relpath(output, env.directory), data)
+            target = os.path.join(env.directory, path)
+            if not os.path.exists(target):
+                shutil.copyfile(output, target)
+            manifest[name] = path.replace(os.sep, '/')
+    with open(app.config['ASSET_MANIFEST_FILE'], 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def register_asset_manifest(app):
+    """Add ``asset_urls(bundle name)`` for templates (called from
+    __init__.py, after the bundles are registered).
+
+    With USE_ASSET_MANIFEST, the URLs come from the manifest that
+    `manage.py build_assets` wrote, read once here, and webassets neither
+    builds nor checks files at request time. Otherwise, or if there is no
+    manifest yet, webassets resolves them as before.
+    """
+    env = app.jinja_env.assets_environment
+    manifest = None
+    if app.config.get('USE_ASSET_MANIFEST'):
+        try:
+            with open(app.config['ASSET_MANIFEST_FILE']) as f:
+                manifest = json.load(f)
+        except (IOError, ValueError):
+            app.logger.warning(
+                'No asset manifest at %s; run `manage.py build_assets`',
+                app.config['ASSET_MANIFEST_FILE'])
+        else:
+            env.auto_build = False
+    app.extensions['asset_manifest'] = manifest
+
+    @app.template_global()
+    def asset_urls(name):
+        if manifest is not None and name in manifest:
+            return [url_for('static', filename=manifest[name])]
+        return env[name].urls()
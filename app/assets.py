@@ -13,3 +13,11 @@ vendor_js = Bundle(
     'vendor/zxcvbn.js',
     filters='jsmin',
     output='scripts/vendor.js')
+
+# Registered under these names, used by {% assets %} and asset_urls()
+bundles = {
+    'app_css': app_css,
+    'app_js': app_js,
+    'vendor_css': vendor_css,
+    'vendor_js': vendor_js,
+}
@@ -0,0 +1,103 @@
+import datetime
+import os
+
+from databases import Database
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+
+from config import config
+from .database import REPLICA_BIND
+from .models import Token
+from .models.building import BuildingModel
+
+buildings = BuildingModel.__table__
+tokens = Token.__table__
+
+
+def bearer_token(request):
+    """The access token from the Authorization header or the
+    ``access_token`` query argument, where oauthlib looks for it."""
+    authorization = request.headers.get('authorization', '').split()
+    if len(authorization) == 2 and authorization[0].lower() == 'bearer':
+        return authorization[1]
+    return request.query_params.get('access_token')
+
+
+def token_allows(token, scopes, now=None):
+    """The checks of ``OAuth2Provider.validate_bearer_token`` on a token
+    row: it exists, has not expired and shares a scope with ``scopes``."""
+    if token is None:
+        return False
+    now = now or datetime.datetime.utcnow()
+    if token['expires'] is not None and now > token['expires']:
+        return False
+    return bool(set((token['_scopes'] or '').split()) & set(scopes))
+
+
+def building_dict(row):
+    # BUILDINGCELL is an index key, not part of the API (see BuildingSchema).
+    return {column.name: row[column.name] for column in buildings.columns
+            if column.name != 'BUILDINGCELL'}
+
+
+def create_async_app(config_name, database_url=None):
+    """Read-only ASGI app for GET /v1/buildings and /v1/buildings/<id>.
+
+    Reads go to the replica when the config has one, with token lookups
+    falling back to the primary on a miss as in app/api/auth/views.py.
+    ``ASYNC_DATABASE_URL`` (or ``database_url``) overrides the primary.
+    """
+    app_config = config[config_name]
+    primary = Database(database_url or os.environ.get('ASYNC_DATABASE_URL') or
+                       app_config.SQLALCHEMY_DATABASE_URI)
+    replica_url = (app_config.SQLALCHEMY_BINDS or {}).get(REPLICA_BIND)
+    replica = Database(replica_url) if replica_url else None
+    reads = replica or primary
+
+    app = Starlette()
+
+    @app.on_event('startup')
+    async def connect():
+        await primary.connect()
+        if replica is not None:
+            await replica.connect()
+
+    @app.on_event('shutdown')
+    async def disconnect():
+        await primary.disconnect()
+        if replica is not None:
+            await replica.disconnect()
+
+    async def authorized(request, scope):
+        access_token = bearer_token(request)
+        if not access_token:
+            return False
+        query = tokens.select().where(tokens.c.access_token == access_token)
+        token = await reads.fetch_one(query)
+        if token is None and replica is not None:
+            token = await primary.fetch_one(query)
+        return token_allows(token, [scope])
+
+    def unauthorized():
+        return JSONResponse({'message': 'Invalid access_token.'},
+                            status_code=401)
+
+    @app.route('/v1/buildings/{building_id:int}')
+    async def building(request):
+        if not await authorized(request, 'building'):
+            return unauthorized()
+        row = await reads.fetch_one(buildings.select().where(
+            buildings.c.BUILDINGID == request.path_params['building_id']))
+        if row is None:
+            return JSONResponse({'message': 'Building not found.'},
+                                status_code=404)
+        return JSONResponse(building_dict(row))
+
+    @app.route('/v1/buildings')
+    async def building_list(request):
+        if not await authorized(request, 'buildings'):
+            return unauthorized()
+        rows = await reads.fetch_all(buildings.select())
+        return JSONResponse([building_dict(row) for row in rows])
+
+    return app
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import literal, select
+
+from . import db
+from .models.building import BuildingChangeModel, BuildingModel
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+
+def record_change(building, operation):
+    """Log a change of ``building`` to be committed with the write,
+    flushing a new building first so that it has its id."""
+    if building.BUILDINGID is None:
+        db.session.flush()
+    db.session.add(BuildingChangeModel(BUILDINGID=building.BUILDINGID,
+                                       OPERATION=operation))
+
+
+def record_inserted(conn, first_id, last_id=None):
+    """Log bulk-inserted buildings through ``conn`` as the ids from
+    ``first_id`` to ``last_id`` (or the highest). Existing buildings in the
+    range get a redundant, harmless upsert."""
+    buildings = BuildingModel.__table__
+    query = select([buildings.c.BUILDINGID, literal(UPSERT),
+                    literal(datetime.utcnow())]).where(
+                        buildings.c.BUILDINGID >= first_id)
+    if last_id is not None:
+        query = query.where(buildings.c.BUILDINGID <= last_id)
+    conn.execute(BuildingChangeModel.__table__.insert().from_select(
+        ['BUILDINGID', 'OPERATION', 'CHANGEDAT'], query))
+
+
+def changes_since(since, limit, settle_seconds=0):
+    """Up to ``limit`` ``(change, building or None)`` pairs after the
+    ``since`` CHANGEID, oldest first, and whether more follow.
+
+    Changes newer than ``settle_seconds`` are held back: on databases with
+    concurrent writers a transaction can commit after one with a higher
+    CHANGEID, and a client that had already moved past it would miss it.
+    """
+    query = db.session.query(BuildingChangeModel, BuildingModel).outerjoin(
+        BuildingModel,
+        BuildingModel.BUILDINGID == BuildingChangeModel.BUILDINGID).filter(
+            BuildingChangeModel.CHANGEID > since)
+    if settle_seconds:
+        query = query.filter(BuildingChangeModel.CHANGEDAT <=
+                             datetime.utcnow() -
+                             timedelta(seconds=settle_seconds))
+    rows = query.order_by(BuildingChangeModel.CHANGEID).limit(
+        limit + 1).all()
+    # A deleted id can be reused by a later building, which then has its
+    # own change.
+    changes = [(change, None if change.OPERATION == DELETE else building)
+               for change, building in rows[:limit]]
+    return changes, len(rows) > limit
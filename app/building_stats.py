@@ -0,0 +1,69 @@
+from sqlalchemy import func, select
+
+from . import db
+from .database import increment_counters
+from .models.building import BuildingModel, BuildingStatsModel
+
+# Each grouping also keeps the coarser levels, since state and city names
+# are only unique within their country and state.
+GROUPINGS = {
+    'country': ('BUILDINGCOUNTRY',),
+    'state': ('BUILDINGCOUNTRY', 'BUILDINGSTATE'),
+    'city': ('BUILDINGCOUNTRY', 'BUILDINGSTATE', 'BUILDINGCITY'),
+}
+KEY_COLUMNS = GROUPINGS['city']
+
+
+def stats_key(building):
+    """The summary row a building is counted in."""
+    return tuple(getattr(building, column) or '' for column in KEY_COLUMNS)
+
+
+def count_building(key, delta):
+    """Add ``delta`` to the count of ``key`` in the current transaction."""
+    # Write the building first: on SQLite that takes the database write
+    # lock, so no other request can insert the same key in between.
+    db.session.flush()
+    add_counts(db.session.connection(mapper=BuildingStatsModel.__mapper__),
+               {key: delta})
+
+
+def add_counts(conn, counts):
+    """Add a ``{key: delta}`` mapping to the summary rows through ``conn``,
+    in one batch of statements however many keys there are."""
+    increment_counters(conn, BuildingStatsModel.__table__, KEY_COLUMNS,
+                       counts, 'BUILDINGCOUNT')
+
+
+def move_building(old_key, new_key):
+    """Count an updated building under its new location."""
+    if old_key != new_key:
+        count_building(old_key, -1)
+        count_building(new_key, 1)
+
+
+def building_stats(group_by):
+    """``[(key values, count)]`` for a grouping, largest groups first.
+    Reads only the summary table, so the cost grows with the number of
+    groups rather than the number of buildings.
+    """
+    columns = [getattr(BuildingStatsModel, column)
+               for column in GROUPINGS[group_by]]
+    total = func.sum(BuildingStatsModel.BUILDINGCOUNT)
+    rows = db.session.query(*(columns + [total])).group_by(*columns).having(
+        total > 0).order_by(total.desc(), *columns).all()
+    return [(tuple(value or None for value in row[:-1]), int(row[-1]))
+            for row in rows]
+
+
+def rebuild_building_stats():
+    """Recount every building. Returns the number of summary rows."""
+    buildings = BuildingModel.__table__
+    stats = BuildingStatsModel.__table__
+    keys = [func.coalesce(buildings.c[column], '') for column in KEY_COLUMNS]
+    db.session.execute(stats.delete())
+    db.session.execute(stats.insert().from_select(
+        list(KEY_COLUMNS) + ['BUILDINGCOUNT'],
+        select(keys + [func.count()]).group_by(*keys)))
+    db.session.commit()
+    return db.session.query(BuildingStatsModel).count()
@@ -0,0 +1,215 @@
+import csv
+import gzip
+import io
+import json
+import sys
+from collections import Counter, deque
+from functools import partial
+from multiprocessing import Pool
+
+import marshmallow
+from sqlalchemy import func, select
+
+from .building_changes import record_inserted
+from .building_stats import KEY_COLUMNS, add_counts
+from .geo import grid_cell
+from .models.building import BuildingModel
+from .schemas.building import BuildingSchema
+
+FORMATS = ('csv', 'ndjson')
+COLUMNS = ('BUILDINGID', 'BUILDINGNAME', 'BUILDINGCITY', 'BUILDINGSTATE',
+           'BUILDINGCOUNTRY', 'BUILDINGLATITUDE', 'BUILDINGLONGITUDE',
+           'BUILDINGCELL')
+
+
+class BuildingRowSchema(BuildingSchema):
+    """BuildingSchema validation that loads plain dicts, so rows can be
+    checked in worker processes without a session or model instances."""
+
+    def load(self, data, *args, **kwargs):
+        return marshmallow.Schema.load(self, data, *args, **kwargs)
+
+    def make_instance(self, data):
+        return data
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+def open_source(path):
+    """Text stream of ``path``, stdin for '-', decompressing .gz files."""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def read_records(stream, format):
+    """Yield ``(line number, record)`` one at a time from ``stream``."""
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # Empty CSV cells are missing values, not empty strings.
+            yield reader.line_num, {key: value for key, value in
+                                    record.items() if value != ''}
+        return
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = e
+            yield number, record
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+_schema = None
+
+
+def validate_chunk(records, keep_ids=False):
+    """Split ``(line, record)`` pairs into insertable rows and
+    ``(line, errors, record)`` rejects."""
+    global _schema
+    if _schema is None:
+        _schema = BuildingRowSchema()
+    rows, rejects = [], []
+    for line, record in records:
+        if not isinstance(record, dict):
+            rejects.append((line, {'_schema': [str(record)]}, None))
+            continue
+        data, errors = _schema.load(record)
+        if errors:
+            rejects.append((line, errors, record))
+            continue
+        row = dict.fromkeys(COLUMNS)
+        row.update(data)
+        if not keep_ids:
+            row['BUILDINGID'] = None
+        row['BUILDINGCELL'] = grid_cell(row['BUILDINGLATITUDE'],
+                                        row['BUILDINGLONGITUDE'])
+        rows.append(row)
+    return rows, rejects
+
+
+def ordered_map(function, items, workers):
+    """``function(item)`` for each item, in order, computed in up to
+    ``workers`` processes with at most two items per worker in memory.
+
+    ``function`` must be picklable (a module-level function or a partial
+    of one).
+    """
+    if workers <= 1:
+        for item in items:
+            yield function(item)
+        return
+    pool = Pool(workers)
+    try:
+        pending = deque()
+        for item in items:
+            pending.append(pool.apply_async(function, (item,)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+
+
+def validated_chunks(records, chunk_size, keep_ids, workers):
+    """Validate chunks of ``records`` in order, in up to ``workers``
+    processes."""
+    return ordered_map(partial(validate_chunk, keep_ids=keep_ids),
+                       chunked(records, chunk_size), workers)
+
+
+def copy_rows(conn, table, columns, rows):
+    """Insert ``rows`` (dicts) into ``table`` with COPY on PostgreSQL and
+    executemany elsewhere."""
+    if conn.dialect.driver != 'psycopg2':
+        conn.execute(table.insert(),
+                     [{c: row[c] for c in columns} for row in rows])
+        return
+    buffer = io.StringIO()
+    # Strings are quoted, so only None is written as an unquoted empty
+    # field, which COPY reads as NULL.
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerows([row[c] for c in columns] for row in rows)
+    buffer.seek(0)
+    statement = 'COPY "{}" ({}) FROM STDIN WITH (FORMAT csv)'.format(
+        table.name, ', '.join('"{}"'.format(c) for c in columns))
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(statement, buffer)
+    finally:
+        cursor.close()
+
+
+def insert_rows(conn, rows, keep_ids):
+    """Insert building ``rows``, with their ids if ``keep_ids``."""
+    copy_rows(conn, BuildingModel.__table__,
+              [c for c in COLUMNS if keep_ids or c != 'BUILDINGID'], rows)
+
+
+def reset_sequence(conn, table, column):
+    """Move a PostgreSQL serial sequence past explicitly inserted ids."""
+    if conn.dialect.name != 'postgresql':
+        return
+    conn.execute(select([func.setval(
+        func.pg_get_serial_sequence('"{}"'.format(table.name), column),
+        select([func.max(table.c[column])]).as_scalar())]))
+
+
+def import_buildings(engine, records, chunk_size=10000, keep_ids=False,
+                     workers=1, on_chunk=None, on_reject=None):
+    """Validate and insert ``(line, record)`` pairs, committing every
+    ``chunk_size`` records together with the matching BUILDINGSTATS counts
+    and change log entries.
+
+    ``on_reject(line, errors, record)`` is called for every invalid record
+    and ``on_chunk(imported, rejected)`` after each commit. Returns the
+    ``(imported, rejected)`` totals.
+    """
+    imported = rejected = 0
+    with engine.connect() as conn:
+        for rows, rejects in validated_chunks(records, chunk_size, keep_ids,
+                                              workers):
+            with conn.begin():
+                if rows:
+                    ids = [row['BUILDINGID'] for row in rows]
+                    if keep_ids and None not in ids:
+                        first_id, last_id = min(ids), max(ids)
+                    else:
+                        first_id, last_id = (conn.scalar(select([func.max(
+                            BuildingModel.BUILDINGID)])) or 0) + 1, None
+                    insert_rows(conn, rows, keep_ids)
+                    record_inserted(conn, first_id, last_id)
+                    add_counts(conn, Counter(
+                        tuple(row[c] or '' for c in KEY_COLUMNS)
+                        for row in rows))
+            imported += len(rows)
+            rejected += len(rejects)
+            if on_reject is not None:
+                for reject in rejects:
+                    on_reject(*reject)
+            if on_chunk is not None:
+                on_chunk(imported, rejected)
+        if keep_ids:
+            reset_sequence(conn, BuildingModel.__table__, 'BUILDINGID')
+    return imported, rejected
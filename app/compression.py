@@ -0,0 +1,127 @@
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def available_encodings():
+    """Content-Encodings we can produce, in order of preference."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+def choose_encoding(accept_encodings):
+    for encoding in available_encodings():
+        if accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def choose_level(size, levels):
+    """Pick the level of the first ``(max_size, level)`` band ``size`` fits.
+
+    A ``max_size`` of None matches everything, and is also the band used
+    for streamed responses whose size is unknown up front.
+    """
+    for max_size, level in levels:
+        if max_size is None or size is not None and size < max_size:
+            return level
+    return levels[-1][1]
+
+
+def compress(data, encoding, level):
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, level)
+
+
+def compress_stream(chunks, encoding, level):
+    """Compress an iterable of chunks, flushing after each one so clients
+    receive rows as they are produced."""
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+        def flush():
+            return compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+        process, finish = compressor.compress, compressor.flush
+    elif encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = \
+            compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+        def flush():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        process, finish = compressor.compress, compressor.flush
+
+    for chunk in chunks:
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('utf-8')
+        data = process(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+def compress_api_response(response, config):
+    """Apply the API compression policy to ``response`` in place.
+
+    Bodies under ``API_COMPRESS_MIN_SIZE`` are sent as-is, buffered bodies
+    get a level from ``API_COMPRESS_LEVELS`` by size, and streamed bodies
+    are compressed chunk by chunk.
+    """
+    if response.mimetype not in config['COMPRESS_MIMETYPES'] or \
+            not 200 <= response.status_code < 300 or \
+            'Content-Encoding' in response.headers:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    levels = config['API_COMPRESS_LEVELS']
+    if response.is_streamed:
+        response.response = compress_stream(
+            response.response, encoding, choose_level(None, levels))
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['API_COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(
+            compress(data, encoding, choose_level(len(data), levels)))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def register_compression(app, compress_ext):
+    """Use the API policy under ``API_COMPRESS_PREFIXES`` and Flask-Compress
+    everywhere else (called from __init__.py)."""
+    prefixes = tuple(app.config['API_COMPRESS_PREFIXES'])
+
+    @app.after_request
+    def compress_response(response):
+        if request.path.startswith(prefixes):
+            return compress_api_response(response, app.config)
+        return compress_ext.after_request(response)
@@ -0,0 +1,287 @@
+import hashlib
+import time
+import weakref
+from contextlib import contextmanager
+from functools import wraps
+from math import ceil
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy import SQLAlchemy as BaseSQLAlchemy
+from flask_sqlalchemy import SignallingSession
+from redis.exceptions import RedisError
+from sqlalchemy import and_, bindparam, event, exists, orm, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.pool import QueuePool
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(SignallingSession):
+    """Sends reads made inside ``db.replica()`` to the replica bind.
+
+    Flushes, and tables that already have their own bind, always use the
+    normal Flask-SQLAlchemy bind selection.
+    """
+
+    def __init__(self, db, *args, **kwargs):
+        self.db = db
+        super(RoutingSession, self).__init__(db, *args, **kwargs)
+
+    def get_bind(self, mapper=None, clause=None):
+        if not self._flushing and has_app_context() and \
+                g.get('_db_use_replica'):
+            info = getattr(mapper.mapped_table, 'info', {}) if mapper else {}
+            if info.get('bind_key') is None:
+                return self.db.get_engine(self.app, bind=REPLICA_BIND)
+        return super(RoutingSession, self).get_bind(mapper, clause)
+
+
+def _mark_write(*args):
+    if has_app_context():
+        g._db_wrote = True
+
+
+for _event in ('after_flush', 'after_bulk_update', 'after_bulk_delete'):
+    event.listen(RoutingSession, _event, _mark_write)
+
+
+class _ReplicaState(object):
+    """Per-app replica bookkeeping: the last lag check, and the clients that
+    wrote recently.
+
+    Writers are kept in Redis (the RQ server) so that every worker sees
+    them, under a hash of the client's credential that expires once the
+    replica has had time to catch up.
+    """
+
+    prefix = 'replica:wrote:'
+
+    def __init__(self, app):
+        self.app = app
+        self.lag = (0, 0.0)
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            from redis import Redis
+            config = self.app.config
+            self._redis = Redis(host=config['RQ_DEFAULT_HOST'],
+                                port=config['RQ_DEFAULT_PORT'],
+                                db=config['RQ_DEFAULT_DB'],
+                                password=config['RQ_DEFAULT_PASSWORD'],
+                                socket_timeout=1)
+        return self._redis
+
+    @redis.setter
+    def redis(self, client):
+        self._redis = client
+
+    def remember(self, key, seconds):
+        try:
+            self.redis.setex(self.prefix + key, max(1, int(ceil(seconds))), 1)
+        except RedisError:
+            self.app.logger.warning('Could not record a replica writer',
+                                    exc_info=True)
+
+    def wrote_recently(self, key):
+        try:
+            return bool(self.redis.exists(self.prefix + key))
+        except RedisError:
+            # Unknown, so read from the primary to be safe.
+            return True
+
+
+class SQLAlchemy(BaseSQLAlchemy):
+    """Flask-SQLAlchemy with per-config engine options and a read replica.
+
+    Reads ``SQLALCHEMY_ENGINE_OPTIONS`` (the key Flask-SQLAlchemy 2.4 later
+    adopted), adds a Postgres statement timeout and applies
+    ``SQLALCHEMY_SQLITE_PRAGMAS`` to every new SQLite connection. A
+    ``replica`` entry in ``SQLALCHEMY_BINDS`` enables :meth:`replica`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._pragma_engines = weakref.WeakSet()
+        super(SQLAlchemy, self).__init__(*args, **kwargs)
+
+    def init_app(self, app):
+        super(SQLAlchemy, self).init_app(app)
+        app.config.setdefault('SQLALCHEMY_REPLICA_MAX_LAG', 5)
+        app.config.setdefault('SQLALCHEMY_REPLICA_LAG_CHECK_INTERVAL', 5)
+        app.extensions['sqlalchemy_replica'] = _ReplicaState(app)
+        app.before_request(self._forget_write)
+        app.after_request(self._remember_writer)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def has_replica(self, app=None):
+        binds = self.get_app(app).config.get('SQLALCHEMY_BINDS') or {}
+        return REPLICA_BIND in binds
+
+    @contextmanager
+    def replica(self):
+        """Route the reads made inside the block to the replica bind.
+
+        Falls back to the primary when no replica is configured, when the
+        replica lags more than ``SQLALCHEMY_REPLICA_MAX_LAG`` seconds, or
+        when the current client wrote within that window, so clients
+        always read their own writes.
+        """
+        previous = g.get('_db_use_replica', False)
+        g._db_use_replica = self._replica_allowed()
+        try:
+            yield
+        finally:
+            g._db_use_replica = previous
+
+    def replica_read(self, f):
+        """Decorator form of :meth:`replica`."""
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            with self.replica():
+                return f(*args, **kwargs)
+
+        return decorated_function
+
+    def _replica_allowed(self):
+        app = current_app._get_current_object()
+        if not self.has_replica(app) or g.get('_db_wrote'):
+            return False
+        max_lag = app.config['SQLALCHEMY_REPLICA_MAX_LAG']
+        key = _client_key()
+        if key is not None and \
+                app.extensions['sqlalchemy_replica'].wrote_recently(key):
+            return False
+        return self.replica_lag(app) <= max_lag
+
+    def replica_lag(self, app=None):
+        """Seconds the replica is behind, cached per check interval."""
+        app = self.get_app(app)
+        state = app.extensions['sqlalchemy_replica']
+        checked_at, lag = state.lag
+        now = time.time()
+        interval = app.config['SQLALCHEMY_REPLICA_LAG_CHECK_INTERVAL']
+        if now - checked_at < interval:
+            return lag
+        engine = self.get_engine(app, bind=REPLICA_BIND)
+        if engine.dialect.name == 'postgresql':
+            # The last replayed transaction ages on an idle primary, so a
+            # replica that has replayed all it received is not behind.
+            lag = engine.execute(
+                'SELECT CASE WHEN pg_last_wal_receive_lsn() = '
+                'pg_last_wal_replay_lsn() THEN 0 ELSE '
+                'COALESCE(EXTRACT(EPOCH FROM now() - '
+                'pg_last_xact_replay_timestamp()), 0) END').scalar()
+        else:
+            # No replication metadata to ask, e.g. two SQLite files.
+            lag = 0.0
+        state.lag = (now, float(lag))
+        return float(lag)
+
+    def _forget_write(self):
+        g._db_wrote = False
+
+    def _remember_writer(self, response):
+        key = _client_key()
+        if key is not None and g.get('_db_wrote') and self.has_replica():
+            current_app.extensions['sqlalchemy_replica'].remember(
+                key, current_app.config['SQLALCHEMY_REPLICA_MAX_LAG'])
+        return response
+
+    def apply_driver_hacks(self, app, info, options):
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        if info.drivername == 'sqlite':
+            pool_size = options.pop('pool_size', None)
+            max_overflow = options.pop('max_overflow', None)
+            pool_timeout = options.pop('pool_timeout', None)
+        super(SQLAlchemy, self).apply_driver_hacks(app, info, options)
+
+        if info.drivername == 'sqlite':
+            # pysqlite defaults to NullPool for files, which reconnects and
+            # re-runs the pragmas on every checkout. Keep a real pool instead
+            # when the config asks for one.
+            if pool_size and info.database not in (None, '', ':memory:'):
+                options['poolclass'] = QueuePool
+                options['pool_size'] = pool_size
+                if max_overflow is not None:
+                    options['max_overflow'] = max_overflow
+                if pool_timeout is not None:
+                    options['pool_timeout'] = pool_timeout
+                options.setdefault('connect_args', {})
+                options['connect_args']['check_same_thread'] = False
+        elif info.drivername.startswith('postgres'):
+            timeout = app.config.get('SQLALCHEMY_STATEMENT_TIMEOUT')
+            if timeout:
+                options.setdefault('connect_args', {})
+                options['connect_args'].setdefault(
+                    'options', '-c statement_timeout={:d}'.format(timeout))
+
+    def get_engine(self, app=None, bind=None):
+        engine = super(SQLAlchemy, self).get_engine(app, bind)
+        if engine.dialect.name == 'sqlite' and \
+                engine not in self._pragma_engines:
+            pragmas = self.get_app(app).config.get('SQLALCHEMY_SQLITE_PRAGMAS')
+            if pragmas:
+                listen_sqlite_pragmas(engine, pragmas)
+            self._pragma_engines.add(engine)
+        return engine
+
+
+def listen_sqlite_pragmas(engine, pragmas):
+    """Run ``PRAGMA key=value`` for each item on every new connection."""
+    statements = ['PRAGMA {}={}'.format(k, v) for k, v in pragmas.items()]
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+def increment_counters(conn, table, key_columns, counts,
+                       count_column='count'):
+    """Add a ``{key values: delta}`` mapping to ``count_column`` of the rows
+    of ``table`` keyed by ``key_columns``, inserting missing rows, through
+    ``conn`` in one batch of statements however many keys there are."""
+    if not counts:
+        return
+    keys = {column: bindparam('key_' + column, type_=table.c[column].type)
+            for column in key_columns}
+    delta = bindparam('delta', type_=table.c[count_column].type)
+    params = [dict(zip(['key_' + column for column in key_columns], key),
+                   delta=value) for key, value in counts.items()]
+    if conn.dialect.name == 'postgresql':
+        insert = postgresql.insert(table).values({count_column: delta},
+                                                 **keys)
+        conn.execute(insert.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={count_column: table.c[count_column] +
+                  insert.excluded[count_column]}), params)
+        return
+    matches = and_(*[table.c[column] == keys[column]
+                     for column in key_columns])
+    updated = conn.execute(table.update().where(matches).values(
+        {count_column: table.c[count_column] + delta}), params)
+    # Each key matches at most one row, so fewer rows than keys means
+    # some are new.
+    if updated.rowcount < len(params):
+        conn.execute(table.insert().from_select(
+            list(key_columns) + [count_column],
+            select([keys[column] for column in key_columns] + [delta])
+            .where(~exists().where(matches))), params)
+
+
+def _client_key():
+    """A hash identifying the API client making the current request, if
+    any; the credential itself is never stored."""
+    if not has_request_context():
+        return None
+    credential = request.args.get('access_token') or \
+        request.headers.get('Authorization')
+    if not credential:
+        return None
+    return hashlib.sha256(credential.encode('utf-8')).hexdigest()
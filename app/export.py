@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+
+from . import db
+from .bulk_import import chunked
+from .models.building import BuildingModel
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet output is optional (requirements-parquet.txt)
+    pyarrow = None
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+# The API columns; BUILDINGCELL is derived from the coordinates.
+COLUMNS = ('BUILDINGID', 'BUILDINGNAME', 'BUILDINGCITY', 'BUILDINGSTATE',
+           'BUILDINGCOUNTRY', 'BUILDINGLATITUDE', 'BUILDINGLONGITUDE')
+
+
+def export_rows(batch_size):
+    """Iterator of building tuples in id order.
+
+    The query runs when this is called, and rows are then fetched
+    ``batch_size`` at a time (a server-side cursor on PostgreSQL), so
+    memory does not grow with the table.
+    """
+    query = db.session.query(*[getattr(BuildingModel, column)
+                               for column in COLUMNS])
+    return iter(query.order_by(BuildingModel.BUILDINGID).yield_per(
+        batch_size))
+
+
+def csv_chunks(rows, batch_size):
+    """CSV text, one chunk per ``batch_size`` rows after the header."""
+    yield ','.join(COLUMNS) + '\r\n'
+    for batch in chunked(rows, batch_size):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(rows, batch_size):
+    for batch in chunked(rows, batch_size):
+        yield ''.join(json.dumps(dict(zip(COLUMNS, row))) + '\n'
+                      for row in batch)
+
+
+CHUNKS = {'csv': csv_chunks, 'ndjson': ndjson_chunks}
+
+
+def parquet_schema():
+    string, double = pyarrow.string(), pyarrow.float64()
+    return pyarrow.schema([
+        ('BUILDINGID', pyarrow.int64()), ('BUILDINGNAME', string),
+        ('BUILDINGCITY', string), ('BUILDINGSTATE', string),
+        ('BUILDINGCOUNTRY', string), ('BUILDINGLATITUDE', double),
+        ('BUILDINGLONGITUDE', double)])
+
+
+def write_parquet(rows, path, batch_size):
+    """Write ``rows`` to a Parquet file, one row group per batch."""
+    if pyarrow is None:
+        raise RuntimeError('Parquet export requires pyarrow '
+                           '(pip install -r requirements-parquet.txt)')
+    schema = parquet_schema()
+    writer = pyarrow.parquet.ParquetWriter(path, schema,
+                                           compression='snappy')
+    try:
+        for batch in chunked(rows, batch_size):
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(values, type=field.type)
+                 for values, field in zip(zip(*batch), schema)],
+                schema=schema))
+    finally:
+        writer.close()
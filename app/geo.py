@@ -0,0 +1,118 @@
+import math
+
+from sqlalchemy import and_, or_
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Buildings are bucketed into a fixed grid of CELL_DEGREES square cells,
+# numbered row by row from the south-west corner, so the cells of one row
+# of a bounding box form a contiguous range. A plain B-tree index on the
+# cell number then answers box and radius queries on any database.
+# Changing the cell size requires recomputing BUILDINGCELL for every row.
+CELL_DEGREES = 0.01
+ROWS = int(round(180 / CELL_DEGREES))
+COLUMNS = int(round(360 / CELL_DEGREES))
+# A radius search reads rings of radius/16, radius/4 and radius in turn,
+# stopping at the first that holds enough buildings.
+RING_FRACTIONS = (1 / 16, 1 / 4, 1)
+
+
+def _row(lat):
+    return min(max(int((lat + 90) / CELL_DEGREES), 0), ROWS - 1)
+
+
+def _column(lon):
+    return min(max(int((lon + 180) / CELL_DEGREES), 0), COLUMNS - 1)
+
+
+def grid_cell(lat, lon):
+    """Cell number of a coordinate, or None if either part is missing."""
+    if lat is None or lon is None:
+        return None
+    return _row(lat) * COLUMNS + _column(lon)
+
+
+def longitude_ranges(min_lon, max_lon):
+    """Split a longitude span that crosses the antimeridian (min > max)."""
+    if min_lon <= max_lon:
+        return [(min_lon, max_lon)]
+    return [(min_lon, 180.0), (-180.0, max_lon)]
+
+
+def cell_ranges(min_lat, min_lon, max_lat, max_lon):
+    """Inclusive ``(first, last)`` cell ranges covering a bounding box."""
+    ranges = []
+    for first, last in sorted(
+            (row * COLUMNS + _column(low), row * COLUMNS + _column(high))
+            for row in range(_row(min_lat), _row(max_lat) + 1)
+            for low, high in longitude_ranges(min_lon, max_lon)):
+        if ranges and ranges[-1][1] + 1 >= first:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], last))
+        else:
+            ranges.append((first, last))
+    return ranges
+
+
+def bounding_box(lat, lon, radius_km):
+    """``(min_lat, min_lon, max_lat, max_lon)`` enclosing a circle."""
+    angle = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angle)
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+    if min_lat <= -90 or max_lat >= 90 or \
+            math.sin(angle) >= math.cos(math.radians(lat)):
+        # The circle reaches a pole, so it spans every longitude.
+        return max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0
+    delta_lon = math.degrees(
+        math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+    min_lon, max_lon = lon - delta_lon, lon + delta_lon
+    if min_lon < -180:
+        min_lon += 360
+    if max_lon > 180:
+        max_lon -= 360
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + \
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def box_condition(model, min_lat, min_lon, max_lat, max_lon):
+    """Filter for rows of ``model`` inside the box: the cell ranges select
+    candidates through the index and the coordinates are then checked
+    exactly."""
+    cells = or_(*[model.BUILDINGCELL.between(first, last)
+                  for first, last in cell_ranges(
+                      min_lat, min_lon, max_lat, max_lon)])
+    longitudes = or_(*[model.BUILDINGLONGITUDE.between(low, high)
+                       for low, high in longitude_ranges(min_lon, max_lon)])
+    return and_(cells, model.BUILDINGLATITUDE.between(min_lat, max_lat),
+                longitudes)
+
+
+def nearest(session, model, lat, lon, radius_km, limit, max_candidates):
+    """``[(distance in km, id)]`` of the ``limit`` rows of ``model``
+    nearest to a point and at most ``radius_km`` away, nearest first.
+
+    Only ids and coordinates are read, a ring at a time (RING_FRACTIONS),
+    each capped at ``max_candidates`` rows by the database. Once a ring
+    holds ``limit`` rows within its radius those are the nearest; if a
+    ring holds more than ``max_candidates`` rows, the nearest of those
+    read are returned.
+    """
+    found = []
+    for fraction in RING_FRACTIONS:
+        ring = radius_km * fraction
+        rows = session.query(
+            model.BUILDINGID, model.BUILDINGLATITUDE,
+            model.BUILDINGLONGITUDE).filter(box_condition(
+                model, *bounding_box(lat, lon, ring))).limit(
+                    max_candidates).all()
+        found = sorted((haversine_km(lat, lon, row_lat, row_lon), row_id)
+                       for row_id, row_lat, row_lon in rows)
+        found = [pair for pair in found if pair[0] <= ring]
+        if len(found) >= limit or len(rows) >= max_candidates:
+            break
+    return found[:limit]
@@ -0,0 +1,133 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .models.idempotency import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+
+
+def request_fingerprint():
+    """Hash of what makes a retry the same request."""
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(),
+                 request.get_data()):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _client_id():
+    token = getattr(getattr(request, 'oauth', None), 'access_token', None)
+    return getattr(token, 'client_id', None) or ''
+
+
+def _claim(client_id, key, fingerprint):
+    """Insert the in-progress row for ``key`` and return ``(True, None)``,
+    or ``(False, row)`` when another request already owns the key (the row
+    is None if it kept changing under us).
+
+    The row is committed on its own, before the view runs, so concurrent
+    retries see it. Rows past IDEMPOTENCY_KEY_TTL, or left in progress for
+    IDEMPOTENCY_LOCK_TIMEOUT by a crashed request, are replaced.
+    """
+    config = current_app.config
+    for _ in range(3):
+        now = datetime.utcnow()
+        try:
+            db.session.add(IdempotencyKey(client_id=client_id, key=key,
+                                          fingerprint=fingerprint,
+                                          created_at=now))
+            db.session.commit()
+            return True, None
+        except IntegrityError:
+            db.session.rollback()
+        record = IdempotencyKey.query.get((client_id, key))
+        if record is None:
+            continue
+        stale = record.created_at < now - timedelta(
+            seconds=config['IDEMPOTENCY_KEY_TTL']
+            if record.status is not None else
+            config['IDEMPOTENCY_LOCK_TIMEOUT'])
+        if not stale:
+            return False, record
+        # Only the request that sees this exact row may replace it.
+        IdempotencyKey.query.filter_by(
+            client_id=client_id, key=key,
+            created_at=record.created_at).delete()
+        db.session.commit()
+    return False, None
+
+
+def _release(client_id, key):
+    """Forget a claim so a retry can run the request again."""
+    db.session.rollback()
+    IdempotencyKey.query.filter_by(client_id=client_id, key=key).delete()
+    db.session.commit()
+
+
+def idempotent(f):
+    """Make retries of the decorated write view with the same
+    ``Idempotency-Key`` header return the first response instead of
+    running it again. Requests without the header are unaffected.
+
+    A retry while the first request runs gets 409, and reusing a key for a
+    different request gets 422. Server errors are not stored, so they can
+    be retried.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return f(*args, **kwargs)
+        if not 0 < len(key) <= 255:
+            return (jsonify({'message': 'Invalid {} header.'.format(HEADER)}),
+                    400)
+
+        client_id, fingerprint = _client_id(), request_fingerprint()
+        claimed, record = _claim(client_id, key, fingerprint)
+        if not claimed:
+            if record is not None and record.fingerprint != fingerprint:
+                return (jsonify({'message': '{} was used for a different '
+                                 'request.'.format(HEADER)}), 422)
+            if record is None or record.status is None:
+                response = jsonify({'message': 'A request with this {} is '
+                                    'in progress.'.format(HEADER)})
+                response.headers['Retry-After'] = '1'
+                return (response, 409)
+            response = current_app.response_class(
+                record.body, status=record.status, mimetype=record.mimetype)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except Exception:
+            _release(client_id, key)
+            raise
+        if response.status_code >= 500:
+            _release(client_id, key)
+            return response
+        IdempotencyKey.query.filter_by(client_id=client_id, key=key).update({
+            'status': response.status_code,
+            'mimetype': response.mimetype,
+            'body': response.get_data()})
+        db.session.commit()
+        return response
+
+    return decorated_function
+
+
+def prune_idempotency_keys():
+    """Delete keys past IDEMPOTENCY_KEY_TTL. Returns how many."""
+    cutoff = datetime.utcnow() - timedelta(
+        seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+    count = IdempotencyKey.query.filter(
+        IdempotencyKey.created_at < cutoff).delete()
+    db.session.commit()
+    return count
@@ -0,0 +1,182 @@
+import json
+import re
+import sqlite3
+import statistics
+import time
+from collections import OrderedDict
+
+from sqlalchemy import Index, MetaData, Table, inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from .slow_query_log import explain
+
+REPLAYABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+# Columns per proposed index.
+MAX_COLUMNS = 3
+
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?"?(\w+)"?(?: AS \w+)?$')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on "?(\w+)"?')
+_COLUMN = r'"?(\w+)"?\."?(\w+)"?'
+_EQUALITY = re.compile(_COLUMN + r'\s*(?:=|\bIN\b|\bIS\b)', re.I)
+_RANGE = re.compile(
+    _COLUMN + r'\s*(?:<>|!=|<=|>=|<|>|\bLIKE\b|\bBETWEEN\b)', re.I)
+_JOINED = re.compile(r'=\s*' + _COLUMN)
+_ORDER_BY = re.compile(r'\bORDER BY\s+' + _COLUMN, re.I)
+# qmark and named (SQLite), format and pyformat (psycopg2) placeholders
+_PLACEHOLDER = re.compile(r'\?|%s|%\(\w+\)s|(?<![:\w]):\w+')
+
+
+def load_workload(path, skipped=None):
+    """Read a slow query log (see app/slow_query_log.py) into a list of
+    ``(statement, parameters, count)`` for the statements worth replaying.
+
+    Entries logged without their parameters (SLOW_QUERY_LOG_PARAMETERS was
+    off) cannot be replayed if the statement has placeholders; those
+    statements are left out and, once each, appended to ``skipped``.
+    """
+    queries = OrderedDict()
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            statement = entry.get('statement') or ''
+            if not statement.lstrip().upper().startswith(REPLAYABLE) or \
+                    entry.get('plan') is None:
+                continue
+            parameters = entry.get('parameters')
+            if parameters is None:
+                if _PLACEHOLDER.search(statement):
+                    if skipped is not None and statement not in skipped:
+                        skipped.append(statement)
+                    continue
+                parameters = ()
+            key = (statement, json.dumps(parameters))
+            if key in queries:
+                queries[key][1] += 1
+            else:
+                queries[key] = [parameters, 1]
+    return [(statement, parameters, count)
+            for (statement, _), (parameters, count) in queries.items()]
+
+
+def copy_sqlite_database(engine, path):
+    """Copy the SQLite database behind ``engine`` to ``path``."""
+    source = engine.raw_connection()
+    try:
+        target = sqlite3.connect(path)
+        try:
+            if hasattr(source.connection, 'backup'):
+                source.connection.backup(target)
+            else:  # Python < 3.7
+                target.executescript(
+                    '\n'.join(source.connection.iterdump()))
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def scanned_tables(plan):
+    """Tables read by a full sequential scan in EXPLAIN output."""
+    tables = set()
+    for line in plan or []:
+        line = line.strip()
+        match = _SQLITE_SCAN.match(line) or _POSTGRES_SCAN.search(line)
+        if match:
+            tables.add(match.group(1))
+    return tables
+
+
+def proposed_columns(statement, table, columns):
+    """Columns of ``table`` to index for ``statement``.
+
+    Equality filters come first, then range filters, then the ORDER BY
+    column, which is the usual order for a composite index.
+    """
+    start = statement.upper().find('FROM ')
+    conditions = statement[start:] if start >= 0 else statement
+    found = []
+    for pattern in (_EQUALITY, _JOINED, _RANGE, _ORDER_BY):
+        for qualifier, column in pattern.findall(conditions):
+            if qualifier == table and column in columns and \
+                    column not in found:
+                found.append(column)
+    return found[:MAX_COLUMNS]
+
+
+def replay(conn, statement, parameters, repeat):
+    """Median seconds to run ``statement``; writes are rolled back."""
+    timings = []
+    raw = conn.connection
+    for _ in range(repeat):
+        cursor = raw.cursor()
+        try:
+            started = time.perf_counter()
+            cursor.execute(statement, parameters)
+            if cursor.description is not None:
+                cursor.fetchall()
+            timings.append(time.perf_counter() - started)
+        finally:
+            cursor.close()
+            raw.rollback()
+    return statistics.median(timings)
+
+
+def advise(engine, workload, repeat=5):
+    """Propose indexes for the sequential scans in ``workload`` and
+    measure each one by building it on ``engine``, which must be a copy
+    of the real database. Returns a dict per proposed index.
+    """
+    inspector = inspect(engine)
+    candidates = OrderedDict()
+    with engine.connect() as conn:
+        baseline = []
+        for statement, parameters, count in workload:
+            plan = explain(conn, statement, parameters)
+            seconds = replay(conn, statement, parameters, repeat)
+            baseline.append((statement, parameters, count, seconds))
+            for table in scanned_tables(plan):
+                columns = [c['name'] for c in inspector.get_columns(table)]
+                indexed = [i['column_names'] for i in
+                           inspector.get_indexes(table)]
+                proposed = proposed_columns(statement, table, columns)
+                if not proposed or any(i[:len(proposed)] == proposed
+                                       for i in indexed):
+                    continue
+                queries = candidates.setdefault(
+                    (table, tuple(proposed)), [])
+                queries.append(len(baseline) - 1)
+
+        results = []
+        metadata = MetaData()
+        for (table_name, columns), queries in candidates.items():
+            table = Table(table_name, metadata, autoload_with=conn)
+            index = Index(
+                'ix_{}_{}'.format(table_name, '_'.join(columns)).lower(),
+                *[table.c[column] for column in columns])
+            index.create(conn)
+            if engine.dialect.name in ('sqlite', 'postgresql'):
+                conn.execute(
+                    text('ANALYZE').execution_options(autocommit=True))
+            before = after = 0.0
+            plans = []
+            for i in queries:
+                statement, parameters, count, seconds = baseline[i]
+                before += seconds * count
+                after += replay(conn, statement, parameters, repeat) * count
+                plans.append(explain(conn, statement, parameters))
+            index.drop(conn)
+            results.append({
+                'table': table_name,
+                'columns': list(columns),
+                'ddl': str(CreateIndex(index).compile(dialect=engine.dialect)
+                           ).strip(),
+                'queries': len(queries),
+                'before': before,
+                'after': after,
+                'uses_index': all(index.name in ' '.join(plan or [])
+                                  for plan in plans),
+            })
+    return results
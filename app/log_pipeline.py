@@ -0,0 +1,174 @@
+import atexit
+import json
+import logging
+import queue
+import random
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import has_request_context, request
+
+# LogRecord attributes that are not ``extra`` fields.
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord(
+    '', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_pipeline = None
+
+
+def truncate(value, limit):
+    """``value`` as JSON text of at most ``limit`` characters (plus an
+    ellipsis), and whether it was cut."""
+    text = value if isinstance(value, str) else json.dumps(
+        value, default=str, sort_keys=True)
+    if len(text) <= limit:
+        return text, False
+    return text[:limit] + '…', True
+
+
+class JSONLogFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request
+    context and ``extra`` fields, each cut to ``max_length`` characters."""
+
+    def __init__(self, max_length=2000):
+        super().__init__()
+        self.max_length = max_length
+
+    def format(self, record):
+        entry = {
+            'time': datetime.utcfromtimestamp(record.created).isoformat() +
+            'Z',
+            'level': record.levelname,
+            'logger': record.name,
+        }
+        fields = {'message': record.getMessage()}
+        fields.update((key, value) for key, value in vars(record).items()
+                      if key not in RECORD_ATTRIBUTES)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            fields['exception'] = record.exc_text
+        for key, value in fields.items():
+            if value is None or isinstance(value, (bool, int, float)):
+                entry[key] = value
+                continue
+            text, cut = truncate(value, self.max_length)
+            if cut:
+                entry[key] = text
+                entry[key + '_truncated'] = True
+            else:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a ``rates[logger name]`` fraction of the records below WARNING
+    from that logger and its children (the most specific name wins)."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates)
+        self._cache = {}
+
+    def rate(self, name):
+        if name not in self._cache:
+            rate, parts = 1.0, name.split('.')
+            for i in range(len(parts), 0, -1):
+                prefix = '.'.join(parts[:i])
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+            self._cache[name] = rate
+        return self._cache[name]
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+class RequestQueueHandler(QueueHandler):
+    """Hand records to a QueueListener thread, adding the request context
+    they need there. Nothing is formatted here, and a full queue drops the
+    record instead of blocking; ``dropped`` counts them."""
+
+    dropped = 0
+
+    def prepare(self, record):
+        if record.args:
+            # The arguments may change after the request moves on.
+            record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        if has_request_context():
+            record.endpoint = request.endpoint
+            record.method = request.method
+            record.path = request.path
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def stop_logging():
+    """Write out the queued records, stop the listener thread and put the
+    loggers back as they were."""
+    global _pipeline
+    if _pipeline is not None:
+        handler, listener, propagate = _pipeline
+        listener.stop()
+        for logger, value in propagate.items():
+            logger.removeHandler(handler)
+            logger.propagate = value
+        _pipeline = None
+        return listener.handlers
+    return ()
+
+
+atexit.register(stop_logging)
+
+
+def register_logging(app):
+    """Send the app's log records through a queue to a background thread
+    that formats them as JSON and writes them to the handlers app.logger
+    had until now (called from __init__.py, after config.init_app).
+
+    The handler goes on the logger named after the app package, which the
+    package's module loggers propagate to, and on app.logger if that is a
+    different logger (Flask 1.0 names it ``flask.app``). There is one
+    pipeline per process, so a later app replaces an earlier one.
+    """
+    global _pipeline
+    if not app.config.get('LOG_ASYNC'):
+        return
+    loggers = [logging.getLogger(app.import_name)]
+    if app.logger is not loggers[0]:
+        loggers.append(app.logger)
+    destinations = list(stop_logging())
+    destinations += [h for logger in loggers for h in logger.handlers
+                     if h not in destinations]
+    if not destinations:
+        destinations = [logging.StreamHandler()]
+    for handler in destinations:
+        for logger in loggers:
+            logger.removeHandler(handler)
+        handler.setFormatter(JSONLogFormatter(
+            app.config['LOG_MAX_FIELD_LENGTH']))
+
+    handler = RequestQueueHandler(queue.Queue(app.config['LOG_QUEUE_SIZE']))
+    handler.addFilter(SamplingFilter(app.config['LOG_SAMPLING']))
+    propagate = {}
+    for logger in loggers:
+        logger.setLevel(app.config['LOG_LEVEL'])
+        logger.addHandler(handler)
+        # Handled here, not again at the root, until stop_logging.
+        propagate[logger], logger.propagate = logger.propagate, False
+    listener = QueueListener(handler.queue, *destinations,
+                             respect_handler_level=True)
+    listener.start()
+    _pipeline = handler, listener, propagate
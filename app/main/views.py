@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from flask import render_template, jsonify, current_app, request
+from flask import render_template, jsonify, request
 from app.models.building import BuildingModel
 from . import main
 from app import db
@@ -46,8 +46,6 @@ def create_app():
 
 @main.route('/manage/apps/<int:application_id>', methods=['GET', 'POST'])
 def update_app(application_id):
-    current_app.logger.info("RadhaKrishnaHanuman")
-    current_app.logger.info(application_id)
     app = App.query.filter_by(application_id=application_id).first()
     client = Client.query.filter_by(app_id=application_id).first()
     client_id = client.client_id
@@ -71,15 +69,12 @@ def update_app(application_id):
 
 @main.route('/manage/apps', methods=['GET', 'POST'])
 def all_apps():
-    current_app.logger.info("RadhaKrishnaHanuman")
     apps_list = App.query.filter_by(user_id = session['auth_data']['personID']).all()
-    current_app.logger.info(apps_list)
     return render_template('account/all_apps.html', user=current_user, apps_list=apps_list)
 
 
 @main.route('/manage/apps/<int:application_id>/delete', methods=['GET', 'POST'])
 def delete_app(application_id):
-    current_app.logger.info("RadhaKrishnaHanuman")
     client = Client.query.filter_by(app_id=application_id).first()
     Token.query.filter_by(client_id=client.client_id).delete()
     Client.query.filter_by(app_id=application_id).delete()
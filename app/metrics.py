@@ -0,0 +1,106 @@
+import hmac
+import ipaddress
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, abort, g, has_request_context, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Histogram, generate_latest,
+                               multiprocess)
+
+from .query_tracker import request_queries
+
+# With gunicorn, set `prometheus_multiproc_dir` before the workers start
+# (see gunicorn_config.py) and every worker writes its samples to mmapped
+# files in that directory, which /metrics then aggregates.
+LABELS = ['endpoint', 'method', 'status']
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency.', LABELS)
+REQUEST_SQL_STATEMENTS = Histogram(
+    'http_request_sql_statements', 'SQL statements run per request.', LABELS,
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, float('inf')))
+REQUEST_SQL_SECONDS = Histogram(
+    'http_request_sql_seconds', 'Time spent in SQL per request.', LABELS)
+REQUEST_SERIALIZATION_SECONDS = Histogram(
+    'http_request_serialization_seconds',
+    'Time spent serializing response data per request.', LABELS)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size.', LABELS,
+    buckets=(100, 1000, 10000, 100000, 1000000, 10000000, float('inf')))
+
+
+def register_metrics(app):
+    """Record per-endpoint request metrics and serve them at /metrics
+    (called from __init__.py, after register_query_tracker)."""
+    if not app.config.get('METRICS_ENABLED'):
+        return
+
+    @app.before_request
+    def start_request_metrics():
+        g._metrics_start = time.perf_counter()
+        g._metrics_serialization_time = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get('_metrics_start')
+        if started is None:
+            return response
+        labels = (request.endpoint or 'none', request.method,
+                  response.status_code)
+        REQUEST_LATENCY.labels(*labels).observe(
+            time.perf_counter() - started)
+        queries = request_queries()
+        REQUEST_SQL_STATEMENTS.labels(*labels).observe(len(queries))
+        REQUEST_SQL_SECONDS.labels(*labels).observe(
+            sum(seconds for _, seconds in queries))
+        REQUEST_SERIALIZATION_SECONDS.labels(*labels).observe(
+            g._metrics_serialization_time)
+        if not response.is_streamed:
+            RESPONSE_SIZE.labels(*labels).observe(
+                response.calculate_content_length() or 0)
+        return response
+
+    networks = [ipaddress.ip_network(network) for network in
+                app.config['METRICS_ALLOWED_NETWORKS']]
+    token = app.config.get('METRICS_TOKEN')
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus metrics, aggregated across worker processes."""
+        if not metrics_allowed(networks, token):
+            abort(403)
+        if 'prometheus_multiproc_dir' in os.environ:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry),
+                        mimetype=CONTENT_TYPE_LATEST)
+
+
+def metrics_allowed(networks, token):
+    """Whether the request bears ``token`` or comes from ``networks``."""
+    if token:
+        header = request.headers.get('Authorization', '')
+        if hmac.compare_digest(header.encode('utf-8'),
+                               'Bearer {}'.format(token).encode('utf-8')):
+            return True
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+@contextmanager
+def serialization_timer():
+    """Count the time spent in the block as serialization for metrics."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context() and '_metrics_start' in g:
+            g._metrics_serialization_time += time.perf_counter() - started
+
@@ -1 +1,3 @@
 from .user import *
+from .idempotency import *
+from .usage import *
@@ -1,4 +1,9 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
 from .. import db
+from ..geo import grid_cell
 
 class BuildingModel(db.Model):
 
@@ -9,8 +14,50 @@ class BuildingModel(db.Model):
     BUILDINGCITY = db.Column(db.String(255))
     BUILDINGSTATE = db.Column(db.String(255))
     BUILDINGCOUNTRY = db.Column(db.String(255))
+    BUILDINGLATITUDE = db.Column(db.Float)
+    BUILDINGLONGITUDE = db.Column(db.Float)
+    # Grid cell of the coordinates (see app/geo.py), set on every flush.
+    BUILDINGCELL = db.Column(db.BigInteger, index=True)
 
 
     @classmethod
     def find_by_building_id(cls, BUILDINGID):
         return cls.query.filter_by(BUILDINGID=BUILDINGID).first()
+
+
+class BuildingStatsModel(db.Model):
+    """Number of buildings per (country, state, city), maintained by the
+    building write handlers (see app/building_stats.py). Missing parts of
+    the location are stored as ''.
+    """
+
+    __tablename__ = 'BUILDINGSTATS'
+
+    BUILDINGCOUNTRY = db.Column(db.String(255), primary_key=True)
+    BUILDINGSTATE = db.Column(db.String(255), primary_key=True)
+    BUILDINGCITY = db.Column(db.String(255), primary_key=True)
+    BUILDINGCOUNT = db.Column(db.Integer, nullable=False, default=0)
+
+
+class BuildingChangeModel(db.Model):
+    """Change log behind /v1/buildings/changes, written by the building
+    write handlers (see app/building_changes.py). Deletes stay as
+    tombstones, so there is no foreign key to BUILDING.
+    """
+
+    __tablename__ = 'BUILDINGCHANGES'
+    # Never reuse a CHANGEID, or clients could miss changes
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    CHANGEID = db.Column(db.Integer, primary_key=True)
+    BUILDINGID = db.Column(db.Integer, nullable=False)
+    OPERATION = db.Column(db.String(10), nullable=False)
+    CHANGEDAT = db.Column(db.DateTime, nullable=False,
+                          default=datetime.utcnow)
+
+
+@event.listens_for(BuildingModel, 'before_insert')
+@event.listens_for(BuildingModel, 'before_update')
+def set_building_cell(mapper, connection, building):
+    building.BUILDINGCELL = grid_cell(building.BUILDINGLATITUDE,
+                                      building.BUILDINGLONGITUDE)
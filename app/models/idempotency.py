@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from .. import db
+
+
+class IdempotencyKey(db.Model):
+    """The stored response to a write sent with an ``Idempotency-Key``
+    header (see app/idempotency.py). ``status`` is NULL while the first
+    request is still running."""
+    __tablename__ = 'idempotency_keys'
+    client_id = db.Column(db.String(40), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.Integer)
+    mimetype = db.Column(db.String(100))
+    body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, nullable=False, index=True,
+                           default=datetime.utcnow)
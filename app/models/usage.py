@@ -0,0 +1,12 @@
+from .. import db
+
+
+class ApiUsage(db.Model):
+    """API requests per OAuth client, endpoint and minute, counted in
+    memory by each worker and added here in batches (see app/usage.py)."""
+    __tablename__ = 'api_usage'
+    client_id = db.Column(db.String(40), primary_key=True)
+    # Before endpoint, so a client's usage over a period is one range scan
+    minute = db.Column(db.DateTime, primary_key=True)
+    endpoint = db.Column(db.String(64), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
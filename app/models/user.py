@@ -2,6 +2,7 @@ from flask import current_app
 from flask_login import AnonymousUserMixin, UserMixin
 from itsdangerous import TimedJSONWebSignatureSerializer as Serializer
 from itsdangerous import BadSignature, SignatureExpired
+from sqlalchemy import event
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from .. import db, login_manager
@@ -19,7 +20,7 @@ class Role(db.Model):
     index = db.Column(db.String(64))
     default = db.Column(db.Boolean, default=False, index=True)
     permissions = db.Column(db.Integer)
-    users = db.relationship('User', backref='role', lazy='dynamic')
+    users = db.relationship('User', back_populates='role', lazy='dynamic')
 
     @staticmethod
     def insert_roles():
@@ -39,6 +40,11 @@ class Role(db.Model):
             role.index = roles[r][1]
             role.default = roles[r][2]
             db.session.add(role)
+            db.session.flush()
+            # Carry changed permissions over to the users' copies.
+            User.query.filter(User.role_id == role.id).update(
+                {User.permissions: role.permissions},
+                synchronize_session='evaluate')
         db.session.commit()
 
     def __repr__(self):
@@ -53,7 +59,13 @@ class User(UserMixin, db.Model):
     last_name = db.Column(db.String(64), index=True)
     email = db.Column(db.String(64), unique=True, index=True)
     password_hash = db.Column(db.String(128))
-    role_id = db.Column(db.Integer, db.ForeignKey('roles.id'))
+    role_id = db.Column(db.Integer, db.ForeignKey('roles.id'), index=True)
+    role = db.relationship('Role', back_populates='users')
+    # Copy of role.permissions, so permission checks need not load the
+    # role. Kept in step when ``role`` is set; set ``role`` rather than
+    # ``role_id``.
+    permissions = db.Column(db.Integer, nullable=False, default=0,
+                            server_default='0')
 
     def __init__(self, **kwargs):
         super(User, self).__init__(**kwargs)
@@ -68,8 +80,7 @@ class User(UserMixin, db.Model):
         return '%s %s' % (self.first_name, self.last_name)
 
     def can(self, permissions):
-        return self.role is not None and \
-            (self.role.permissions & permissions) == permissions
+        return ((self.permissions or 0) & permissions) == permissions
 
     def is_admin(self):
         return self.can(Permission.ADMINISTER)
@@ -180,6 +191,11 @@ class User(UserMixin, db.Model):
         return '<User \'%s\'>' % self.full_name()
 
 
+@event.listens_for(User.role, 'set')
+def copy_role_permissions(user, role, oldvalue, initiator):
+    user.permissions = role.permissions if role is not None else 0
+
+
 class AnonymousUser(AnonymousUserMixin):
     def can(self, _):
         return False
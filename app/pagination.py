@@ -0,0 +1,75 @@
+import base64
+import json
+
+from sqlalchemy import and_, false, or_
+
+
+def encode_cursor(value, row_id):
+    return base64.urlsafe_b64encode(
+        json.dumps([value, row_id]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """``(value, id)`` of a cursor from :func:`encode_cursor`, or None."""
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(row_id, int):
+        return None
+    return value, row_id
+
+
+def _after(column, id_column, value, row_id, descending, nulls_low):
+    """Rows strictly after ``(value, row_id)`` in the sort order.
+
+    NULLs sort lowest on SQLite and MySQL and highest on PostgreSQL, so
+    ``nulls_low`` says where they fall relative to the cursor.
+    """
+    nulls_first = nulls_low != descending
+    later = id_column < row_id if descending else id_column > row_id
+    if value is None:
+        return or_(and_(column.is_(None), later),
+                   column.isnot(None) if nulls_first else false())
+    beyond = column < value if descending else column > value
+    if not nulls_first:
+        return or_(beyond, and_(column == value, later), column.is_(None))
+    # The redundant bound lets the index on ``column`` seek to the cursor
+    # instead of scanning from the start for the OR.
+    return and_(column <= value if descending else column >= value,
+                or_(beyond, and_(column == value, later)))
+
+
+def keyset_page(query, column, id_column, per_page, descending=False,
+                after=None, before=None):
+    """One page of ``query`` ordered by ``(column, id_column)``.
+
+    Pages start after (or end before) a decoded cursor instead of using
+    OFFSET, so with an index on ``column`` every page costs the same
+    however deep it is. Returns ``(items, previous cursor, next cursor)``;
+    a cursor is None when there is no page in that direction.
+    """
+    nulls_low = query.session.get_bind().dialect.name != 'postgresql'
+    backwards = before is not None
+    cursor = before if backwards else after
+    direction = descending != backwards
+    if cursor is not None:
+        query = query.filter(_after(column, id_column, cursor[0], cursor[1],
+                                    direction, nulls_low))
+    order = [column.desc(), id_column.desc()] if direction else \
+        [column.asc(), id_column.asc()]
+    items = query.order_by(*order).limit(per_page + 1).all()
+    more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+
+    def key(item):
+        return encode_cursor(getattr(item, column.key),
+                             getattr(item, id_column.key))
+
+    has_previous = more if backwards else after is not None
+    has_next = True if backwards else more
+    return (items,
+            key(items[0]) if items and has_previous else None,
+            key(items[-1]) if items and has_next else None)
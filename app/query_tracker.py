@@ -0,0 +1,89 @@
+import time
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more SQL statements than its ``query_budget`` allows."""
+
+
+def register_query_tracker(app):
+    """Record the SQL statements each request runs and warn about
+    statements repeated ``QUERY_REPEAT_THRESHOLD`` times or more, the
+    usual sign of an N+1 lazy load (called from __init__.py)."""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor)
+
+    @app.before_request
+    def start_query_tracking():
+        g._sql_queries = []
+
+    @app.after_request
+    def report_repeated_queries(response):
+        threshold = app.config['QUERY_REPEAT_THRESHOLD']
+        repeated = Counter(s for s, _ in request_queries())
+        for statement, count in repeated.most_common():
+            if count < threshold:
+                break
+            app.logger.warning(
+                'Possible N+1: %s ran the same statement %d times: %s',
+                request.endpoint, count, statement)
+        return response
+
+
+def request_queries():
+    """``(statement, seconds)`` for each SQL statement of this request."""
+    if has_request_context():
+        return g.get('_sql_queries') or []
+    return []
+
+
+def query_budget(max_queries):
+    """Cap the SQL statements a request to the decorated view may run.
+
+    Counts from the start of the request, so authentication lookups are
+    included. Going over raises :class:`QueryBudgetExceeded` when
+    ``QUERY_BUDGET_RAISE`` is set (as in testing) and logs a warning
+    otherwise.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            rv = f(*args, **kwargs)
+            queries = request_queries()
+            if len(queries) > max_queries:
+                message = '{} ran {} SQL statements, budget is {}:\n{}'.format(
+                    request.endpoint, len(queries), max_queries,
+                    '\n'.join(s for s, _ in queries))
+                if current_app.config['QUERY_BUDGET_RAISE']:
+                    raise QueryBudgetExceeded(message)
+                current_app.logger.warning(message)
+            return rv
+
+        decorated_function.query_budget = max_queries
+        return decorated_function
+
+    return decorator
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, many):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def statement_seconds(context):
+    """Seconds since the cursor of ``context`` started executing, for use
+    in other ``after_cursor_execute`` listeners."""
+    started = getattr(context, '_query_start', None)
+    return time.perf_counter() - started if started is not None else 0.0
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, many):
+    if has_request_context() and '_sql_queries' in g:
+        g._sql_queries.append((statement, statement_seconds(context)))
@@ -1,8 +1,16 @@
 from app import db
 from app.models.building import BuildingModel
+from marshmallow import fields, validate
 from marshmallow_sqlalchemy import ModelSchema
 
 
 class BuildingSchema(ModelSchema):
+    BUILDINGLATITUDE = fields.Float(
+        allow_none=True, validate=validate.Range(-90, 90))
+    BUILDINGLONGITUDE = fields.Float(
+        allow_none=True, validate=validate.Range(-180, 180))
+
     class Meta:
         model = BuildingModel
+        # Derived from the coordinates
+        exclude = ('BUILDINGCELL',)
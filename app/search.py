@@ -0,0 +1,126 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from flask import current_app
+from whoosh import fields, index, qparser, writing
+from whoosh.analysis import StemmingAnalyzer
+
+SEARCH_FIELDS = ('BUILDINGNAME', 'BUILDINGCITY', 'BUILDINGSTATE',
+                 'BUILDINGCOUNTRY')
+# Name matches rank above location matches.
+FIELD_BOOSTS = {'BUILDINGNAME': 3.0}
+
+_local = threading.local()
+
+SCHEMA = fields.Schema(
+    BUILDINGID=fields.ID(stored=True, unique=True),
+    BUILDINGNAME=fields.TEXT(analyzer=StemmingAnalyzer()),
+    BUILDINGCITY=fields.TEXT,
+    BUILDINGSTATE=fields.TEXT,
+    BUILDINGCOUNTRY=fields.TEXT)
+
+
+def search_enabled():
+    return bool(current_app.config.get('SEARCH_INDEX_DIR'))
+
+
+def open_index(path=None):
+    """Open the building index, creating an empty one on first use."""
+    path = path or current_app.config['SEARCH_INDEX_DIR']
+    if not index.exists_in(path):
+        os.makedirs(path, exist_ok=True)
+        return index.create_in(path, SCHEMA)
+    return index.open_dir(path)
+
+
+def building_document(building):
+    document = {'BUILDINGID': str(building.BUILDINGID)}
+    for field in SEARCH_FIELDS:
+        value = getattr(building, field)
+        if value:
+            document[field] = value
+    return document
+
+
+def index_buildings(*buildings):
+    """Add or replace ``buildings`` in the index after they are committed."""
+    with _index_writer() as writer:
+        if writer is not None:
+            for building in buildings:
+                writer.update_document(**building_document(building))
+
+
+def unindex_building(building_id):
+    with _index_writer() as writer:
+        if writer is not None:
+            writer.delete_by_term('BUILDINGID', str(building_id))
+
+
+@contextmanager
+def _index_writer():
+    """Yield a writer for the index, or None when search is disabled.
+
+    AsyncWriter commits from a background thread when another worker holds
+    the index lock, so a request never waits for it. Errors are logged, not
+    raised: the database is the source of truth, and
+    `manage.py rebuild_search_index` repairs the index.
+    """
+    if not search_enabled():
+        yield None
+        return
+    writer = None
+    try:
+        writer = writing.AsyncWriter(open_index())
+        yield writer
+        writer.commit()
+    except Exception:
+        current_app.logger.exception('Updating the search index failed')
+        if writer is not None:
+            writer.cancel()
+
+
+def search_buildings(q, page, per_page):
+    """``(building ids in rank order, total matches)`` for one page.
+
+    Counting every match of a broad query costs far more than ranking the
+    page, so the total is Whoosh's estimate unless it is known exactly.
+    """
+    searcher = _searcher(current_app.config['SEARCH_INDEX_DIR'])
+    parser = qparser.MultifieldParser(
+        SEARCH_FIELDS, searcher.schema, fieldboosts=FIELD_BOOSTS)
+    results = searcher.search(parser.parse(q), limit=page * per_page,
+                              terms=False)
+    hits = results[(page - 1) * per_page:page * per_page]
+    total = len(results) if results.has_exact_length() else \
+        results.estimated_length()
+    return [int(hit['BUILDINGID']) for hit in hits], total
+
+
+def _searcher(path):
+    """A searcher per thread and index, refreshed when the index changes,
+    so requests do not pay for opening the index each time."""
+    searchers = _local.__dict__.setdefault('searchers', {})
+    searcher = searchers.get(path)
+    if searcher is None:
+        searcher = open_index(path).searcher()
+    else:
+        # The fresh searcher shares unchanged segment readers with the old
+        # one, so the old one is left to the garbage collector.
+        searcher = searcher.refresh()
+    searchers[path] = searcher
+    return searcher
+
+
+def rebuild_index(query, path, chunk_size=10000):
+    """Reindex every row of ``query``. The new segment replaces the old
+    ones in a single commit, so searches keep working while it builds.
+    Returns the document count.
+    """
+    writer = open_index(path).writer(limitmb=256)
+    count = 0
+    for row in query.yield_per(chunk_size):
+        writer.add_document(**building_document(row))
+        count += 1
+    writer.commit(mergetype=writing.CLEAR)
+    return count
@@ -0,0 +1,214 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from faker import Faker
+from sqlalchemy import func, select
+from werkzeug.security import generate_password_hash
+
+from .building_changes import record_inserted
+from .building_stats import KEY_COLUMNS, add_counts
+from .bulk_import import COLUMNS as BUILDING_COLUMNS, copy_rows, \
+    ordered_map, reset_sequence
+from .geo import grid_cell
+from .models import App, Client, Role, Token, User
+from .models.building import BuildingModel
+
+# Faker takes tens of microseconds per value, so rows draw from pools of
+# Faker values built once per process instead.
+POOL_SIZE = 1000
+# Buildings are scattered up to this many degrees around their place.
+SPREAD_DEGREES = 0.2
+SCOPES = 'building buildings buildings:write'
+REDIRECT_URI = 'http://localhost:8000/authorized'
+BUILDING_KINDS = ('Tower', 'Hall', 'House', 'Center', 'Plaza', 'Building')
+
+_pools = {}
+
+
+def fake_pools(seed):
+    """Lists of fake values to combine into rows, the same for a seed in
+    every process."""
+    if seed not in _pools:
+        fake = Faker()
+        fake.seed_instance(seed)
+        rng = random.Random(seed)
+        _pools[seed] = {
+            'first_name': [fake.first_name() for _ in range(POOL_SIZE)],
+            'last_name': [fake.last_name() for _ in range(POOL_SIZE)],
+            'company': [fake.company() for _ in range(POOL_SIZE)],
+            'sentence': [fake.sentence() for _ in range(POOL_SIZE)],
+            'domain': [fake.domain_name() for _ in range(POOL_SIZE)],
+            # (city, state, country, latitude, longitude)
+            'place': [(fake.city(), fake.state_abbr(), fake.country_code(),
+                       rng.uniform(-60, 70), rng.uniform(-180, 180))
+                      for _ in range(POOL_SIZE)],
+        }
+    return _pools[seed]
+
+
+def user_rows(first_id, count, seed, password_hash, role):
+    pools = fake_pools(seed)
+    rng = random.Random('{}-users-{}'.format(seed, first_id))
+    rows = []
+    for id in range(first_id, first_id + count):
+        first_name = rng.choice(pools['first_name'])
+        last_name = rng.choice(pools['last_name'])
+        rows.append({
+            'id': id,
+            'confirmed': True,
+            'first_name': first_name,
+            'last_name': last_name,
+            # The id keeps the unique emails unique.
+            'email': '{}.{}.{}@example.com'.format(
+                first_name, last_name, id).lower(),
+            'password_hash': password_hash,
+            'role_id': role[0],
+            'permissions': role[1],
+        })
+    return rows
+
+
+def app_rows(first_id, count, seed, user_ids):
+    """Rows of apps, each with one client and one token, as
+    ``(apps, clients, tokens)``. Apps belong to users drawn from the
+    sequence ``user_ids``."""
+    pools = fake_pools(seed)
+    rng = random.Random('{}-apps-{}'.format(seed, first_id))
+    expires = datetime.utcnow() + timedelta(days=3650)
+    apps, clients, tokens = [], [], []
+    for id in range(first_id, first_id + count):
+        user_id = rng.choice(user_ids)
+        client_id = '{:040x}'.format(rng.getrandbits(160))
+        apps.append({
+            'application_id': id,
+            'application_name': rng.choice(pools['company'])[:32],
+            'application_description': rng.choice(pools['sentence']),
+            'application_website': 'https://' + rng.choice(pools['domain']),
+            'callback': REDIRECT_URI,
+            'user_id': user_id,
+        })
+        clients.append({
+            'client_id': client_id,
+            'client_secret': '{:050x}'.format(rng.getrandbits(200)),
+            'user_id': user_id,
+            'app_id': id,
+            '_redirect_uris': REDIRECT_URI,
+            '_default_scopes': SCOPES,
+        })
+        tokens.append({
+            'client_id': client_id,
+            'user_id': user_id,
+            'token_type': 'Bearer',
+            'access_token': '{:064x}'.format(rng.getrandbits(256)),
+            'expires': expires,
+            '_scopes': SCOPES,
+        })
+    return apps, clients, tokens
+
+
+def building_rows(first_id, count, seed):
+    pools = fake_pools(seed)
+    rng = random.Random('{}-buildings-{}'.format(seed, first_id))
+    rows = []
+    for id in range(first_id, first_id + count):
+        city, state, country, lat, lon = rng.choice(pools['place'])
+        lat = round(lat + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES), 6)
+        lon = round(lon + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES), 6)
+        rows.append({
+            'BUILDINGID': id,
+            'BUILDINGNAME': '{} {}'.format(rng.choice(pools['company']),
+                                           rng.choice(BUILDING_KINDS)),
+            'BUILDINGCITY': city,
+            'BUILDINGSTATE': state,
+            'BUILDINGCOUNTRY': country,
+            'BUILDINGLATITUDE': lat,
+            'BUILDINGLONGITUDE': lon,
+            'BUILDINGCELL': grid_cell(lat, lon),
+        })
+    return rows
+
+
+GENERATORS = {'users': user_rows, 'apps': app_rows,
+              'buildings': building_rows}
+
+
+def _generate(task):
+    kind, first_id, count, args = task
+    return GENERATORS[kind](first_id, count, *args)
+
+
+def _next_id(conn, column):
+    return (conn.scalar(select([func.max(column)])) or 0) + 1
+
+
+def _tasks(kind, first_id, total, chunk_size, args):
+    for start in range(first_id, first_id + total, chunk_size):
+        yield kind, start, min(chunk_size, first_id + total - start), args
+
+
+def _insert(conn, kind, rows, first_id, count):
+    if kind == 'users':
+        copy_rows(conn, User.__table__, list(rows[0]), rows)
+    elif kind == 'apps':
+        for table, table_rows in zip(
+                (App.__table__, Client.__table__, Token.__table__), rows):
+            copy_rows(conn, table, list(table_rows[0]), table_rows)
+    else:
+        copy_rows(conn, BuildingModel.__table__, BUILDING_COLUMNS, rows)
+        record_inserted(conn, first_id, first_id + count - 1)
+        add_counts(conn, Counter(tuple(row[c] or '' for c in KEY_COLUMNS)
+                                 for row in rows))
+
+
+def seed_database(engine, users=0, apps=0, buildings=0, chunk_size=10000,
+                  workers=1, seed=None, password='password', on_chunk=None):
+    """Bulk insert fake users, apps (each with a client and a token) and
+    buildings, committing every ``chunk_size`` rows.
+
+    Rows are generated in up to ``workers`` processes and take ids after
+    the existing ones, so nothing else should write these tables
+    meanwhile. Every user gets the same ``password``, hashed once. Apps
+    belong to the new users, or to the existing ones if ``users`` is 0.
+    ``on_chunk(kind, inserted)`` is called after each commit. Returns the
+    ``{kind: inserted}`` totals.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    password_hash = generate_password_hash(password)
+    totals = Counter()
+    with engine.connect() as conn:
+        roles = Role.__table__
+        # (id, permissions) of the role new users get
+        role = tuple(conn.execute(select([
+            roles.c.id, roles.c.permissions]).where(
+                roles.c.default.is_(True))).first() or (None, 0))
+        first_user = _next_id(conn, User.__table__.c.id)
+        if users:
+            user_ids = range(first_user, first_user + users)
+        else:
+            # Existing ids can have gaps left by deleted users.
+            user_ids = [id for id, in conn.execute(
+                select([User.__table__.c.id]).order_by(User.__table__.c.id))]
+            if apps and not user_ids:
+                raise ValueError('Apps need users to belong to.')
+        plan = [
+            ('users', first_user, users, (seed, password_hash, role)),
+            ('apps', _next_id(conn, App.__table__.c.application_id), apps,
+             (seed, user_ids)),
+            ('buildings', _next_id(conn, BuildingModel.__table__.c.BUILDINGID),
+             buildings, (seed,)),
+        ]
+        tasks = [task for kind, first_id, total, args in plan
+                 for task in _tasks(kind, first_id, total, chunk_size, args)]
+        for (kind, first_id, count, _), rows in zip(
+                tasks, ordered_map(_generate, tasks, workers)):
+            with conn.begin():
+                _insert(conn, kind, rows, first_id, count)
+            totals[kind] += count
+            if on_chunk is not None:
+                on_chunk(kind, totals[kind])
+        reset_sequence(conn, User.__table__, 'id')
+        reset_sequence(conn, App.__table__, 'application_id')
+        reset_sequence(conn, BuildingModel.__table__, 'BUILDINGID')
+    return dict(totals)
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import current_app, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .query_tracker import statement_seconds
+
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+# Rows of executemany() parameters kept in a log entry.
+MAX_LOGGED_ROWS = 10
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records whose message is a dict as one JSON object a line."""
+
+    def format(self, record):
+        return json.dumps(record.msg, default=str, sort_keys=True)
+
+
+class _SlowQueryLog(object):
+    def __init__(self, app):
+        self.app = app
+        self._logger = None
+        self._lock = threading.Lock()
+
+    @property
+    def logger(self):
+        # Opened on first use so that the log path can still be changed
+        # after create_app (tests do this).
+        with self._lock:
+            if self._logger is None:
+                path = self.app.config['SLOW_QUERY_LOG']
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                handler = RotatingFileHandler(
+                    path, maxBytes=self.app.config['SLOW_QUERY_LOG_MAX_BYTES'],
+                    backupCount=self.app.config['SLOW_QUERY_LOG_BACKUPS'])
+                handler.setFormatter(JSONFormatter())
+                logger = logging.Logger('slow_queries')
+                logger.addHandler(handler)
+                self._logger = logger
+        return self._logger
+
+    def record(self, conn, statement, parameters, seconds, many):
+        entry = {
+            'time': datetime.utcnow().isoformat() + 'Z',
+            'duration_ms': round(seconds * 1000, 3),
+            'endpoint': None,
+            'method': None,
+            'statement': statement,
+            'plan': None if many else explain(conn, statement, parameters),
+        }
+        if self.app.config.get('SLOW_QUERY_LOG_PARAMETERS'):
+            entry['parameters'] = parameters[:MAX_LOGGED_ROWS] if many \
+                else parameters
+        if has_request_context():
+            entry['endpoint'] = request.endpoint
+            entry['method'] = request.method
+        self.logger.warning(entry)
+
+
+def register_slow_query_log(app):
+    """Log statements slower than ``SLOW_QUERY_THRESHOLD`` seconds, with
+    their query plan, to ``SLOW_QUERY_LOG`` (called from __init__.py,
+    after register_query_tracker, whose timings it reuses). Bound
+    parameters are left out unless ``SLOW_QUERY_LOG_PARAMETERS`` is set."""
+    app.extensions['slow_query_log'] = _SlowQueryLog(app)
+    if not event.contains(Engine, 'after_cursor_execute', _after_cursor):
+        event.listen(Engine, 'after_cursor_execute', _after_cursor)
+
+
+def explain(conn, statement, parameters):
+    """Plan lines for ``statement``, or None if it cannot be explained.
+
+    The EXPLAIN runs on a raw DBAPI cursor so it does not fire cursor
+    events again. On Postgres it is wrapped in a savepoint so that a
+    failing EXPLAIN does not abort the caller's transaction.
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or \
+            not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    savepoint = conn.dialect.name == 'postgresql'
+    cursor = conn.connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefix + statement, parameters)
+            # The last column is the plan text on both backends.
+            plan = [str(row[-1]) for row in cursor.fetchall()]
+        except Exception as e:
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            return ['EXPLAIN failed: {}'.format(e)]
+        if savepoint:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    finally:
+        cursor.close()
+
+
+def recent_slow_queries(limit=100):
+    """The latest entries of the current log file, newest first."""
+    path = current_app.config['SLOW_QUERY_LOG']
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = deque(f, maxlen=limit)
+    entries = []
+    for line in reversed(lines):
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, many):
+    if not has_app_context():
+        return
+    threshold = current_app.config.get('SLOW_QUERY_THRESHOLD')
+    log = current_app.extensions.get('slow_query_log')
+    if threshold is None or log is None:
+        return
+    seconds = statement_seconds(context)
+    if seconds >= threshold:
+        log.record(conn, statement, parameters, seconds, many)
@@ -0,0 +1,149 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import request, safe_join, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip variants still work
+    brotli = None
+
+# Content-Encoding -> file suffix, in order of preference.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.json', '.html', '.txt')
+ONE_YEAR = 31536000
+# Files named after their content by `manage.py build_assets`
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+# Characters of the MD5 hash webassets' default ``hash`` versioner appends
+# as ``?<version>`` with url_expire
+VERSION_LENGTH = 8
+
+
+def static_folders(app):
+    """Map each static endpoint of the app and its blueprints to a folder."""
+    folders = {}
+    if app.has_static_folder:
+        folders['static'] = app.static_folder
+    for name, blueprint in app.blueprints.items():
+        if blueprint.has_static_folder:
+            folders[name + '.static'] = blueprint.static_folder
+    return folders
+
+
+def compress_static_files(folders):
+    """Write .gz (and .br if brotli is installed) next to each static file.
+
+    Files whose variants are newer than the source are skipped, so this is
+    cheap to run on every deploy. Returns the paths written.
+    """
+    written = []
+    for folder in folders:
+        for root, _, files in os.walk(folder):
+            for name in files:
+                if name.endswith(COMPRESSIBLE):
+                    written.extend(_compress_file(os.path.join(root, name)))
+    return written
+
+
+def _compress_file(path):
+    mtime = os.path.getmtime(path)
+    stale = [(encoding, path + suffix) for encoding, suffix in ENCODINGS
+             if (encoding != 'br' or brotli is not None) and
+             not (os.path.exists(path + suffix) and
+                  os.path.getmtime(path + suffix) >= mtime)]
+    if not stale:
+        return []
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    written = []
+    for encoding, target in stale:
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=11)
+        else:
+            compressed = gzip.compress(data, 9)
+        if len(compressed) < len(data):
+            with open(target, 'wb') as f:
+                f.write(compressed)
+            written.append(target)
+    return written
+
+
+def register_precompressed_static(app):
+    """Serve prebuilt .br/.gz variants from every static endpoint.
+
+    The variants are discovered once at startup, so the request path does
+    no compression and no extra filesystem checks. Versioned URLs (the
+    ``?<hash>`` webassets appends with ``url_expire``, or the content hashed
+    names of the asset manifest) are cached for a year as immutable; any
+    other query string gets the normal static max-age.
+    """
+    if not app.config.get('STATIC_PRECOMPRESSED'):
+        return
+
+    for endpoint, folder in static_folders(app).items():
+        variants = set()
+        for root, _, files in os.walk(folder):
+            for name in files:
+                source, suffix = os.path.splitext(os.path.join(root, name))
+                # Ignore variants left behind by an older build.
+                if suffix in ('.br', '.gz') and os.path.exists(source) and \
+                        os.path.getmtime(source + suffix) >= \
+                        os.path.getmtime(source):
+                    variants.add(os.path.relpath(
+                        source + suffix, folder).replace(os.sep, '/'))
+        view = app.view_functions[endpoint]
+        app.view_functions[endpoint] = _precompressed_view(
+            view, folder, variants)
+
+
+def file_version(path, cache):
+    """The webassets hash version of the file at ``path``, or None if it
+    does not exist. ``cache`` keeps it until the file changes."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as f:
+            version = hashlib.md5(f.read()).hexdigest()[:VERSION_LENGTH]
+        cached = cache[path] = (mtime, version)
+    return cached[1]
+
+
+def _precompressed_view(view, folder, variants):
+    versions = {}
+
+    def versioned(filename):
+        if HASHED_NAME.search(filename):
+            return True
+        if not request.query_string:
+            return False
+        path = safe_join(folder, filename)
+        return request.query_string.decode('latin-1') == \
+            file_version(path, versions)
+
+    def send_static_file(filename):
+        response = None
+        for encoding, suffix in ENCODINGS:
+            if filename + suffix in variants and \
+                    request.accept_encodings[encoding]:
+                response = send_from_directory(
+                    folder, filename + suffix,
+                    mimetype=mimetypes.guess_type(filename)[0])
+                response.headers['Content-Encoding'] = encoding
+                break
+        if response is None:
+            response = view(filename=filename)
+        if any(filename + suffix in variants for _, suffix in ENCODINGS):
+            response.vary.add('Accept-Encoding')
+        if versioned(filename):
+            response.headers['Cache-Control'] = \
+                'public, max-age={}, immutable'.format(ONE_YEAR)
+        return response
+
+    return send_static_file
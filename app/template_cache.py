@@ -0,0 +1,44 @@
+import os
+
+from jinja2 import FileSystemBytecodeCache, MemcachedBytecodeCache
+
+# Key prefix of the compiled templates kept in Redis
+REDIS_PREFIX = 'jinja2/bytecode/'
+
+
+def bytecode_cache(app):
+    """The Jinja bytecode cache TEMPLATE_CACHE asks for, or None."""
+    kind = app.config.get('TEMPLATE_CACHE')
+    if not kind or kind == 'none':
+        return None
+    if kind == 'filesystem':
+        directory = app.config['TEMPLATE_CACHE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        return FileSystemBytecodeCache(directory)
+    if kind == 'redis':
+        # Redis get/set match the memcached client interface Jinja uses;
+        # errors are ignored, so Redis being down only means compiling.
+        from redis import Redis
+        client = Redis(host=app.config['RQ_DEFAULT_HOST'],
+                       port=app.config['RQ_DEFAULT_PORT'],
+                       db=app.config['RQ_DEFAULT_DB'],
+                       password=app.config['RQ_DEFAULT_PASSWORD'],
+                       socket_timeout=1)
+        return MemcachedBytecodeCache(client, prefix=REDIS_PREFIX,
+                                      timeout=None)
+    raise ValueError('Unknown TEMPLATE_CACHE {!r}'.format(kind))
+
+
+def register_template_cache(app):
+    """Load compiled templates from the bytecode cache, so a new worker
+    does not compile them again (called from __init__.py)."""
+    app.jinja_env.bytecode_cache = bytecode_cache(app)
+
+
+def compile_templates(app):
+    """Compile every template under app/templates, pages and the .txt
+    email bodies alike, into the bytecode cache and return their names."""
+    names = app.jinja_loader.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
@@ -0,0 +1,137 @@
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app, request
+from sqlalchemy import func
+
+from . import db, oauth
+from .database import increment_counters
+from .models import ApiUsage, Client
+
+logger = logging.getLogger(__name__)
+
+_meters = weakref.WeakSet()
+_start_lock = threading.Lock()
+
+
+class UsageMeter:
+    """Per-process API request counts, keyed by ``(client_id, endpoint,
+    minute)`` and added to ApiUsage in one batch every USAGE_FLUSH_INTERVAL
+    seconds and at exit, instead of a write per request."""
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config['USAGE_FLUSH_INTERVAL']
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def record(self, client_id, endpoint):
+        if self.pid != os.getpid():
+            self._start()
+        key = (client_id, endpoint, int(time.time()) // 60)
+        with self.lock:
+            self.counts[key] += 1
+
+    def _start(self):
+        with _start_lock:
+            if self.pid == os.getpid():
+                return
+            if self.pid is not None:
+                # A forked copy: the parent's counts are the parent's to
+                # save, and its flush thread did not come along.
+                self.counts = Counter()
+                self.lock = threading.Lock()
+            self.pid = os.getpid()
+        _meters.add(self)
+        if self.interval:
+            thread = threading.Thread(target=self._run, daemon=True,
+                                      name='usage-meter')
+            thread.start()
+
+    def _run(self):
+        pid = self.pid
+        while self.pid == pid:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        """Add the counts so far to ApiUsage. Returns how many requests
+        they covered; on a database error they are kept for next time."""
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        if not counts:
+            return 0
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    add_usage(conn, counts)
+        except Exception:
+            logger.exception('Could not save API usage; will retry')
+            with self.lock:
+                self.counts.update(counts)
+            return 0
+        return sum(counts.values())
+
+
+def add_usage(conn, counts):
+    """Add ``{(client_id, endpoint, minute number): requests}`` to
+    ApiUsage through ``conn``, one executemany per statement."""
+    increment_counters(
+        conn, ApiUsage.__table__, ('client_id', 'minute', 'endpoint'),
+        {(client_id, datetime.utcfromtimestamp(minute * 60), endpoint): count
+         for (client_id, endpoint, minute), count in counts.items()})
+
+
+def flush_usage():
+    """Flush every meter in this process (at exit and from gunicorn's
+    worker_exit hook)."""
+    for meter in list(_meters):
+        meter.flush()
+
+
+atexit.register(flush_usage)
+
+
+def app_usage(app_ids, since):
+    """``{app id: requests}`` since the datetime ``since``."""
+    if not app_ids:
+        return {}
+    rows = db.session.query(Client.app_id, func.sum(ApiUsage.count)).join(
+        ApiUsage, ApiUsage.client_id == Client.client_id).filter(
+            Client.app_id.in_(app_ids), ApiUsage.minute >= since).group_by(
+                Client.app_id)
+    return {app_id: int(count) for app_id, count in rows}
+
+
+def recent_app_usage(app_ids, now=None):
+    """``{app id: (requests in the last day, in the last 30 days)}``."""
+    now = now or datetime.utcnow()
+    day = app_usage(app_ids, now - timedelta(days=1))
+    month = app_usage(app_ids, now - timedelta(days=30))
+    return {app_id: (day.get(app_id, 0), month.get(app_id, 0))
+            for app_id in app_ids}
+
+
+@oauth.after_request
+def meter_usage(valid, oauth_request):
+    """Count a request once its token is accepted, before the view runs
+    (and before a commit could expire the token)."""
+    meter = current_app.extensions.get('usage_meter')
+    if valid and meter is not None:
+        meter.record(oauth_request.access_token.client_id,
+                     request.endpoint or '')
+    return valid, oauth_request
+
+
+def register_usage_metering(app):
+    """Count OAuth-authenticated API requests per client (called from
+    __init__.py)."""
+    if app.config.get('USAGE_METERING'):
+        app.extensions['usage_meter'] = UsageMeter(app)
@@ -0,0 +1,14 @@
+"""
+Read-only asyncio service for the building GET endpoints.
+
+It runs next to the Flask app (manage:app) against the same database, with
+the proxy sending GET /v1/buildings and /v1/buildings/<id> here:
+
+    pip install -r requirements-async.txt
+    uvicorn asgi:app --port 8001
+"""
+import os
+
+from app.async_api import create_async_app
+
+app = create_async_app(os.getenv('FLASK_CONFIG') or 'default')
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Latency and CPU per request of building JSON responses of growing size,
+compressed by Flask-Compress (gzip level 6 on everything) and by the API
+policy in app/compression.py.
+
+    python -m benchmarks.api_compression --encoding gzip
+"""
+import argparse
+import time
+
+from flask import jsonify
+
+from app import create_app
+
+
+def buildings(count):
+    return [{
+        'BUILDINGID': i,
+        'BUILDINGNAME': 'Building {}'.format(i),
+        'BUILDINGCITY': 'Boston',
+        'BUILDINGSTATE': 'MA',
+        'BUILDINGCOUNTRY': 'US',
+    } for i in range(count)]
+
+
+def make_app():
+    app = create_app('testing')
+    payloads = {}
+
+    def payload(count):
+        if count not in payloads:
+            payloads[count] = buildings(count)
+        return jsonify(payloads[count])
+
+    # Same view twice: under the API prefix and outside of it.
+    app.add_url_rule('/v1/_bench/<int:count>', 'bench_api', payload)
+    app.add_url_rule('/_bench/<int:count>', 'bench_default', payload)
+    return app
+
+
+def measure(client, url, encoding, repeat):
+    client.get(url, headers={'Accept-Encoding': encoding})  # warm up
+    wall, cpu, size = time.perf_counter(), time.process_time(), 0
+    for _ in range(repeat):
+        response = client.get(url, headers={'Accept-Encoding': encoding})
+        size = len(response.data)
+    return ((time.perf_counter() - wall) / repeat * 1000,
+            (time.process_time() - cpu) / repeat * 1000,
+            size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--encoding', default='gzip, br, zstd',
+                        help='Accept-Encoding header to send')
+    parser.add_argument('--sizes', default='1,10,100,1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    client = make_app().test_client()
+    print('{:>8} {:>10} | {:>10} {:>9} {:>9} | {:>10} {:>9} {:>9}'.format(
+        'rows', 'raw bytes', 'default B', 'wall ms', 'cpu ms',
+        'policy B', 'wall ms', 'cpu ms'))
+    for count in [int(n) for n in args.sizes.split(',')]:
+        repeat = max(1, args.repeat * 100 // max(count, 100))
+        raw = measure(client, '/_bench/{}'.format(count), 'identity', 1)[2]
+        default = measure(client, '/_bench/{}'.format(count), args.encoding,
+                          repeat)
+        policy = measure(client, '/v1/_bench/{}'.format(count),
+                         args.encoding, repeat)
+        print('{:>8} {:>10} | {:>10} {:>9.2f} {:>9.2f} | '
+              '{:>10} {:>9.2f} {:>9.2f}'.format(
+                  count, raw, default[2], default[0], default[1],
+                  policy[2], policy[0], policy[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Concurrency benchmark of the building reads: sync gunicorn workers
+(manage:app) against the asyncio service (asgi:app).
+
+    pip install -r requirements-async.txt
+    python -m benchmarks.async_reads --rows 10000 --concurrency 16 \
+        --concurrency 128
+
+Both servers run as subprocesses on the same seeded SQLite dataset, or on
+``--database-url``. A local SQLite file has little I/O wait, so point it at
+a networked Postgres to see the effect of waiting on the database.
+"""
+import argparse
+import os
+import random
+import subprocess
+import threading
+import time
+
+import requests
+
+from .datasets import ACCESS_TOKEN, dataset_path
+from .sqlite_concurrency import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(command, env, url):
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline and process.poll() is None:
+        try:
+            requests.get(url + '/v1/buildings/1', timeout=5)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('{} did not start'.format(' '.join(command)))
+
+
+def rss_mb(pid):
+    """Resident memory of ``pid`` and its descendants (Linux only)."""
+    processes = {}
+    for entry in os.listdir('/proc') if os.path.isdir('/proc') else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/{}/status'.format(entry)) as f:
+                status = dict(line.split(':', 1) for line in f)
+        except (IOError, OSError):
+            continue
+        processes[int(entry)] = (int(status['PPid']),
+                                 int(status.get('VmRSS', '0').split()[0]))
+    total = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        total += processes.get(current, (None, 0))[1]
+        pids.extend(child for child, (parent, _) in processes.items()
+                    if parent == current)
+    return total / 1024.0
+
+
+def run(url, rows, concurrency, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def client(seed):
+        rng = random.Random(seed)
+        session = requests.Session()
+        while not stop.is_set():
+            path = '/v1/buildings/{}?access_token={}'.format(
+                rng.randint(1, rows), ACCESS_TOKEN)
+            started = time.perf_counter()
+            try:
+                ok = session.get(url + path).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client, args=(i,))
+               for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--database-url')
+    parser.add_argument('--concurrency', type=int, action='append')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--sync-workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8100)
+    args = parser.parse_args()
+
+    database_url = args.database_url or \
+        'sqlite:///' + dataset_path(args.rows)
+    env = dict(os.environ, FLASK_CONFIG='testing',
+               TEST_DATABASE_URL=database_url,
+               ASYNC_DATABASE_URL=database_url)
+    servers = [
+        ('sync', ['gunicorn', '--workers',
+                  str(args.sync_workers), '--bind',
+                  '127.0.0.1:{}'.format(args.port), 'manage:app']),
+        ('async', ['uvicorn', 'asgi:app', '--port',
+                   str(args.port + 1)]),
+    ]
+
+    print('{:<6} {:>11} {:>10} {:>11} {:>11} {:>7} {:>8}'.format(
+        'server', 'concurrency', 'req/s', 'p50 ms', 'p99 ms', 'errors',
+        'RSS MB'))
+    for offset, (name, command) in enumerate(servers):
+        url = 'http://127.0.0.1:{}'.format(args.port + offset)
+        process = start_server(command, env, url)
+        try:
+            for concurrency in args.concurrency or [16, 128]:
+                latencies, errors = run(url, args.rows, concurrency,
+                                        args.duration)
+                print('{:<6} {:>11} {:>10.0f} {:>11.2f} {:>11.2f} {:>7} '
+                      '{:>8.1f}'.format(
+                          name, concurrency, len(latencies) / args.duration,
+                          percentile(latencies, 0.5) * 1000,
+                          percentile(latencies, 0.99) * 1000, errors,
+                          rss_mb(process.pid)))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
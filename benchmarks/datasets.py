@@ -0,0 +1,122 @@
+"""
+Reproducible SQLite datasets for the benchmarks.
+
+``dataset_path(rows)`` builds
+``benchmarks/data/buildings-v<version>-<rows>.sqlite`` once, from a fixed
+random seed, and reuses it afterwards. DATASET_VERSION changes whenever the
+schema or the rows do, so stale datasets are not reused. Each dataset also
+has one user, client and token for authenticated requests.
+"""
+import os
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.building_stats import KEY_COLUMNS
+from app.bulk_import import chunked
+from app.database import listen_sqlite_pragmas
+from app.geo import grid_cell
+from app.models import Client, Role, Token, User
+from app.models.building import BuildingModel, BuildingStatsModel
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+SEED = 20190201
+CHUNK = 10000
+DATASET_VERSION = 4
+
+CLIENT_ID = 'benchmark-client'
+CLIENT_SECRET = 'benchmark-secret'
+ACCESS_TOKEN = 'benchmark-token'
+
+# (city, state, country, latitude, longitude)
+PLACES = [
+    ('Boston', 'MA', 'US', 42.36, -71.06),
+    ('Cambridge', 'MA', 'US', 42.37, -71.11),
+    ('New York', 'NY', 'US', 40.71, -74.01),
+    ('San Francisco', 'CA', 'US', 37.77, -122.42),
+    ('Seattle', 'WA', 'US', 47.61, -122.33),
+    ('Austin', 'TX', 'US', 30.27, -97.74),
+    ('London', 'LDN', 'UK', 51.51, -0.13),
+    ('Manchester', 'M', 'UK', 53.48, -2.24),
+    ('Oxford', 'OX', 'UK', 51.75, -1.26),
+    ('Delhi', 'DL', 'IN', 28.61, 77.21),
+    ('Mumbai', 'MH', 'IN', 19.08, 72.88),
+    ('Bangalore', 'KA', 'IN', 12.97, 77.59),
+    ('Toronto', 'ON', 'CA', 43.65, -79.38),
+    ('Berlin', 'BE', 'DE', 52.52, 13.40),
+    ('Paris', 'IDF', 'FR', 48.86, 2.35),
+    ('Sydney', 'NSW', 'AU', -33.87, 151.21),
+]
+# Buildings are scattered up to this many degrees around their city.
+SPREAD_DEGREES = 0.2
+
+
+def building_rows(count, seed=SEED):
+    """Yield ``count`` deterministic BUILDING rows."""
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        city, state, country, lat, lon = rng.choice(PLACES)
+        lat = round(lat + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES), 6)
+        lon = round(lon + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES), 6)
+        yield {
+            'BUILDINGID': i,
+            'BUILDINGNAME': 'Building {}'.format(i),
+            'BUILDINGCITY': city,
+            'BUILDINGSTATE': state,
+            'BUILDINGCOUNTRY': country,
+            'BUILDINGLATITUDE': lat,
+            'BUILDINGLONGITUDE': lon,
+            'BUILDINGCELL': grid_cell(lat, lon),
+        }
+
+
+def seed_database(engine, rows):
+    """Create the schema on ``engine`` and load ``rows`` buildings."""
+    db.Model.metadata.create_all(engine)
+    table = BuildingModel.__table__
+    counts = Counter()
+    with engine.begin() as conn:
+        for chunk in chunked(building_rows(rows), CHUNK):
+            conn.execute(table.insert(), chunk)
+            counts.update(tuple(row[column] or '' for column in KEY_COLUMNS)
+                          for row in chunk)
+        conn.execute(BuildingStatsModel.__table__.insert(), [
+            dict(zip(KEY_COLUMNS, key), BUILDINGCOUNT=count)
+            for key, count in counts.items()])
+        conn.execute(Role.__table__.insert(), id=1, name='User',
+                     index='main', default=True, permissions=1)
+        conn.execute(User.__table__.insert(), id=1, confirmed=True,
+                     email='benchmark@example.com', role_id=1, permissions=1,
+                     password_hash=generate_password_hash('password'))
+        conn.execute(Client.__table__.insert(), client_id=CLIENT_ID,
+                     client_secret=CLIENT_SECRET, user_id=1,
+                     _redirect_uris='http://localhost:8000/authorized',
+                     _default_scopes='building buildings')
+        conn.execute(Token.__table__.insert(), client_id=CLIENT_ID,
+                     user_id=1, token_type='Bearer',
+                     access_token=ACCESS_TOKEN,
+                     _scopes='building buildings',
+                     expires=datetime.utcnow() + timedelta(days=3650))
+
+
+def dataset_path(rows):
+    """Path of the ``rows`` dataset, building it on first use."""
+    path = os.path.join(DATA_DIR, 'buildings-v{}-{}.sqlite'.format(
+        DATASET_VERSION, rows))
+    if not os.path.exists(path):
+        if not os.path.isdir(DATA_DIR):
+            os.makedirs(DATA_DIR)
+        partial = path + '.partial'
+        if os.path.exists(partial):
+            os.remove(partial)
+        engine = create_engine('sqlite:///' + partial)
+        listen_sqlite_pragmas(
+            engine, {'journal_mode': 'OFF', 'synchronous': 'OFF'})
+        seed_database(engine, rows)
+        engine.dispose()
+        os.rename(partial, path)
+    return path
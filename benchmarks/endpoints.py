@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+"""
+Microbenchmarks for the building endpoints, token issuance and the
+schema layer, run in-process against seeded SQLite datasets.
+
+    python -m benchmarks.endpoints --rows 10000 --save-baseline
+    python -m benchmarks.endpoints --rows 10000 --rows 1000000
+
+Results are compared with ``--baseline`` (default
+benchmarks/baseline.json) and any case whose median is more than
+``--threshold`` slower is reported as a regression (exit status 1).
+The committed baseline was recorded on the machine named in its
+``machine`` entry; re-record it with ``--save-baseline`` on the machine
+the comparison runs on.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import OrderedDict
+
+from app import create_app, db
+from app.api.v1.building import building_schema, buildings_schema
+from app.models.building import BuildingModel
+from app.search import rebuild_index
+
+from .datasets import (ACCESS_TOKEN, CLIENT_ID, CLIENT_SECRET, PLACES,
+                       dataset_path)
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'baseline.json')
+
+
+class Suite(object):
+    """One app bound to one dataset, and the cases that run against it."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = \
+            'sqlite:///' + dataset_path(rows)
+        self.client = self.app.test_client()
+        self.rng = random.Random(rows)
+        self.created = []
+
+    def url(self, path):
+        return '{}?access_token={}'.format(path, ACCESS_TOKEN)
+
+    def send_json(self, method, path, body):
+        response = self.client.open(
+            self.url(path), method=method, data=json.dumps(body),
+            content_type='application/json')
+        assert response.status_code == 200, response.data
+        return json.loads(response.data.decode())
+
+    def case_get(self):
+        building_id = self.rng.randint(1, self.rows)
+        response = self.client.get(
+            self.url('/v1/buildings/{}'.format(building_id)))
+        assert response.status_code == 200
+
+    def case_list(self):
+        response = self.client.get(self.url('/v1/buildings'))
+        assert response.status_code == 200
+
+    def case_search(self):
+        # Alternate broad (a whole city) and narrow (one building) queries.
+        if self.rng.random() < 0.5:
+            q = self.rng.choice(PLACES)[0]
+        else:
+            q = 'building {}'.format(self.rng.randint(1, self.rows))
+        response = self.client.get('/v1/buildings/search', query_string={
+            'q': q, 'access_token': ACCESS_TOKEN})
+        assert response.status_code == 200, response.data
+
+    def case_stats(self):
+        response = self.client.get('/v1/buildings/stats', query_string={
+            'group_by': self.rng.choice(['country', 'state', 'city']),
+            'access_token': ACCESS_TOKEN})
+        assert response.status_code == 200, response.data
+
+    def case_post(self):
+        body = self.send_json('POST', '/v1/buildings', {
+            'BUILDINGNAME': 'Benchmark', 'BUILDINGCITY': 'Boston',
+            'BUILDINGSTATE': 'MA', 'BUILDINGCOUNTRY': 'US'})
+        self.created.append(body['building'][0]['BUILDINGID'])
+
+    def case_put(self):
+        self.send_json(
+            'PUT', '/v1/buildings/{}'.format(self.rng.choice(self.created)),
+            {'BUILDINGNAME': 'Benchmark', 'BUILDINGCITY': 'Cambridge',
+             'BUILDINGSTATE': 'MA', 'BUILDINGCOUNTRY': 'US'})
+
+    def case_patch(self):
+        self.send_json(
+            'PATCH', '/v1/buildings/{}'.format(self.rng.choice(self.created)),
+            {'BUILDINGCITY': 'Boston'})
+
+    def case_delete(self):
+        response = self.client.delete(self.url(
+            '/v1/buildings/{}'.format(self.created.pop())))
+        assert response.status_code == 204
+
+    def case_token(self):
+        response = self.client.post('/auth/oauth/token', data={
+            'client_id': CLIENT_ID, 'client_secret': CLIENT_SECRET,
+            'grant_type': 'client_credentials', 'scope': 'building buildings'})
+        assert response.status_code == 200, response.data
+
+    def case_serialize_one(self):
+        building_schema.dump(self.sample[0])
+
+    def case_serialize_list(self):
+        buildings_schema.dump(self.sample)
+
+    def enable_search(self):
+        """Use this dataset's search index, building it on first use."""
+        path = dataset_path(self.rows)[:-len('.sqlite')] + '-search'
+        if not os.path.exists(path):
+            rebuild_index(BuildingModel.query, path)
+        self.app.config['SEARCH_INDEX_DIR'] = path
+
+    def run(self, cases, repeat, list_max_rows):
+        results = OrderedDict()
+        with self.app.app_context():
+            if 'search' in cases:
+                self.enable_search()
+            self.sample = BuildingModel.query.limit(1000).all()
+            db.session.expunge_all()
+            for name in cases:
+                count = repeat
+                if name == 'list':
+                    if self.rows > list_max_rows:
+                        continue
+                    count = max(3, repeat // 50)
+                elif name in ('put', 'patch', 'delete'):
+                    while len(self.created) < (count if name == 'delete'
+                                               else 1):
+                        self.case_post()
+                times = []
+                for _ in range(count):
+                    started = time.perf_counter()
+                    getattr(self, 'case_' + name)()
+                    times.append(time.perf_counter() - started)
+                results[name] = summarize(times)
+                if name == 'token':
+                    self.restore_token()
+            while self.created:
+                self.case_delete()
+        return results
+
+    def restore_token(self):
+        """Issuing a token replaces the client's old one; put it back."""
+        db.session.execute(
+            'UPDATE token SET access_token = :token '
+            'WHERE client_id = :client_id',
+            {'token': ACCESS_TOKEN, 'client_id': CLIENT_ID})
+        db.session.commit()
+
+
+CASES = ['get', 'list', 'search', 'stats', 'post', 'put', 'patch', 'delete',
+         'token', 'serialize_one', 'serialize_list']
+
+
+def summarize(times):
+    times = sorted(times)
+    return OrderedDict([
+        ('n', len(times)),
+        ('median_ms', round(times[len(times) // 2] * 1000, 3)),
+        ('p95_ms', round(times[int(len(times) * 0.95)] * 1000, 3)),
+    ])
+
+
+def environment():
+    """Where results come from; timings only compare on one machine."""
+    return OrderedDict([
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('processor', platform.processor() or platform.machine()),
+        ('cpus', os.cpu_count()),
+    ])
+
+
+def compare(results, baseline, threshold):
+    """Return ``(dataset, case, baseline_ms, current_ms)`` regressions."""
+    regressions = []
+    for dataset, cases in results.items():
+        for case, current in cases.items():
+            previous = baseline.get(dataset, {}).get(case)
+            if previous and current['median_ms'] > \
+                    previous['median_ms'] * (1 + threshold):
+                regressions.append((dataset, case, previous['median_ms'],
+                                    current['median_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, action='append',
+                        help='dataset size; repeatable (default 10000)')
+    parser.add_argument('--case', action='append', choices=CASES,
+                        help='case to run; repeatable (default all)')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--list-max-rows', type=int, default=100000,
+                        help='skip the unpaginated list case above this')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown before flagging, 0.2 = 20%%')
+    args = parser.parse_args()
+
+    results = OrderedDict()
+    for rows in args.rows or [10000]:
+        print('Dataset {} rows'.format(rows))
+        results[str(rows)] = Suite(rows).run(
+            args.case or CASES, args.repeat, args.list_max_rows)
+        for case, summary in results[str(rows)].items():
+            print('  {:<16} median {:>9.3f} ms   p95 {:>9.3f} ms'.format(
+                case, summary['median_ms'], summary['p95_ms']))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if baseline.get('machine', environment()) != environment():
+        print('Note: the baseline was recorded on {}'.format(
+            baseline['machine']))
+    regressions = compare(results, baseline, args.threshold)
+    for dataset, case, before, after in regressions:
+        print('REGRESSION {} rows / {}: {:.3f} ms -> {:.3f} ms'.format(
+            dataset, case, before, after))
+
+    if args.save_baseline:
+        baseline.update(results)
+        baseline['machine'] = environment()
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print('Baseline written to {}'.format(args.baseline))
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
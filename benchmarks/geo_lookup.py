@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Radius lookups through the BUILDINGCELL index against a scan of the
+coordinate columns, across dataset sizes.
+
+    python -m benchmarks.geo_lookup --rows 10000 --rows 100000 \
+        --rows 1000000
+
+The indexed lookup reads only the cells around the center, so its time
+grows with the number of nearby buildings rather than with the table.
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import and_, create_engine, select
+
+from app.geo import bounding_box, box_condition, haversine_km
+from app.models.building import BuildingModel
+
+from .datasets import PLACES, SPREAD_DEGREES, dataset_path
+from .sqlite_concurrency import percentile
+
+table = BuildingModel.__table__
+
+
+def scan_condition(min_lat, min_lon, max_lat, max_lon):
+    # The benchmark centers never straddle the antimeridian.
+    return and_(table.c.BUILDINGLATITUDE.between(min_lat, max_lat),
+                table.c.BUILDINGLONGITUDE.between(min_lon, max_lon))
+
+
+def lookup(conn, condition, lat, lon, radius):
+    box = bounding_box(lat, lon, radius)
+    rows = conn.execute(select([
+        table.c.BUILDINGID, table.c.BUILDINGLATITUDE,
+        table.c.BUILDINGLONGITUDE]).where(condition(*box))).fetchall()
+    return [row[0] for row in rows
+            if haversine_km(lat, lon, row[1], row[2]) <= radius]
+
+
+def time_lookups(conn, condition, centers, radius):
+    timings = []
+    found = 0
+    for lat, lon in centers:
+        started = time.perf_counter()
+        found += len(lookup(conn, condition, lat, lon, radius))
+        timings.append(time.perf_counter() - started)
+    return timings, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, action='append')
+    parser.add_argument('--radius', type=float, default=1.0,
+                        help='kilometres')
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    centers = []
+    for _ in range(args.lookups):
+        place = rng.choice(PLACES)
+        centers.append((place[3] + rng.uniform(-SPREAD_DEGREES,
+                                               SPREAD_DEGREES),
+                        place[4] + rng.uniform(-SPREAD_DEGREES,
+                                               SPREAD_DEGREES)))
+
+    print('{:>9} {:>8} {:>14} {:>14} {:>9}'.format(
+        'rows', 'found', 'cell p50 ms', 'scan p50 ms', 'speedup'))
+    for rows in args.rows or [10000, 100000]:
+        engine = create_engine('sqlite:///' + dataset_path(rows))
+        with engine.connect() as conn:
+            cell, found = time_lookups(
+                conn, lambda *box: box_condition(table.c, *box), centers,
+                args.radius)
+            scan, scan_found = time_lookups(conn, scan_condition, centers,
+                                            args.radius)
+        engine.dispose()
+        assert found == scan_found, 'the cell lookup missed buildings'
+        cell_p50, scan_p50 = percentile(cell, 0.5), percentile(scan, 0.5)
+        print('{:>9} {:>8.1f} {:>14.3f} {:>14.3f} {:>8.1f}x'.format(
+            rows, found / float(len(centers)), cell_p50 * 1000,
+            scan_p50 * 1000, scan_p50 / cell_p50))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Latency of POST /v1/buildings, which logs its payload, with logging off,
+written synchronously to a slow handler (as the syslog handler of
+UnixConfig was) and sent through the queue of app/log_pipeline.py.
+
+    python -m benchmarks.logging_overhead --handler-ms 1 --requests 300
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.log_pipeline import register_logging, stop_logging
+from app.models import Client, Token
+
+
+class SlowHandler(logging.Handler):
+    """Stands in for a remote handler: formats, then waits ``seconds``."""
+
+    def __init__(self, seconds):
+        super().__init__()
+        self.seconds = seconds
+        self.written = 0
+
+    def emit(self, record):
+        self.format(record)
+        time.sleep(self.seconds)
+        self.written += 1
+
+
+def make_app(database, mode, handler, sampling):
+    app = create_app('testing')
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + database
+    app.config['QUERY_BUDGET_RAISE'] = False
+    stop_logging()
+    # Loggers are global: clear what earlier runs attached.
+    for logger in (app.logger, logging.getLogger('app')):
+        for existing in list(logger.handlers):
+            logger.removeHandler(existing)
+    if mode == 'off':
+        app.logger.setLevel(logging.WARNING)
+        logging.getLogger('app').setLevel(logging.WARNING)
+    elif mode == 'sync':
+        for logger in (app.logger, logging.getLogger('app')):
+            logger.setLevel(logging.INFO)
+            logger.addHandler(handler)
+    else:
+        app.logger.addHandler(handler)
+        app.config.update(LOG_ASYNC=True, LOG_LEVEL='INFO',
+                          LOG_SAMPLING={'app.api.v1.building': sampling})
+        register_logging(app)
+    with app.app_context():
+        db.create_all()
+        if Token.query.first() is None:
+            db.session.add(Client(client_id='bench', client_secret='s'))
+            db.session.add(Token(
+                client_id='bench', access_token='bench',
+                token_type='Bearer', _scopes='buildings buildings:write',
+                expires=datetime.utcnow() + timedelta(days=1)))
+            db.session.commit()
+    return app
+
+
+def measure(app, requests):
+    client = app.test_client()
+    body = json.dumps({'BUILDINGNAME': 'Benchmark ' + 'x' * 200,
+                       'BUILDINGCITY': 'Boston', 'BUILDINGCOUNTRY': 'US'})
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.post('/v1/buildings?access_token=bench',
+                               data=body, content_type='application/json')
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.data
+    latencies.sort()
+    return (sum(latencies) / len(latencies) * 1000,
+            latencies[len(latencies) // 2] * 1000,
+            latencies[int(len(latencies) * 0.99)] * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--handler-ms', type=float, default=1.0,
+                        help='Time the slow handler takes per record')
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        print('{:<22} {:>9} {:>9} {:>9} {:>9}'.format(
+            'logging', 'mean ms', 'p50 ms', 'p99 ms', 'written'))
+        for mode, sampling in [('off', None), ('sync', None),
+                               ('async', 1.0), ('async', 0.1)]:
+            handler = SlowHandler(args.handler_ms / 1000)
+            app = make_app(os.path.join(directory, 'bench.sqlite'), mode,
+                           handler, sampling)
+            mean, p50, p99 = measure(app, args.requests)
+            stop_logging()
+            label = mode if sampling is None else \
+                '{} (sampling {})'.format(mode, sampling)
+            print('{:<22} {:>9.2f} {:>9.2f} {:>9.2f} {:>9}'.format(
+                label, mean, p50, p99, handler.written))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Parallel readers and writers against a SQLite BUILDING table, once with the
+default rollback journal and once with ``Config.SQLALCHEMY_SQLITE_PRAGMAS``.
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 2
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+from app.database import listen_sqlite_pragmas
+from app.models.building import BuildingModel
+from config import Config
+
+building = BuildingModel.__table__
+
+PROFILES = {
+    'rollback-journal': {'journal_mode': 'DELETE', 'synchronous': 'FULL',
+                         'busy_timeout': 5000},
+    'tuned': Config.SQLALCHEMY_SQLITE_PRAGMAS,
+}
+
+
+def make_engine(path, pragmas, pool_size):
+    engine = create_engine(
+        'sqlite:///' + path,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        connect_args={'check_same_thread': False})
+    listen_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def seed(engine, rows):
+    building.create(engine)
+    engine.execute(building.insert(), [{
+        'BUILDINGNAME': 'Building {}'.format(i),
+        'BUILDINGCITY': 'Boston',
+        'BUILDINGSTATE': 'MA',
+        'BUILDINGCOUNTRY': 'US',
+    } for i in range(rows)])
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def run(engine, rows, readers, writers, duration):
+    stop = threading.Event()
+    results = {'read': [], 'write': [], 'errors': 0}
+    lock = threading.Lock()
+
+    def reader():
+        latencies = []
+        while not stop.is_set():
+            building_id = random.randint(1, rows)
+            started = time.perf_counter()
+            try:
+                engine.execute(select([building]).where(
+                    building.c.BUILDINGID == building_id)).fetchall()
+            except OperationalError:
+                with lock:
+                    results['errors'] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+        with lock:
+            results['read'].extend(latencies)
+
+    def writer():
+        latencies = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                if random.random() < 0.5:
+                    engine.execute(building.insert(), BUILDINGNAME='New')
+                else:
+                    engine.execute(building.update().where(
+                        building.c.BUILDINGID == random.randint(1, rows)
+                    ).values(BUILDINGCITY='Cambridge'))
+            except OperationalError:
+                with lock:
+                    results['errors'] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+        with lock:
+            results['write'].extend(latencies)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + \
+        [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        print('{:<18} {:>10} {:>10} {:>12} {:>12} {:>7}'.format(
+            'profile', 'reads/s', 'writes/s', 'read p99 ms', 'write p99 ms',
+            'errors'))
+        for name, pragmas in PROFILES.items():
+            path = os.path.join(workdir, name + '.sqlite')
+            engine = make_engine(path, pragmas, args.readers + args.writers)
+            seed(engine, args.rows)
+            results = run(engine, args.rows, args.readers, args.writers,
+                          args.duration)
+            engine.dispose()
+            print('{:<18} {:>10.0f} {:>10.0f} {:>12.2f} {:>12.2f} {:>7}'.format(
+                name,
+                len(results['read']) / args.duration,
+                len(results['write']) / args.duration,
+                percentile(results['read'], 0.99) * 1000,
+                percentile(results['write'], 0.99) * 1000,
+                results['errors']))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Per-request cost of API usage metering: UsageMeter.record on its own,
+GET /v1/buildings/1 with metering off and on, and one flush of the
+counts a worker collects between flushes.
+
+    python -m benchmarks.usage_overhead --requests 1000 --keys 500
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import timeit
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.models import Client, Token
+from app.models.building import BuildingModel
+from app.usage import UsageMeter, flush_usage, register_usage_metering
+
+
+def make_app(database, metering):
+    app = create_app('testing')
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite:///' + database,
+                      QUERY_BUDGET_RAISE=False, USAGE_METERING=metering,
+                      # Flushed by hand, so no thread writes during a run
+                      USAGE_FLUSH_INTERVAL=0)
+    register_usage_metering(app)
+    with app.app_context():
+        db.create_all()
+        if Token.query.first() is None:
+            db.session.add(Client(client_id='bench', client_secret='s'))
+            db.session.add(Token(
+                client_id='bench', access_token='bench',
+                token_type='Bearer', _scopes='building buildings',
+                expires=datetime.utcnow() + timedelta(days=1)))
+            db.session.add(BuildingModel(BUILDINGID=1,
+                                         BUILDINGNAME='Benchmark'))
+            db.session.commit()
+    return app
+
+
+def measure(app, requests):
+    client = app.test_client()
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get('/v1/buildings/1?access_token=bench')
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.data
+    latencies.sort()
+    return (sum(latencies) / len(latencies) * 1000,
+            latencies[len(latencies) // 2] * 1000,
+            latencies[int(len(latencies) * 0.99)] * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=3,
+                        help='Alternating off/on runs of --requests each')
+    parser.add_argument('--keys', type=int, default=500,
+                        help='Distinct (client, endpoint, minute) keys to '
+                        'flush')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        database = os.path.join(directory, 'bench.sqlite')
+        meter = UsageMeter(make_app(database, True))
+        calls = 100000
+        seconds = timeit.timeit(lambda: meter.record('bench', 'Building'),
+                                number=calls)
+        print('UsageMeter.record: {:.2f} us per call'.format(
+            seconds / calls * 1e6))
+
+        print('{:<10} {:>9} {:>9} {:>9}'.format(
+            'metering', 'mean ms', 'p50 ms', 'p99 ms'))
+        for _ in range(args.rounds):
+            for metering in (False, True):
+                app = make_app(database, metering)
+                print('{:<10} {:>9.3f} {:>9.3f} {:>9.3f}'.format(
+                    'on' if metering else 'off',
+                    *measure(app, args.requests)))
+
+        meter.counts.clear()
+        for key in range(args.keys):
+            meter.counts[('bench', 'Building', key)] = 1
+        started = time.perf_counter()
+        meter.flush()
+        print('flush of {} keys: {:.1f} ms'.format(
+            args.keys, (time.perf_counter() - started) * 1000))
+    finally:
+        # Save what the meters still hold before the database goes.
+        flush_usage()
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 from raygun4py.middleware import flask as flask_raygun
 
 PYTHON_VERSION = sys.version_info[0]
@@ -18,6 +19,12 @@ if os.path.exists('config.env'):
             os.environ[var[0]] = var[1].replace("\"", "")
 
 
+def env_list(name, default=''):
+    """The comma-separated items of environment variable ``name``."""
+    return [item.strip() for item in
+            (os.environ.get(name) or default).split(',') if item.strip()]
+
+
 class Config:
     APP_NAME = 'REST API'
 
@@ -28,6 +35,129 @@ class Config:
         print('SECRET KEY ENV VAR NOT SET! SHOULD NOT SEE IN PRODUCTION')
     SQLALCHEMY_COMMIT_ON_TEARDOWN = True
 
+    # Database engine
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_pre_ping': True}
+    SQLALCHEMY_STATEMENT_TIMEOUT = None  # milliseconds, Postgres only
+    SQLALCHEMY_SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,
+        'busy_timeout': 5000,
+    }
+    # Seconds a read replica may lag before reads fall back to the primary.
+    # Clients also read from the primary for this long after they write.
+    SQLALCHEMY_REPLICA_MAX_LAG = float(
+        os.environ.get('REPLICA_MAX_LAG') or 5)
+
+    # Per-endpoint Prometheus metrics at /metrics, served to requests from
+    # these networks or bearing METRICS_TOKEN
+    METRICS_ENABLED = True
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOWED_NETWORKS = env_list('METRICS_ALLOWED_NETWORKS',
+                                        '127.0.0.1/32,::1/128')
+
+    # Warn when one request repeats a statement this often (likely N+1).
+    QUERY_REPEAT_THRESHOLD = 3
+    # Raise instead of warn when a view exceeds its @query_budget.
+    QUERY_BUDGET_RAISE = False
+
+    # Statements slower than this many seconds are written, with their
+    # query plan, to a rotating JSON log shown at /admin/slow-queries.
+    # None disables the log.
+    SLOW_QUERY_THRESHOLD = float(
+        os.environ.get('SLOW_QUERY_THRESHOLD') or 0.5)
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG') or \
+        os.path.join(basedir, 'logs', 'slow-queries.log')
+    SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS = 5
+    # Bound parameters hold access tokens, client secrets and password
+    # hashes, so they are only logged when this is turned on explicitly
+    # (`manage.py index_advisor` needs them to replay the statements).
+    SLOW_QUERY_LOG_PARAMETERS = \
+        (os.environ.get('SLOW_QUERY_LOG_PARAMETERS') or 'False') == 'True'
+
+    # Whoosh full-text index over the building text columns, kept current
+    # by the write handlers. Build it with `manage.py rebuild_search_index`.
+    SEARCH_INDEX_DIR = os.environ.get('SEARCH_INDEX_DIR') or \
+        os.path.join(basedir, 'search-index')
+    SEARCH_MAX_PER_PAGE = 100
+
+    # Limits of the geospatial building queries
+    GEO_MAX_RADIUS_KM = 50
+    GEO_MAX_SPAN_DEGREES = 2
+    GEO_MAX_RESULTS = 500
+    # (id, latitude, longitude) rows a radius search reads per ring
+    GEO_MAX_CANDIDATES = 5000
+
+    # Rows fetched and streamed at a time by /v1/buildings/export
+    EXPORT_BATCH_SIZE = 5000
+
+    # Log records are queued and written as JSON by a background thread,
+    # so slow handlers (syslog) never block a request. Records below
+    # WARNING are sampled at these rates per logger (and its children),
+    # e.g. LOG_SAMPLING="app.api.v1.building=0.1,app.search=0.5".
+    LOG_ASYNC = True
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    LOG_QUEUE_SIZE = 10000
+    LOG_MAX_FIELD_LENGTH = 2000
+    LOG_SAMPLING = dict(
+        (name, float(rate)) for name, rate in
+        (item.split('=') for item in
+         (os.environ.get('LOG_SAMPLING') or 'app.api.v1.building=0.1')
+         .split(',') if item))
+
+    # API requests are counted per client, endpoint and minute in each
+    # worker and added to the api_usage table every this many seconds
+    # (0: only at exit and on usage.flush_usage())
+    USAGE_METERING = True
+    USAGE_FLUSH_INTERVAL = float(os.environ.get('USAGE_FLUSH_INTERVAL') or 10)
+
+    # Users per page of the admin user list
+    ADMIN_USERS_PER_PAGE = 50
+
+    # /v1/buildings/changes holds back changes younger than this, so a
+    # transaction still committing is not skipped by a client's cursor
+    CHANGES_SETTLE_SECONDS = float(
+        os.environ.get('CHANGES_SETTLE_SECONDS') or 2)
+    CHANGES_MAX_PAGE = 1000
+
+    # Jinja bytecode cache: 'filesystem' (TEMPLATE_CACHE_DIR), 'redis' (the
+    # RQ server) or 'none'. Fill it with `manage.py compile_templates`.
+    TEMPLATE_CACHE = os.environ.get('TEMPLATE_CACHE') or 'filesystem'
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR') or \
+        os.path.join(basedir, 'template-cache')
+
+    # Seconds a stored Idempotency-Key response is replayed for, and after
+    # which a key whose request never finished may be reused
+    IDEMPOTENCY_KEY_TTL = 24 * 3600
+    IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+    # Serve the .br/.gz files written by `manage.py compress_static`
+    STATIC_PRECOMPRESSED = True
+
+    # Append the bundle version to asset URLs (?<hash>)
+    ASSETS_URL_EXPIRE = True
+
+    # Resolve asset bundle URLs from the manifest of content hashed files
+    # written by `manage.py build_assets` instead of asking webassets
+    USE_ASSET_MANIFEST = False
+    ASSET_MANIFEST_FILE = os.environ.get('ASSET_MANIFEST_FILE') or \
+        os.path.join(basedir, 'app', 'static', 'assets-manifest.json')
+
+    # Compression. Flask-Compress handles pages; API routes use the size
+    # based policy in app/compression.py instead.
+    COMPRESS_REGISTER = False
+    COMPRESS_MIMETYPES = ['text/html', 'text/css', 'text/xml',
+                          'application/json', 'application/javascript',
+                          'text/csv', 'application/x-ndjson']
+    API_COMPRESS_PREFIXES = ['/v1/']
+    API_COMPRESS_MIN_SIZE = 1024
+    # (body size below which the level applies, level); None = any size
+    API_COMPRESS_LEVELS = [(64 * 1024, 6), (1024 * 1024, 4), (None, 1)]
+
+    # Seconds clients may reuse /apispec_1.json before revalidating it
+    API_SPEC_MAX_AGE = 300
+
     # Email
 
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
@@ -75,22 +205,56 @@ class Config:
 class DevelopmentConfig(Config):
     DEBUG = True
     ASSETS_DEBUG = True
+    STATIC_PRECOMPRESSED = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'data-dev.sqlite')
+    SQLALCHEMY_BINDS = {
+        'replica': os.environ.get('DEV_REPLICA_DATABASE_URL')
+    } if os.environ.get('DEV_REPLICA_DATABASE_URL') else None
+    SQLALCHEMY_POOL_SIZE = 5
     print('THIS APP IS IN DEBUG MODE. YOU SHOULD NOT SEE THIS IN PRODUCTION.')
 
 
 class TestingConfig(Config):
     TESTING = True
+    QUERY_BUDGET_RAISE = True
+    SLOW_QUERY_THRESHOLD = None
+    SEARCH_INDEX_DIR = None
+    CHANGES_SETTLE_SECONDS = 0
+    USAGE_METERING = False
+    USAGE_FLUSH_INTERVAL = 0
+    LOG_LEVEL = 'WARNING'
+    TEMPLATE_CACHE = None
+    # Never build bundles into app/static while testing
+    ASSETS_DIRECTORY = os.path.join(tempfile.gettempdir(), 'rest-api-assets')
+    ASSETS_AUTO_BUILD = False
+    ASSETS_URL_EXPIRE = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'data-test.sqlite')
+    SQLALCHEMY_BINDS = {
+        'replica': os.environ.get('TEST_REPLICA_DATABASE_URL')
+    } if os.environ.get('TEST_REPLICA_DATABASE_URL') else None
     WTF_CSRF_ENABLED = False
 
 
 class ProductionConfig(Config):
+    USE_ASSET_MANIFEST = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'data.sqlite')
+    SQLALCHEMY_BINDS = {
+        'replica': os.environ.get('REPLICA_DATABASE_URL')
+    } if os.environ.get('REPLICA_DATABASE_URL') else None
+    SQLALCHEMY_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE') or 10)
+    SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get('DATABASE_MAX_OVERFLOW') or 20)
+    SQLALCHEMY_POOL_TIMEOUT = 10
+    SQLALCHEMY_POOL_RECYCLE = 1800
+    SQLALCHEMY_STATEMENT_TIMEOUT = int(
+        os.environ.get('DATABASE_STATEMENT_TIMEOUT') or 30000)
     SSL_DISABLE = (os.environ.get('SSL_DISABLE') or 'True') == 'True'
+    # Behind a local reverse proxy every request comes from loopback, so
+    # only networks named in the environment are trusted; otherwise
+    # /metrics needs METRICS_TOKEN.
+    METRICS_ALLOWED_NETWORKS = env_list('METRICS_ALLOWED_NETWORKS')
 
     @classmethod
     def init_app(cls, app):
@@ -115,7 +279,7 @@ class UnixConfig(ProductionConfig):
     def init_app(cls, app):
         ProductionConfig.init_app(app)
 
-        # Log to syslog
+        # Log to syslog, from the background thread of app/log_pipeline.py
         import logging
         from logging.handlers import SysLogHandler
         syslog_handler = SysLogHandler()
@@ -0,0 +1,26 @@
+import os
+import shutil
+import tempfile
+
+# Workers share Prometheus samples through files in this directory; it has
+# to be in the environment before they import the app.
+metrics_dir = os.environ.setdefault(
+    'prometheus_multiproc_dir',
+    os.path.join(tempfile.gettempdir(), 'rest-api-metrics'))
+
+
+def on_starting(server):
+    """Start each run with no samples left over from old workers."""
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    """Save the worker's unsaved API usage counts."""
+    from app.usage import flush_usage
+    flush_usage()
@@ -3,6 +3,7 @@ import os
 import subprocess
 from config import Config
 
+from flask_assets import ManageAssets
 from flask_migrate import Migrate, MigrateCommand
 from flask_script import Manager, Shell
 from redis import Redis
@@ -23,6 +24,7 @@ def make_shell_context():
 
 manager.add_command('shell', Shell(make_context=make_shell_context))
 manager.add_command('db', MigrateCommand)
+manager.add_command('assets', ManageAssets)
 
 
 @manager.command
@@ -48,12 +50,63 @@ def add_fake_data(number_users):
     User.generate_fake(count=number_users)
 
 
+@manager.option(
+    '-u', '--users', dest='users', default=0, type=int,
+    help='Number of users to create')
+@manager.option(
+    '-a', '--apps', dest='apps', default=0, type=int,
+    help='Number of apps to create, each with a client and a token')
+@manager.option(
+    '-b', '--buildings', dest='buildings', default=0, type=int,
+    help='Number of buildings to create')
+@manager.option(
+    '-c', '--chunk-size', dest='chunk_size', default=10000, type=int,
+    help='Rows per transaction')
+@manager.option(
+    '-j', '--workers', dest='workers', default=os.cpu_count() or 1,
+    type=int, help='Processes generating rows')
+@manager.option(
+    '-s', '--seed', dest='seed', default=None, type=int,
+    help='Random seed, for repeatable data')
+@manager.option(
+    '-p', '--password', dest='password', default='password',
+    help='Password of every created user')
+def seed_fake_data(users, apps, buildings, chunk_size, workers, seed,
+                   password):
+    """Bulk inserts fake users, apps and buildings for load testing."""
+    import sys
+    import time
+    from app.seed import seed_database
+
+    started = time.time()
+
+    def on_chunk(kind, inserted):
+        print('{} {} inserted ({:.0f}s)'.format(
+            inserted, kind, time.time() - started), file=sys.stderr)
+
+    try:
+        totals = seed_database(db.engine, users, apps, buildings,
+                               chunk_size, workers, seed, password, on_chunk)
+    except ValueError as e:
+        sys.exit(str(e))
+    seconds = time.time() - started
+    rows = users + 3 * apps + buildings
+    print('Inserted {} in {:.1f}s ({:.0f} rows/s)'.format(
+        ', '.join('{} {}'.format(count, kind)
+                  for kind, count in sorted(totals.items())) or 'nothing',
+        seconds, rows / max(seconds, 1e-6)))
+
+
 @manager.command
 def setup_dev():
     """Runs the set-up needed for local development."""
+    from flask_migrate import stamp
+
     db.drop_all()
     db.create_all()
     db.session.commit()
+    # The tables match the models, so mark every migration as applied.
+    stamp()
     setup_general()
 
 
@@ -81,6 +134,286 @@ def setup_general():
             print('Added administrator {}'.format(user.full_name()))
 
 
+@manager.command
+def build_assets():
+    """Builds the asset bundles into content hashed files and writes the
+    manifest production resolves their URLs from.
+
+    Run at deploy time, before compress_static.
+    """
+    from app.asset_manifest import build_assets
+
+    manifest = build_assets(app)
+    for name, path in sorted(manifest.items()):
+        print('{} -> {}'.format(name, path))
+    print('Wrote {}'.format(os.path.relpath(app.config['ASSET_MANIFEST_FILE'])))
+
+
+@manager.command
+def compress_static():
+    """Writes .gz/.br variants of static files, including built bundles.
+
+    Run after `python manage.py build_assets` at deploy time.
+    """
+    from app.static_files import compress_static_files, static_folders
+
+    written = compress_static_files(static_folders(app).values())
+    for path in written:
+        print('Compressed {}'.format(os.path.relpath(path)))
+    print('{} files written'.format(len(written)))
+
+
+@manager.option(
+    '-o', '--output', dest='path',
+    default=os.path.join('app', 'static', 'apispec_1.json'),
+    help='File the spec is written to')
+def dump_api_spec(path):
+    """Writes the Swagger spec served at /apispec_1.json to a file.
+
+    Run before compress_static so that the file gets .gz/.br variants too.
+    """
+    from app.api_spec import spec_json
+
+    with open(path, 'wb') as f:
+        f.write(spec_json(app))
+    print('Wrote {}'.format(path))
+
+
+@manager.command
+def compile_templates():
+    """Compiles every template into the Jinja bytecode cache.
+
+    Run at deploy time so that new workers skip compiling templates.
+    """
+    from app.template_cache import compile_templates
+
+    if app.jinja_env.bytecode_cache is None:
+        print('TEMPLATE_CACHE is not set; nothing to compile into')
+        return
+    names = compile_templates(app)
+    print('{} templates compiled'.format(len(names)))
+
+
+@manager.option(
+    '-c', '--chunk-size', dest='chunk_size', default=10000, type=int,
+    help='Rows fetched from the database at a time')
+def rebuild_search_index(chunk_size):
+    """Rebuilds the building full-text search index from the database."""
+    import time
+    from app.models.building import BuildingModel
+    from app.search import rebuild_index
+
+    started = time.time()
+    query = BuildingModel.query.order_by(BuildingModel.BUILDINGID)
+    count = rebuild_index(query, app.config['SEARCH_INDEX_DIR'], chunk_size)
+    print('Indexed {} buildings in {:.1f}s'.format(
+        count, time.time() - started))
+
+
+@manager.option(
+    '-f', '--file', dest='path', default='-',
+    help='CSV or NDJSON file, optionally .gz (default: stdin)')
+@manager.option(
+    '--format', dest='format', default=None, choices=('csv', 'ndjson'),
+    help='Input format (default: from the file extension)')
+@manager.option(
+    '-c', '--chunk-size', dest='chunk_size', default=10000, type=int,
+    help='Rows per transaction')
+@manager.option(
+    '-j', '--workers', dest='workers', default=os.cpu_count() or 1,
+    type=int, help='Processes validating rows')
+@manager.option(
+    '-r', '--rejects', dest='rejects', default=None,
+    help='Write rejected rows to this NDJSON file')
+@manager.option(
+    '--keep-ids', dest='keep_ids', action='store_true', default=False,
+    help='Insert BUILDINGID values from the input instead of new ids')
+def import_buildings(path, format, chunk_size, workers, rejects, keep_ids):
+    """Streams buildings from CSV or NDJSON into the database."""
+    import json
+    import sys
+    import time
+    from app import bulk_import
+
+    format = format or bulk_import.detect_format(path)
+    if format is None:
+        sys.exit('Cannot tell the format of {}; pass --format'.format(path))
+    started = time.time()
+    rejects_file = open(rejects, 'w') if rejects else None
+    shown = [0]
+
+    def on_reject(line, errors, record):
+        if rejects_file:
+            rejects_file.write(json.dumps(
+                {'line': line, 'errors': errors, 'record': record}) + '\n')
+        elif shown[0] < 10:
+            print('Line {}: {}'.format(line, errors), file=sys.stderr)
+            shown[0] += 1
+
+    def on_chunk(imported, rejected):
+        print('{} rows imported ({:.0f} rows/s), {} rejected'.format(
+            imported, imported / max(time.time() - started, 1e-6),
+            rejected), file=sys.stderr)
+
+    with bulk_import.open_source(path) as stream:
+        try:
+            imported, rejected = bulk_import.import_buildings(
+                db.engine, bulk_import.read_records(stream, format),
+                chunk_size, keep_ids, workers, on_chunk, on_reject)
+        finally:
+            if rejects_file:
+                rejects_file.close()
+    seconds = time.time() - started
+    print('Imported {} buildings in {:.1f}s ({:.0f} rows/s), rejected {}'
+          .format(imported, seconds, imported / max(seconds, 1e-6),
+                  rejected))
+    if app.config.get('SEARCH_INDEX_DIR'):
+        print('Run `manage.py rebuild_search_index` to make them searchable')
+
+
+@manager.option(
+    '-o', '--output', dest='path', default='-',
+    help='Output file; .gz compresses it (default: stdout)')
+@manager.option(
+    '--format', dest='format', default=None,
+    choices=('csv', 'ndjson', 'parquet'),
+    help='Output format (default: from the file extension, else csv)')
+@manager.option(
+    '-b', '--batch-size', dest='batch_size', default=10000, type=int,
+    help='Rows fetched, written and, for Parquet, per row group')
+@manager.option(
+    '-z', '--gzip', dest='compress', action='store_true', default=False,
+    help='Gzip CSV or NDJSON output')
+def export_buildings(path, format, batch_size, compress):
+    """Streams every building to CSV, NDJSON or Parquet."""
+    import gzip
+    import io
+    import sys
+    import time
+    from app import export
+    from app.bulk_import import detect_format
+
+    format = format or (path.endswith('.parquet') and 'parquet') or \
+        detect_format(path) or 'csv'
+    compress = compress or path.endswith('.gz')
+    started = time.time()
+    count = [0]
+
+    def counted(rows):
+        for row in rows:
+            count[0] += 1
+            yield row
+
+    rows = counted(export.export_rows(batch_size))
+    if format == 'parquet':
+        if path == '-':
+            sys.exit('Parquet output needs --output')
+        export.write_parquet(rows, path, batch_size)
+    else:
+        raw = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        stream = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) \
+            if compress else raw
+        out = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+        for chunk in export.CHUNKS[format](rows, batch_size):
+            out.write(chunk)
+        out.detach()
+        if compress:
+            stream.close()
+        if raw is sys.stdout.buffer:
+            raw.flush()
+        else:
+            raw.close()
+    seconds = time.time() - started
+    print('Exported {} buildings in {:.1f}s ({:.0f} rows/s)'.format(
+        count[0], seconds, count[0] / max(seconds, 1e-6)), file=sys.stderr)
+
+
+@manager.command
+def rebuild_building_stats():
+    """Recounts the building summary table behind /v1/buildings/stats."""
+    from app.building_stats import rebuild_building_stats as rebuild
+
+    print('Rebuilt {} summary rows'.format(rebuild()))
+
+
+@manager.command
+def prune_idempotency_keys():
+    """Deletes Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL."""
+    from app.idempotency import prune_idempotency_keys as prune
+
+    print('Deleted {} expired keys'.format(prune()))
+
+
+@manager.option(
+    '-w', '--workload', dest='workload', default=None,
+    help='Slow query log to replay (default: SLOW_QUERY_LOG)')
+@manager.option(
+    '-c', '--copy-url', dest='copy_url', default=None,
+    help='Database URL of a scratch copy to build indexes on. '
+    'Required unless the database is SQLite, which is copied')
+@manager.option(
+    '-r', '--repeat', dest='repeat', default=5, type=int,
+    help='Runs per query; the median is reported')
+@manager.option(
+    '-g', '--min-gain', dest='min_gain', default=0.1, type=float,
+    help='Smallest speed-up (as a fraction) worth recommending')
+def index_advisor(workload, copy_url, repeat, min_gain):
+    """Proposes indexes for the sequential scans in a recorded workload.
+
+    Record the workload by running with SLOW_QUERY_THRESHOLD=0 and
+    SLOW_QUERY_LOG_PARAMETERS=True, since statements logged without their
+    parameters cannot be replayed. Each proposed index is built on a copy
+    of the database and the queries that scanned are timed before and
+    after.
+    """
+    import shutil
+    import tempfile
+    from sqlalchemy import create_engine
+    from app.index_advisor import advise, copy_sqlite_database, load_workload
+
+    skipped = []
+    queries = load_workload(workload or app.config['SLOW_QUERY_LOG'],
+                            skipped)
+    if skipped:
+        print('Skipping {} statements logged without their parameters '
+              '(record with SLOW_QUERY_LOG_PARAMETERS=True):'.format(
+                  len(skipped)))
+        for statement in skipped:
+            print('    ' + statement)
+    print('Replaying {} distinct statements'.format(len(queries)))
+    workdir = None
+    if copy_url is None:
+        if db.engine.dialect.name != 'sqlite':
+            print('--copy-url is required for {}'.format(
+                db.engine.dialect.name))
+            return
+        workdir = tempfile.mkdtemp()
+        copy_path = os.path.join(workdir, 'advisor.sqlite')
+        copy_sqlite_database(db.engine, copy_path)
+        copy_url = 'sqlite:///' + copy_path
+    engine = create_engine(copy_url)
+    try:
+        results = advise(engine, queries, repeat=repeat)
+    finally:
+        engine.dispose()
+        if workdir is not None:
+            shutil.rmtree(workdir)
+
+    if not results:
+        print('No sequential scans found')
+    for result in sorted(results, key=lambda r: r['after'] - r['before']):
+        gain = 1 - result['after'] / result['before'] \
+            if result['before'] else 0.0
+        print('\n{} ({}): {} queries, {:.3f} ms -> {:.3f} ms ({:.0%} faster)'
+              '{}'.format(result['table'], ', '.join(result['columns']),
+                          result['queries'], result['before'] * 1000,
+                          result['after'] * 1000, gain,
+                          '' if result['uses_index'] else
+                          ', planner did not use it'))
+        if gain >= min_gain and result['uses_index']:
+            print('    ' + result['ddl'])
+
+
 @manager.command
 def run_worker():
     """Initializes a slim rq task queue."""
@@ -0,0 +1,30 @@
+"""user permissions
+
+Revision ID: 0da6b4994c69
+Revises: 964d0daca038
+Create Date: 2026-10-19 18:07:29.809457
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0da6b4994c69'
+down_revision = '964d0daca038'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('permissions', sa.Integer(),
+                                     nullable=False, server_default='0'))
+    # Copy each user's role permissions, as User.role does on assignment.
+    op.execute(
+        'UPDATE users SET permissions = COALESCE((SELECT roles.permissions '
+        'FROM roles WHERE roles.id = users.role_id), 0)')
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('permissions')
@@ -0,0 +1,37 @@
+"""idempotency keys
+
+Revision ID: 41108cc48058
+Revises: 561a2ffa822b
+Create Date: 2026-10-19 18:04:19.032913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '41108cc48058'
+down_revision = '561a2ffa822b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('client_id', sa.String(length=40), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.Integer(), nullable=True),
+        sa.Column('mimetype', sa.String(length=100), nullable=True),
+        sa.Column('body', sa.LargeBinary(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('client_id', 'key'))
+    op.create_index(op.f('ix_idempotency_keys_created_at'),
+                    'idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_idempotency_keys_created_at'),
+                  table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
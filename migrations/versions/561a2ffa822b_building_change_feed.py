@@ -0,0 +1,40 @@
+"""building change feed
+
+Revision ID: 561a2ffa822b
+Revises: f8243a858380
+Create Date: 2026-10-19 18:03:34.258350
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '561a2ffa822b'
+down_revision = 'f8243a858380'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'BUILDINGCHANGES',
+        sa.Column('CHANGEID', sa.Integer(), nullable=False),
+        sa.Column('BUILDINGID', sa.Integer(), nullable=False),
+        sa.Column('OPERATION', sa.String(length=10), nullable=False),
+        sa.Column('CHANGEDAT', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('CHANGEID'),
+        sqlite_autoincrement=True)
+    # Log the existing buildings as upserts, so that a client syncing from
+    # the start of the feed gets them.
+    op.get_bind().execute(sa.text(
+        'INSERT INTO "BUILDINGCHANGES" ("BUILDINGID", "OPERATION", '
+        '"CHANGEDAT") SELECT "BUILDINGID", \'upsert\', :changed_at '
+        'FROM "BUILDING" ORDER BY "BUILDINGID"'),
+        changed_at=datetime.utcnow())
+
+
+def downgrade():
+    op.drop_table('BUILDINGCHANGES')
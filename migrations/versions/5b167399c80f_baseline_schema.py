@@ -0,0 +1,140 @@
+"""baseline schema, as it was before there were migrations
+
+Revision ID: 5b167399c80f
+Revises:
+Create Date: 2026-10-19 18:29:51.722801
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b167399c80f'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created before there were migrations already have some or
+    # all of these tables; only the missing ones are created.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'roles' not in existing:
+        op.create_table(
+            'roles',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=64), nullable=True),
+            sa.Column('index', sa.String(length=64), nullable=True),
+            sa.Column('default', sa.Boolean(), nullable=True),
+            sa.Column('permissions', sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name'))
+        op.create_index(op.f('ix_roles_default'), 'roles', ['default'],
+                        unique=False)
+
+    if 'BUILDING' not in existing:
+        op.create_table(
+            'BUILDING',
+            sa.Column('BUILDINGID', sa.Integer(), nullable=False),
+            sa.Column('BUILDINGNAME', sa.String(length=255), nullable=False),
+            sa.Column('BUILDINGCITY', sa.String(length=255), nullable=True),
+            sa.Column('BUILDINGSTATE', sa.String(length=255), nullable=True),
+            sa.Column('BUILDINGCOUNTRY', sa.String(length=255),
+                      nullable=True),
+            sa.PrimaryKeyConstraint('BUILDINGID'))
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('confirmed', sa.Boolean(), nullable=True),
+            sa.Column('first_name', sa.String(length=64), nullable=True),
+            sa.Column('last_name', sa.String(length=64), nullable=True),
+            sa.Column('email', sa.String(length=64), nullable=True),
+            sa.Column('password_hash', sa.String(length=128), nullable=True),
+            sa.Column('role_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['role_id'], ['roles.id']),
+            sa.PrimaryKeyConstraint('id'))
+        op.create_index(op.f('ix_users_email'), 'users', ['email'],
+                        unique=True)
+        op.create_index(op.f('ix_users_first_name'), 'users', ['first_name'],
+                        unique=False)
+        op.create_index(op.f('ix_users_last_name'), 'users', ['last_name'],
+                        unique=False)
+
+    if 'app' not in existing:
+        op.create_table(
+            'app',
+            sa.Column('application_id', sa.Integer(), nullable=False),
+            sa.Column('application_name', sa.String(length=32),
+                      nullable=False),
+            sa.Column('application_description', sa.String(length=200),
+                      nullable=True),
+            sa.Column('application_website', sa.String(length=128),
+                      nullable=True),
+            sa.Column('callback', sa.String(length=128), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('application_id'))
+
+    if 'client' not in existing:
+        op.create_table(
+            'client',
+            sa.Column('client_id', sa.String(length=40), nullable=False),
+            sa.Column('client_secret', sa.String(length=55), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('app_id', sa.Integer(), nullable=True),
+            sa.Column('_redirect_uris', sa.Text(), nullable=True),
+            sa.Column('_default_scopes', sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(['app_id'], ['app.application_id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('client_id'))
+
+    if 'grant' not in existing:
+        op.create_table(
+            'grant',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('client_id', sa.String(length=40), nullable=False),
+            sa.Column('code', sa.String(length=255), nullable=False),
+            sa.Column('redirect_uri', sa.String(length=255), nullable=True),
+            sa.Column('expires', sa.DateTime(), nullable=True),
+            sa.Column('_scopes', sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(['client_id'], ['client.client_id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'],
+                                    ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'))
+        op.create_index(op.f('ix_grant_code'), 'grant', ['code'],
+                        unique=False)
+
+    if 'token' not in existing:
+        op.create_table(
+            'token',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('client_id', sa.String(length=40), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('token_type', sa.String(length=40), nullable=True),
+            sa.Column('access_token', sa.String(length=255), nullable=True),
+            sa.Column('expires', sa.DateTime(), nullable=True),
+            sa.Column('_scopes', sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(['client_id'], ['client.client_id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('access_token'))
+
+
+def downgrade():
+    op.drop_table('token')
+    op.drop_index(op.f('ix_grant_code'), table_name='grant')
+    op.drop_table('grant')
+    op.drop_table('client')
+    op.drop_table('app')
+    op.drop_index(op.f('ix_users_last_name'), table_name='users')
+    op.drop_index(op.f('ix_users_first_name'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_table('BUILDING')
+    op.drop_index(op.f('ix_roles_default'), table_name='roles')
+    op.drop_table('roles')
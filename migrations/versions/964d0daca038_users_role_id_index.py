@@ -0,0 +1,24 @@
+"""users role_id index
+
+Revision ID: 964d0daca038
+Revises: 41108cc48058
+Create Date: 2026-10-19 18:06:15.849454
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '964d0daca038'
+down_revision = '41108cc48058'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_users_role_id'), 'users', ['role_id'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_users_role_id'), table_name='users')
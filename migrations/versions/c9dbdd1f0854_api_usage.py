@@ -0,0 +1,30 @@
+"""api usage
+
+Revision ID: c9dbdd1f0854
+Revises: 0da6b4994c69
+Create Date: 2026-10-19 18:09:42.474817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9dbdd1f0854'
+down_revision = '0da6b4994c69'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'api_usage',
+        sa.Column('client_id', sa.String(length=40), nullable=False),
+        sa.Column('minute', sa.DateTime(), nullable=False),
+        sa.Column('endpoint', sa.String(length=64), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('client_id', 'minute', 'endpoint'))
+
+
+def downgrade():
+    op.drop_table('api_usage')
@@ -0,0 +1,36 @@
+"""building coordinates and grid cell
+
+Revision ID: e775db917a89
+Revises: 5b167399c80f
+Create Date: 2026-10-19 17:59:19.094734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e775db917a89'
+down_revision = '5b167399c80f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('BUILDING', sa.Column('BUILDINGLATITUDE', sa.Float(),
+                                        nullable=True))
+    op.add_column('BUILDING', sa.Column('BUILDINGLONGITUDE', sa.Float(),
+                                        nullable=True))
+    # Existing buildings have no coordinates, so their cell stays NULL.
+    op.add_column('BUILDING', sa.Column('BUILDINGCELL', sa.BigInteger(),
+                                        nullable=True))
+    op.create_index(op.f('ix_BUILDING_BUILDINGCELL'), 'BUILDING',
+                    ['BUILDINGCELL'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_BUILDING_BUILDINGCELL'), table_name='BUILDING')
+    with op.batch_alter_table('BUILDING') as batch_op:
+        batch_op.drop_column('BUILDINGCELL')
+        batch_op.drop_column('BUILDINGLONGITUDE')
+        batch_op.drop_column('BUILDINGLATITUDE')
@@ -0,0 +1,41 @@
+"""building stats
+
+Revision ID: f8243a858380
+Revises: e775db917a89
+Create Date: 2026-10-19 18:01:58.739057
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8243a858380'
+down_revision = 'e775db917a89'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'BUILDINGSTATS',
+        sa.Column('BUILDINGCOUNTRY', sa.String(length=255), nullable=False),
+        sa.Column('BUILDINGSTATE', sa.String(length=255), nullable=False),
+        sa.Column('BUILDINGCITY', sa.String(length=255), nullable=False),
+        sa.Column('BUILDINGCOUNT', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('BUILDINGCOUNTRY', 'BUILDINGSTATE',
+                                'BUILDINGCITY'))
+    # Count the existing buildings, as `manage.py rebuild_building_stats`
+    # does; missing parts of the location are stored as ''.
+    op.execute(
+        'INSERT INTO "BUILDINGSTATS" ("BUILDINGCOUNTRY", "BUILDINGSTATE", '
+        '"BUILDINGCITY", "BUILDINGCOUNT") '
+        'SELECT COALESCE("BUILDINGCOUNTRY", \'\'), '
+        'COALESCE("BUILDINGSTATE", \'\'), COALESCE("BUILDINGCITY", \'\'), '
+        'COUNT(*) FROM "BUILDING" '
+        'GROUP BY COALESCE("BUILDINGCOUNTRY", \'\'), '
+        'COALESCE("BUILDINGSTATE", \'\'), COALESCE("BUILDINGCITY", \'\')')
+
+
+def downgrade():
+    op.drop_table('BUILDINGSTATS')
@@ -0,0 +1,37 @@
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.models import Client, Token
+
+# Scopes of the token ApiTestCase creates
+WRITE_SCOPES = 'building buildings buildings:write'
+
+
+def add_client_token(scopes=WRITE_SCOPES, **client_fields):
+    """Add API client ``c`` with access token ``t``, valid for an hour, to
+    the session."""
+    db.session.add(Client(client_id='c', client_secret='s', **client_fields))
+    db.session.add(Token(client_id='c', access_token='t', token_type='Bearer',
+                         _scopes=scopes,
+                         expires=datetime.utcnow() + timedelta(hours=1)))
+
+
+class ApiTestCase(unittest.TestCase):
+    """A testing app with its tables created and ``scopes`` granted to
+    access token ``t``."""
+
+    scopes = WRITE_SCOPES
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            add_client_token(self.scopes)
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
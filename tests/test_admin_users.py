@@ -0,0 +1,158 @@
+import re
+import unittest
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import Role, User
+from app.pagination import decode_cursor, encode_cursor, keyset_page
+
+LAST_NAMES = ['Adams', 'Baker', 'Clark', 'Davis', 'Evans', 'Baker', None,
+              'Garcia', 'Hill', 'Irwin', 'Jones']
+
+
+class AdminUsersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['ADMIN_USERS_PER_PAGE'] = 4
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        Role.insert_roles()
+        admin = Role.query.filter_by(name='Administrator').first()
+        user = Role.query.filter_by(name='User').first()
+        db.session.add(User(first_name='Ad', last_name='Min',
+                            email='admin@example.com', password='pw',
+                            confirmed=True, role=admin))
+        for i, last_name in enumerate(LAST_NAMES):
+            db.session.add(User(first_name='First{}'.format(i),
+                                last_name=last_name,
+                                email='user{}@example.com'.format(i),
+                                role=user))
+        db.session.commit()
+        self.client.post('/account/login', data={
+            'email': 'admin@example.com', 'password': 'pw'})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def last_names(self, descending):
+        order = [User.last_name.desc(), User.id.desc()] if descending else \
+            [User.last_name, User.id]
+        return [u.last_name for u in User.query.order_by(*order)]
+
+    def walk(self, descending=False):
+        """Every page forwards, then back again from the last."""
+        pages, after = [], None
+        while True:
+            items, previous, next = keyset_page(
+                User.query, User.last_name, User.id, 4, descending,
+                after=after)
+            pages.append(items)
+            if next is None:
+                break
+            after = decode_cursor(next)
+        back, before = [pages[-1]], decode_cursor(previous)
+        while before is not None:
+            items, previous, _ = keyset_page(
+                User.query, User.last_name, User.id, 4, descending,
+                before=before)
+            back.insert(0, items)
+            before = previous and decode_cursor(previous)
+        return pages, back
+
+    def test_keyset_pages_cover_every_row_once(self):
+        for descending in (False, True):
+            pages, back = self.walk(descending)
+            names = [u.last_name for page in pages for u in page]
+            self.assertEqual(names, self.last_names(descending=descending))
+            self.assertEqual([len(page) for page in pages], [4, 4, 4])
+            self.assertEqual(back, pages)
+
+    def test_invalid_cursor(self):
+        self.assertIsNone(decode_cursor('not a cursor'))
+        self.assertEqual(decode_cursor(encode_cursor('Baker', 3)),
+                         ('Baker', 3))
+
+    def get_page(self, path='/admin/users', **args):
+        statements = []
+
+        def count(conn, cursor, statement, *rest):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            response = self.client.get(path, query_string=args)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+        self.assertEqual(response.status_code, 200)
+        return response.get_data(as_text=True), statements
+
+    def emails(self, html):
+        return re.findall(r'<td>(\S+@example\.com)</td>', html)
+
+    def test_roles_loaded_with_the_page(self):
+        html, statements = self.get_page()
+        self.assertEqual(len(self.emails(html)), 4)
+        self.assertNotIn('No users found', html)
+        page_query = [s for s in statements if 'LIMIT' in s]
+        self.assertEqual(len(page_query), 1)
+        self.assertIn('LEFT OUTER JOIN roles', page_query[0])
+        # A bigger page costs no extra statements (measured after the
+        # first request, which also loads the logged in user).
+        _, statements = self.get_page()
+        self.app.config['ADMIN_USERS_PER_PAGE'] = 20
+        html, more_statements = self.get_page()
+        self.assertEqual(len(self.emails(html)), 12)
+        self.assertEqual(len(more_statements), len(statements))
+
+    def test_next_link_follows_on(self):
+        html, _ = self.get_page(sort='email')
+        first = self.emails(html)
+        url = re.search(r'href="([^"]*after=[^"]*)"', html).group(1)
+        response = self.client.get(url.replace('&amp;', '&'))
+        second = self.emails(response.get_data(as_text=True))
+        self.assertEqual(first + second, sorted(
+            u.email for u in User.query)[:8])
+
+    def test_search_and_role_filter(self):
+        html, _ = self.get_page(q='baker')
+        self.assertEqual(len(self.emails(html)), 2)
+        html, _ = self.get_page(q='USER1')
+        self.assertEqual(sorted(self.emails(html)),
+                         ['user10@example.com', 'user1@example.com'])
+        admin = Role.query.filter_by(name='Administrator').first()
+        html, _ = self.get_page(role=admin.id)
+        self.assertEqual(self.emails(html), ['admin@example.com'])
+        html, _ = self.get_page(q='nobody')
+        self.assertIn('No users found', html)
+
+    def test_sort_descending(self):
+        html, _ = self.get_page(sort='email', order='desc')
+        self.assertEqual(self.emails(html), sorted(
+            (u.email for u in User.query), reverse=True)[:4])
+
+    def test_nav_rendered_without_loading_role(self):
+        # Start from an empty session, as a real request would.
+        db.session.remove()
+        html, statements = self.get_page('/')
+        self.assertIn('href="/admin/"', html)
+        self.assertIn('Administrator Dashboard', html)
+        self.assertFalse([s for s in statements if 'FROM roles' in s])
+
+    def test_change_account_type_updates_permissions(self):
+        admin = Role.query.filter_by(name='Administrator').first()
+        user = User.query.filter_by(email='user0@example.com').first()
+        self.assertFalse(user.is_admin())
+        response = self.client.post(
+            '/admin/user/{}/change-account-type'.format(user.id),
+            data={'role': admin.id})
+        self.assertEqual(response.status_code, 200)
+        db.session.remove()
+        self.assertEqual(db.engine.execute(
+            'SELECT permissions FROM users WHERE id = ?', user.id).scalar(),
+            admin.permissions)
+        self.assertTrue(User.query.get(user.id).is_admin())
@@ -0,0 +1,51 @@
+import gzip
+import json
+import unittest
+from unittest import mock
+
+from flasgger import Swagger
+
+from app import create_app
+from app.api_spec import spec_json
+
+
+class ApiSpecTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+
+    def test_spec_built_once(self):
+        with mock.patch.object(Swagger, 'get_apispecs',
+                               autospec=True,
+                               side_effect=Swagger.get_apispecs) as built:
+            for _ in range(3):
+                response = self.client.get('/apispec_1.json')
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(built.call_count, 1)
+        self.assertIn('/v1/buildings', response.get_json()['paths'])
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get('/apispec_1.json')
+        etag = response.headers['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        self.assertIn('public', response.headers['Cache-Control'])
+        self.assertIn('max-age=300', response.headers['Cache-Control'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+
+        response = self.client.get('/apispec_1.json',
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+    def test_compressed_variant(self):
+        plain = self.client.get('/apispec_1.json')
+        response = self.client.get('/apispec_1.json',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotEqual(response.headers['ETag'], plain.headers['ETag'])
+        self.assertEqual(json.loads(gzip.decompress(response.data)),
+                         plain.get_json())
+
+    def test_dump_matches_served_spec(self):
+        served = self.client.get('/apispec_1.json').data
+        self.assertEqual(spec_json(self.app), served)
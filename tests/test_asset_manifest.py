@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from webassets import Bundle
+
+from app import create_app
+from app.assets import app_css
+from app.asset_manifest import build_assets
+from app.static_files import HASHED_NAME
+
+
+class AssetManifestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.manifest_file = os.path.join(self.directory, 'manifest.json')
+        # The sass program may not be installed where the tests run.
+        self.addCleanup(setattr, app_css, 'filters', app_css.filters)
+        app_css.filters = ()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_app(self, use_manifest):
+        with mock.patch.multiple('config.TestingConfig',
+                                 USE_ASSET_MANIFEST=use_manifest,
+                                 ASSET_MANIFEST_FILE=self.manifest_file):
+            app = create_app('testing')
+        env = app.jinja_env.assets_environment
+        # Build into the temporary directory, not app/static.
+        env.directory = self.directory
+        cache = os.path.join(self.directory, '.webassets-cache')
+        os.makedirs(cache, exist_ok=True)
+        env.cache = cache
+        return app
+
+    def test_build_writes_hashed_files_and_manifest(self):
+        manifest = build_assets(self.make_app(False))
+        self.assertEqual(sorted(manifest),
+                         ['app_css', 'app_js', 'vendor_css', 'vendor_js'])
+        for path in manifest.values():
+            self.assertTrue(HASHED_NAME.search(path), path)
+            self.assertTrue(os.path.exists(
+                os.path.join(self.directory, path)))
+        with open(self.manifest_file) as f:
+            self.assertEqual(json.load(f), manifest)
+        self.assertEqual(build_assets(self.make_app(False)), manifest)
+
+    def test_urls_from_manifest_without_webassets(self):
+        manifest = build_assets(self.make_app(False))
+        app = self.make_app(True)
+        self.assertFalse(app.jinja_env.assets_environment.auto_build)
+        with mock.patch.object(Bundle, 'urls', side_effect=AssertionError):
+            html = app.test_client().get('/account/login').get_data(
+                as_text=True)
+        self.assertIn('href="/static/{}"'.format(manifest['app_css']), html)
+        self.assertIn('src="/static/{}"'.format(manifest['vendor_js']), html)
+
+    def test_missing_manifest_falls_back_to_webassets(self):
+        app = self.make_app(True)
+        self.assertIsNone(app.extensions['asset_manifest'])
+        with app.test_request_context():
+            urls = app.jinja_env.globals['asset_urls']('app_js')
+        self.assertTrue(urls[0].startswith('/static/scripts/app.js'))
+
+    def test_tests_do_not_build_into_static(self):
+        app = create_app('testing')
+        env = app.jinja_env.assets_environment
+        self.assertNotEqual(env.directory, app.static_folder)
+        self.assertFalse(env.auto_build)
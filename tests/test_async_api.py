@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+from app import db
+from app.models import Client, Token
+from app.models.building import BuildingModel
+
+try:
+    from starlette.testclient import TestClient
+    from app.async_api import create_async_app
+except ImportError:  # the async service is optional
+    TestClient = None
+
+
+@unittest.skipIf(TestClient is None, 'requirements-async.txt not installed')
+class AsyncApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        url = 'sqlite:///' + os.path.join(self.workdir, 'data.sqlite')
+        engine = create_engine(url)
+        db.Model.metadata.create_all(engine)
+        engine.execute(BuildingModel.__table__.insert(), BUILDINGID=1,
+                       BUILDINGNAME='Building 1', BUILDINGCITY='Boston')
+        engine.execute(Client.__table__.insert(), client_id='c',
+                       client_secret='s')
+        for access_token, scopes, expires in (
+                ('valid', 'building buildings', timedelta(hours=1)),
+                ('expired', 'building buildings', timedelta(hours=-1)),
+                ('list-only', 'buildings', timedelta(hours=1))):
+            engine.execute(Token.__table__.insert(), client_id='c',
+                           access_token=access_token, token_type='Bearer',
+                           _scopes=scopes, expires=datetime.utcnow() + expires)
+        engine.dispose()
+        self.client = TestClient(create_async_app('testing', url))
+        self.client.__enter__()
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+        shutil.rmtree(self.workdir)
+
+    def test_get_building(self):
+        response = self.client.get('/v1/buildings/1?access_token=valid')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['BUILDINGNAME'], 'Building 1')
+        self.assertEqual(
+            self.client.get('/v1/buildings/2?access_token=valid').status_code,
+            404)
+
+    def test_list_with_bearer_header(self):
+        response = self.client.get(
+            '/v1/buildings', headers={'Authorization': 'Bearer list-only'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([b['BUILDINGID'] for b in response.json()], [1])
+
+    def test_token_validation(self):
+        for token in ('missing', 'expired', 'list-only'):
+            response = self.client.get(
+                '/v1/buildings/1?access_token={}'.format(token))
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get('/v1/buildings/1').status_code, 401)
@@ -0,0 +1,74 @@
+import io
+import json
+
+from app import db
+from app.building_changes import UPSERT, record_change
+from app.bulk_import import import_buildings, read_records
+from app.models.building import BuildingChangeModel, BuildingModel
+
+from api_base import ApiTestCase
+
+
+class BuildingChangesTestCase(ApiTestCase):
+    def send(self, method, path, body=None):
+        response = self.client.open(
+            path + '?access_token=t', method=method,
+            data=json.dumps(body) if body else None,
+            content_type='application/json')
+        self.assertIn(response.status_code, (200, 204))
+
+    def changes(self, since, limit=100, status=200):
+        response = self.client.get('/v1/buildings/changes', query_string={
+            'since': since, 'limit': limit, 'access_token': 't'})
+        self.assertEqual(response.status_code, status)
+        return json.loads(response.data.decode())
+
+    def sync(self, since=0, limit=2):
+        """Page through the feed like a client, returning the changes."""
+        changes = []
+        while True:
+            page = self.changes(since, limit)
+            changes.extend(page['changes'])
+            since = page['cursor']
+            if not page['has_more']:
+                return changes, since
+
+    def test_handlers_log_changes_and_tombstones(self):
+        self.send('POST', '/v1/buildings', {'BUILDINGNAME': 'One'})
+        self.send('POST', '/v1/buildings', {'BUILDINGNAME': 'Two'})
+        self.send('PATCH', '/v1/buildings/1', {'BUILDINGCITY': 'Salem'})
+        self.send('DELETE', '/v1/buildings/2')
+        changes, cursor = self.sync()
+        self.assertEqual(
+            [(c['BUILDINGID'], c['OPERATION']) for c in changes],
+            [(1, 'upsert'), (2, 'upsert'), (1, 'upsert'), (2, 'delete')])
+        self.assertEqual(changes[0]['building']['BUILDINGCITY'], 'Salem')
+        self.assertIsNone(changes[1]['building'])
+        self.assertIsNone(changes[3]['building'])
+
+        self.send('PUT', '/v1/buildings/1', {'BUILDINGNAME': 'Uno'})
+        changes, _ = self.sync(cursor)
+        self.assertEqual([c['building']['BUILDINGNAME'] for c in changes],
+                         ['Uno'])
+        self.assertEqual(self.changes(cursor + 1),
+                         {'changes': [], 'cursor': cursor + 1,
+                          'has_more': False})
+
+    def test_change_of_unflushed_building(self):
+        with self.app.app_context():
+            building = BuildingModel(BUILDINGNAME='New')
+            db.session.add(building)
+            record_change(building, UPSERT)
+            db.session.commit()
+            change = BuildingChangeModel.query.one()
+            self.assertEqual(change.BUILDINGID, building.BUILDINGID)
+
+    def test_settle_window_and_bulk_import(self):
+        with self.app.app_context():
+            import_buildings(db.engine, read_records(io.StringIO(
+                'BUILDINGNAME\nA\nB\n'), 'csv'))
+        self.assertEqual(len(self.sync()[0]), 2)
+        self.app.config['CHANGES_SETTLE_SECONDS'] = 60
+        self.assertEqual(self.changes(0)['changes'], [])
+        self.changes(-1, status=400)
+        self.changes(0, limit=5000, status=400)
@@ -0,0 +1,63 @@
+import json
+
+from app import db
+from app.building_stats import rebuild_building_stats
+from app.models.building import BuildingModel, BuildingStatsModel
+
+from api_base import ApiTestCase
+
+
+class BuildingStatsTestCase(ApiTestCase):
+    def send(self, method, path, body=None):
+        response = self.client.open(
+            path + '?access_token=t', method=method,
+            data=json.dumps(body) if body else None,
+            content_type='application/json')
+        self.assertIn(response.status_code, (200, 204))
+
+    def groups(self, group_by):
+        response = self.client.get('/v1/buildings/stats', query_string={
+            'group_by': group_by, 'access_token': 't'})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data.decode())['groups']
+
+    def create(self, city, state, country):
+        self.send('POST', '/v1/buildings', {
+            'BUILDINGNAME': 'B', 'BUILDINGCITY': city,
+            'BUILDINGSTATE': state, 'BUILDINGCOUNTRY': country})
+
+    def test_write_handlers_maintain_counts(self):
+        self.create('Boston', 'MA', 'US')
+        self.create('Boston', 'MA', 'US')
+        self.create('Salem', 'MA', 'US')
+        self.create('London', None, 'UK')
+        self.assertEqual(self.groups('country'), [
+            {'BUILDINGCOUNTRY': 'US', 'count': 3},
+            {'BUILDINGCOUNTRY': 'UK', 'count': 1}])
+
+        self.send('PATCH', '/v1/buildings/1', {'BUILDINGCITY': 'Salem'})
+        self.send('PUT', '/v1/buildings/2', {
+            'BUILDINGNAME': 'B', 'BUILDINGCITY': 'Albany',
+            'BUILDINGSTATE': 'NY', 'BUILDINGCOUNTRY': 'US'})
+        self.send('DELETE', '/v1/buildings/4')
+        self.assertEqual(
+            sorted((g['BUILDINGSTATE'], g['BUILDINGCITY'], g['count'])
+                   for g in self.groups('city')),
+            [('MA', 'Salem', 2), ('NY', 'Albany', 1)])
+
+        with self.app.app_context():
+            before = sorted(self.groups('city'), key=repr)
+            self.assertEqual(rebuild_building_stats(), 2)
+            self.assertEqual(BuildingStatsModel.query.count(), 2)
+        self.assertEqual(sorted(self.groups('city'), key=repr), before)
+
+    def test_missing_location_and_bad_group(self):
+        with self.app.app_context():
+            db.session.add(BuildingModel(BUILDINGNAME='Nowhere'))
+            db.session.commit()
+            rebuild_building_stats()
+        self.assertEqual(self.groups('state'), [
+            {'BUILDINGCOUNTRY': None, 'BUILDINGSTATE': None, 'count': 1}])
+        response = self.client.get(
+            '/v1/buildings/stats?group_by=street&access_token=t')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,68 @@
+import io
+import unittest
+
+from app import create_app, db
+from app.building_stats import building_stats
+from app.bulk_import import import_buildings, read_records
+from app.geo import grid_cell
+from app.models.building import BuildingModel
+
+CSV = '''BUILDINGNAME,BUILDINGCITY,BUILDINGSTATE,BUILDINGCOUNTRY,BUILDINGLATITUDE,BUILDINGLONGITUDE
+One,Boston,MA,US,42.36,-71.06
+Two,Boston,MA,US,,
+,Boston,MA,US,,
+Four,Salem,MA,US,100,0
+Five,Salem,MA,US,42.52,-70.9
+'''
+
+NDJSON = '''{"BUILDINGID": 50, "BUILDINGNAME": "Six", "BUILDINGCOUNTRY": "UK"}
+not json
+
+{"BUILDINGID": 51, "BUILDINGNAME": "Seven", "BUILDINGCOUNTRY": "UK"}
+'''
+
+
+class BulkImportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def load(self, text, format, **kwargs):
+        rejects = []
+        chunks = []
+        result = import_buildings(
+            db.engine, read_records(io.StringIO(text), format),
+            on_chunk=lambda *totals: chunks.append(totals),
+            on_reject=lambda line, errors, record: rejects.append(
+                (line, sorted(errors))), **kwargs)
+        return result, chunks, rejects
+
+    def test_csv_in_chunks(self):
+        result, chunks, rejects = self.load(CSV, 'csv', chunk_size=2)
+        self.assertEqual(result, (3, 2))
+        self.assertEqual(chunks, [(2, 0), (2, 2), (3, 2)])
+        self.assertEqual(rejects, [(4, ['BUILDINGNAME']),
+                                   (5, ['BUILDINGLATITUDE'])])
+        one = BuildingModel.query.filter_by(BUILDINGNAME='One').one()
+        self.assertEqual(one.BUILDINGCELL, grid_cell(42.36, -71.06))
+        self.assertIsNone(BuildingModel.query.filter_by(
+            BUILDINGNAME='Two').one().BUILDINGLATITUDE)
+        self.assertEqual(building_stats('city'), [
+            (('US', 'MA', 'Boston'), 2), (('US', 'MA', 'Salem'), 1)])
+
+    def test_ndjson_with_ids_and_workers(self):
+        result, _, rejects = self.load(NDJSON, 'ndjson', chunk_size=1,
+                                       keep_ids=True, workers=2)
+        self.assertEqual(result, (2, 1))
+        self.assertEqual(rejects, [(2, ['_schema'])])
+        self.assertEqual(
+            [b.BUILDINGID for b in BuildingModel.query.order_by('BUILDINGID')],
+            [50, 51])
+        self.assertEqual(building_stats('country'), [(('UK',), 2)])
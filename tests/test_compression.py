@@ -0,0 +1,64 @@
+import gzip
+import json
+import unittest
+import zlib
+
+from flask import Response, jsonify
+
+from app import create_app
+from app.compression import choose_level, compress_api_response
+
+
+class ApiCompressionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.config = self.app.config
+
+    def compress(self, response, accept='gzip'):
+        with self.app.test_request_context(
+                '/v1/buildings', headers={'Accept-Encoding': accept}):
+            return compress_api_response(response, self.config)
+
+    def buildings(self, count):
+        return [{'BUILDINGID': i, 'BUILDINGNAME': 'Building {}'.format(i)}
+                for i in range(count)]
+
+    def test_choose_level_by_size(self):
+        levels = [(100, 6), (1000, 4), (None, 1)]
+        self.assertEqual(choose_level(10, levels), 6)
+        self.assertEqual(choose_level(500, levels), 4)
+        self.assertEqual(choose_level(5000, levels), 1)
+        self.assertEqual(choose_level(None, levels), 1)
+
+    def test_small_response_is_not_compressed(self):
+        with self.app.test_request_context():
+            response = jsonify(self.buildings(1))
+        response = self.compress(response)
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_large_response_is_compressed(self):
+        with self.app.test_request_context():
+            response = jsonify(self.buildings(1000))
+        response = self.compress(response, accept='gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        body = json.loads(gzip.decompress(response.get_data()).decode())
+        self.assertEqual(len(body), 1000)
+
+    def test_no_acceptable_encoding(self):
+        with self.app.test_request_context():
+            response = jsonify(self.buildings(1000))
+        response = self.compress(response, accept='identity')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_streamed_response_is_compressed_per_chunk(self):
+        def generate():
+            for i in range(100):
+                yield json.dumps(self.buildings(10)) + '\n'
+
+        response = Response(generate(), mimetype='application/json')
+        response = self.compress(response, accept='gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        chunks = list(response.response)
+        self.assertGreater(len(chunks), 1)
+        body = zlib.decompress(b''.join(chunks), 31).decode()
+        self.assertEqual(len(body.splitlines()), 100)
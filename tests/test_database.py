@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+
+from app import create_app, db
+
+
+class DatabaseEngineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI='sqlite:///' +
+            os.path.join(self.workdir, 'engine.sqlite'),
+            SQLALCHEMY_POOL_SIZE=3,
+            SQLALCHEMY_MAX_OVERFLOW=2,
+            SQLALCHEMY_POOL_TIMEOUT=7)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.get_engine().dispose()
+        self.app_context.pop()
+        shutil.rmtree(self.workdir)
+
+    def pragma(self, name):
+        return db.engine.execute('PRAGMA {}'.format(name)).scalar()
+
+    def test_sqlite_pragmas_applied(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        # NORMAL
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+
+    def test_configured_synchronous_level(self):
+        self.app.config['SQLALCHEMY_SQLITE_PRAGMAS'] = {'synchronous': 'FULL'}
+        self.assertEqual(self.pragma('synchronous'), 2)
+
+    def test_file_sqlite_uses_configured_queue_pool(self):
+        pool = db.engine.pool
+        self.assertIsInstance(pool, QueuePool)
+        self.assertEqual(pool.size(), 3)
+        self.assertEqual(pool._max_overflow, 2)
+        self.assertEqual(pool._timeout, 7)
+        # The pragmas hold on every pooled connection.
+        connections = [db.engine.connect() for _ in range(3)]
+        try:
+            self.assertEqual(
+                [c.execute('PRAGMA journal_mode').scalar()
+                 for c in connections], ['wal'] * 3)
+        finally:
+            for connection in connections:
+                connection.close()
+
+    def test_postgres_statement_timeout(self):
+        self.app.config['SQLALCHEMY_STATEMENT_TIMEOUT'] = 1234
+        options = {}
+        db.apply_driver_hacks(self.app, make_url('postgresql://u@h/d'),
+                              options)
+        self.assertEqual(options['connect_args']['options'],
+                         '-c statement_timeout=1234')
+        self.assertTrue(options['pool_pre_ping'])
@@ -0,0 +1,72 @@
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from app import db
+from app.export import export_rows, pyarrow, write_parquet
+from app.models.building import BuildingModel
+
+from api_base import ApiTestCase
+
+
+class ExportTestCase(ApiTestCase):
+    scopes = 'buildings'
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['EXPORT_BATCH_SIZE'] = 2
+        with self.app.app_context():
+            db.session.add_all([
+                BuildingModel(BUILDINGNAME='Building {}'.format(i),
+                              BUILDINGCITY='Boston, MA' if i % 2 else None,
+                              BUILDINGLATITUDE=42.0 + i / 100.0,
+                              BUILDINGLONGITUDE=-71.0)
+                for i in range(5)])
+            db.session.commit()
+
+    def export(self, **args):
+        response = self.client.get('/v1/buildings/export', query_string=dict(
+            args, access_token='t'), headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        return gzip.decompress(response.data).decode()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertEqual([row['BUILDINGID'] for row in rows],
+                         ['1', '2', '3', '4', '5'])
+        self.assertEqual(rows[1]['BUILDINGCITY'], 'Boston, MA')
+        self.assertNotIn('BUILDINGCELL', rows[0])
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in
+                self.export(format='ndjson').splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['BUILDINGLATITUDE'], 42.0)
+        self.assertIsNone(rows[0]['BUILDINGCITY'])
+
+    def test_invalid_format(self):
+        response = self.client.get(
+            '/v1/buildings/export?format=xml&access_token=t')
+        self.assertEqual(response.status_code, 400)
+
+    @unittest.skipIf(pyarrow is None, 'requirements-parquet.txt not installed')
+    def test_parquet_row_groups(self):
+        import pyarrow.parquet
+        workdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(workdir, 'buildings.parquet')
+            with self.app.app_context():
+                write_parquet(export_rows(2), path, 2)
+            parquet = pyarrow.parquet.ParquetFile(path)
+            self.assertEqual(parquet.num_row_groups, 3)
+            table = parquet.read().to_pydict()
+            self.assertEqual(list(table['BUILDINGID']), [1, 2, 3, 4, 5])
+        finally:
+            shutil.rmtree(workdir)
@@ -0,0 +1,130 @@
+import json
+import unittest
+
+from app import db
+from app.geo import (COLUMNS, bounding_box, cell_ranges, grid_cell,
+                     haversine_km, nearest)
+from app.models.building import BuildingModel
+
+from api_base import ApiTestCase
+
+
+class GridTestCase(unittest.TestCase):
+    def test_cell_ranges_cover_box(self):
+        ranges = cell_ranges(42.0, -71.5, 42.02, -71.4)
+        self.assertEqual(len(ranges), 3)
+        for lat, lon in ((42.0, -71.5), (42.015, -71.45), (42.02, -71.4)):
+            cell = grid_cell(lat, lon)
+            self.assertTrue(any(a <= cell <= b for a, b in ranges))
+
+    def test_antimeridian(self):
+        ranges = cell_ranges(0.0, 179.99, 0.0, -179.99)
+        self.assertEqual(ranges, sorted(ranges))
+        self.assertEqual(len(ranges), 2)
+        # One range at each end of the row, not the whole row between them.
+        self.assertEqual(ranges[0][0] % COLUMNS, 0)
+        self.assertEqual(ranges[1][1] % COLUMNS, COLUMNS - 1)
+        self.assertLessEqual(ranges[0][1] - ranges[0][0], 1)
+        self.assertLessEqual(ranges[1][1] - ranges[1][0], 1)
+
+        min_lat, min_lon, max_lat, max_lon = bounding_box(0.0, 179.999, 5)
+        self.assertGreater(min_lon, max_lon)
+        self.assertEqual(bounding_box(89.99, 0.0, 5)[1::2], (-180.0, 180.0))
+
+    def test_haversine(self):
+        # Boston to New York is about 306 km.
+        self.assertAlmostEqual(
+            haversine_km(42.3601, -71.0589, 40.7128, -74.0060), 306, delta=2)
+
+
+class GeoApiTestCase(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.app.app_context():
+            db.session.add_all([
+                BuildingModel(BUILDINGNAME='Downtown', BUILDINGLATITUDE=42.3601,
+                              BUILDINGLONGITUDE=-71.0589),
+                BuildingModel(BUILDINGNAME='Back Bay', BUILDINGLATITUDE=42.3503,
+                              BUILDINGLONGITUDE=-71.0810),
+                BuildingModel(BUILDINGNAME='Manhattan',
+                              BUILDINGLATITUDE=40.7128,
+                              BUILDINGLONGITUDE=-74.0060),
+                BuildingModel(BUILDINGNAME='Suva', BUILDINGLATITUDE=-18.1,
+                              BUILDINGLONGITUDE=179.95),
+                BuildingModel(BUILDINGNAME='Taveuni', BUILDINGLATITUDE=-18.1,
+                              BUILDINGLONGITUDE=-179.95),
+                BuildingModel(BUILDINGNAME='Nowhere')])
+            db.session.commit()
+
+    def get(self, path, status=200, **args):
+        response = self.client.get(path, query_string=dict(
+            args, access_token='t'))
+        self.assertEqual(response.status_code, status)
+        return json.loads(response.data.decode())
+
+    def names(self, path, **args):
+        return [b['BUILDINGNAME'] for b in self.get(path, **args)['buildings']]
+
+    def test_cell_is_kept_current(self):
+        with self.app.app_context():
+            building = BuildingModel.query.get(3)
+            self.assertEqual(building.BUILDINGCELL, grid_cell(40.7128, -74.006))
+            building.BUILDINGLATITUDE = 42.36
+            db.session.commit()
+            self.assertEqual(building.BUILDINGCELL, grid_cell(42.36, -74.006))
+            self.assertIsNone(BuildingModel.query.get(6).BUILDINGCELL)
+
+    def test_near(self):
+        result = self.get('/v1/buildings/near', lat=42.3601, lon=-71.0589,
+                          radius=5)
+        self.assertEqual([b['BUILDINGNAME'] for b in result['buildings']],
+                         ['Downtown', 'Back Bay'])
+        self.assertEqual(result['buildings'][0]['DISTANCE_KM'], 0)
+        self.assertNotIn('BUILDINGCELL', result['buildings'][0])
+        self.assertEqual(self.names('/v1/buildings/near', lat=42.3601,
+                                    lon=-71.0589, radius=5, limit=1),
+                         ['Downtown'])
+        self.assertEqual(self.names('/v1/buildings/near', lat=-18.1,
+                                    lon=179.99, radius=20),
+                         ['Suva', 'Taveuni'])
+
+    def test_nearest_reads_rings_outward(self):
+        with self.app.app_context():
+            # Ten buildings within about 100 m of Downtown (id 1)
+            db.session.add_all([BuildingModel(
+                BUILDINGNAME='Close {}'.format(i),
+                BUILDINGLATITUDE=42.3601 + i * 0.0001,
+                BUILDINGLONGITUDE=-71.0589) for i in range(1, 11)])
+            db.session.commit()
+            args = (db.session, BuildingModel, 42.3601, -71.0589, 5)
+            # Found in the first ring
+            close = nearest(*args, limit=3, max_candidates=5000)
+            self.assertEqual([i for _, i in close], [1, 7, 8])
+            # Back Bay (id 2), about 2 km away, is only in the last ring.
+            self.assertEqual(
+                [i for _, i in nearest(*args, limit=20, max_candidates=5000)],
+                [1] + list(range(7, 17)) + [2])
+            distances = [d for d, _ in nearest(*args, limit=20,
+                                               max_candidates=5000)]
+            self.assertEqual(distances, sorted(distances))
+            # The database returns at most max_candidates rows a ring.
+            self.assertEqual(
+                len(nearest(*args, limit=20, max_candidates=4)), 4)
+
+    def test_within(self):
+        self.assertEqual(self.names('/v1/buildings/within', min_lat=42,
+                                    min_lon=-72, max_lat=43, max_lon=-71),
+                         ['Downtown', 'Back Bay'])
+        self.assertEqual(self.names('/v1/buildings/within', min_lat=-19,
+                                    min_lon=179.5, max_lat=-18,
+                                    max_lon=-179.5),
+                         ['Suva', 'Taveuni'])
+
+    def test_invalid_requests(self):
+        self.get('/v1/buildings/near', 400, lat=42)
+        self.get('/v1/buildings/near', 400, lat=91, lon=0)
+        self.get('/v1/buildings/near', 400, lat=42, lon=-71, radius=500)
+        self.get('/v1/buildings/within', 400, min_lat=43, min_lon=-72,
+                 max_lat=42, max_lon=-71)
+        self.get('/v1/buildings/within', 400, min_lat=0, min_lon=0,
+                 max_lat=10, max_lon=10)
@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+from unittest import mock
+
+from app.models import IdempotencyKey
+from app.models.building import BuildingModel
+
+from api_base import ApiTestCase
+
+BODY = {'BUILDINGNAME': 'Harbour Tower', 'BUILDINGCITY': 'Boston'}
+
+
+class IdempotencyTestCase(ApiTestCase):
+    def post(self, body=BODY, key='retry-1'):
+        headers = {'Idempotency-Key': key} if key else {}
+        return self.app.test_client().post(
+            '/v1/buildings?access_token=t', data=json.dumps(body),
+            content_type='application/json', headers=headers)
+
+    def building_count(self):
+        with self.app.app_context():
+            return BuildingModel.query.count()
+
+    def test_retry_replays_first_response(self):
+        first = self.post()
+        retry = self.post()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.building_count(), 1)
+
+        self.assertEqual(self.post(dict(BODY, BUILDINGCITY='Salem'))
+                         .status_code, 422)
+        self.post(key=None)
+        self.post(key=None)
+        self.assertEqual(self.building_count(), 3)
+
+    def test_concurrent_retries_insert_once(self):
+        start = threading.Barrier(8)
+        responses = []
+
+        def retry():
+            start.wait()
+            responses.append(self.post())
+
+        # Hold the first request open after its insert, as a slow server
+        # would while the client times out and retries.
+        with mock.patch('app.api.v1.building.index_buildings',
+                        side_effect=lambda *args: time.sleep(0.5)):
+            threads = [threading.Thread(target=retry) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        statuses = sorted(r.status_code for r in responses)
+        self.assertEqual(statuses.count(200), 1, statuses)
+        self.assertEqual(set(statuses), {200, 409})
+        self.assertEqual(self.building_count(), 1)
+        created = next(r for r in responses if r.status_code == 200)
+        self.assertEqual(self.post().data, created.data)
+
+    def test_failed_request_releases_key(self):
+        with mock.patch('app.api.v1.building.count_building',
+                        side_effect=RuntimeError):
+            # Testing propagates the exception instead of returning 500.
+            self.assertRaises(RuntimeError, self.post)
+        with self.app.app_context():
+            self.assertEqual(IdempotencyKey.query.count(), 0)
+        self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(self.building_count(), 1)
@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, inspect
+
+from app import create_app, db
+from app.index_advisor import (advise, copy_sqlite_database, load_workload,
+                               proposed_columns, scanned_tables)
+from app.models.building import BuildingModel
+
+CITY_QUERY = 'SELECT "BUILDING"."BUILDINGID" FROM "BUILDING" ' \
+    'WHERE "BUILDING"."BUILDINGCITY" = ? ORDER BY "BUILDING"."BUILDINGNAME"'
+
+
+class IndexAdvisorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + \
+            os.path.join(self.workdir, 'data.sqlite')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.engine.execute(BuildingModel.__table__.insert(), [
+            {'BUILDINGNAME': 'B{}'.format(i),
+             'BUILDINGCITY': 'City {}'.format(i % 50)}
+            for i in range(2000)])
+        self.workload = os.path.join(self.workdir, 'slow.log')
+        with open(self.workload, 'w') as f:
+            for city in ('City 1', 'City 1', 'City 2'):
+                f.write(json.dumps({'statement': CITY_QUERY,
+                                    'parameters': [city],
+                                    'plan': ['SCAN BUILDING']}) + '\n')
+            f.write(json.dumps({'statement': 'CREATE TABLE x (y INTEGER)',
+                                'parameters': [], 'plan': None}) + '\n')
+
+    def tearDown(self):
+        db.session.remove()
+        db.get_engine().dispose()
+        self.app_context.pop()
+        shutil.rmtree(self.workdir)
+
+    def test_load_workload_groups_statements(self):
+        self.assertEqual(load_workload(self.workload), [
+            (CITY_QUERY, ['City 1'], 2), (CITY_QUERY, ['City 2'], 1)])
+
+    def test_entries_without_parameters(self):
+        # As logged with SLOW_QUERY_LOG_PARAMETERS off
+        count_query = 'SELECT count(*) FROM "BUILDING"'
+        with open(self.workload, 'w') as f:
+            for statement in (CITY_QUERY, CITY_QUERY, count_query):
+                f.write(json.dumps({'statement': statement,
+                                    'plan': ['SCAN BUILDING']}) + '\n')
+        skipped = []
+        workload = load_workload(self.workload, skipped)
+        self.assertEqual(workload, [(count_query, (), 1)])
+        self.assertEqual(skipped, [CITY_QUERY])
+        path = os.path.join(self.workdir, 'copy.sqlite')
+        copy_sqlite_database(db.engine, path)
+        engine = create_engine('sqlite:///' + path)
+        try:
+            self.assertEqual(advise(engine, workload, repeat=1), [])
+        finally:
+            engine.dispose()
+
+    def test_plan_and_statement_parsing(self):
+        self.assertEqual(
+            scanned_tables(['SCAN TABLE token', 'SEARCH users USING INDEX x',
+                            'Seq Scan on client  (cost=0.00..1.01 rows=1)']),
+            {'token', 'client'})
+        self.assertEqual(
+            proposed_columns(CITY_QUERY, 'BUILDING',
+                             ['BUILDINGID', 'BUILDINGNAME', 'BUILDINGCITY']),
+            ['BUILDINGCITY', 'BUILDINGNAME'])
+
+    def test_advise_builds_indexes_on_copy(self):
+        path = os.path.join(self.workdir, 'copy.sqlite')
+        copy_sqlite_database(db.engine, path)
+        engine = create_engine('sqlite:///' + path)
+        indexes = inspect(engine).get_indexes('BUILDING')
+        try:
+            results = advise(engine, load_workload(self.workload), repeat=1)
+            self.assertEqual(inspect(engine).get_indexes('BUILDING'), indexes)
+        finally:
+            engine.dispose()
+        self.assertEqual(len(results), 1)
+        result = results[0]
+        self.assertEqual(result['table'], 'BUILDING')
+        self.assertEqual(result['columns'], ['BUILDINGCITY', 'BUILDINGNAME'])
+        self.assertEqual(result['queries'], 2)
+        self.assertTrue(result['uses_index'])
+        self.assertIn('CREATE INDEX ix_building_buildingcity_buildingname',
+                      result['ddl'])
+        self.assertEqual(inspect(db.engine).get_indexes('BUILDING'), indexes)
@@ -0,0 +1,103 @@
+import json
+import logging
+import queue
+import unittest
+
+from app import create_app
+from app.log_pipeline import (JSONLogFormatter, RequestQueueHandler,
+                              SamplingFilter, register_logging, stop_logging)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def make_record(name='app.test', level=logging.INFO, msg='hello', args=(),
+                **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class LogPipelineTestCase(unittest.TestCase):
+    def test_json_with_truncated_fields(self):
+        formatter = JSONLogFormatter(max_length=20)
+        entry = json.loads(formatter.format(make_record(
+            msg='Creating %s', args=('x',), status=3,
+            payload={'BUILDINGNAME': 'a' * 50})))
+        self.assertEqual(entry['message'], 'Creating x')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'app.test')
+        self.assertEqual(entry['status'], 3)
+        self.assertEqual(len(entry['payload']), 21)
+        self.assertTrue(entry['payload_truncated'])
+        self.assertNotIn('message_truncated', entry)
+
+    def test_sampling_by_logger(self):
+        sampling = SamplingFilter({'app.api': 0, 'app.api.v2': 1})
+        self.assertFalse(sampling.filter(make_record('app.api.v1.building')))
+        self.assertTrue(sampling.filter(make_record('app.api.v2.x')))
+        self.assertTrue(sampling.filter(make_record('app.search')))
+        self.assertTrue(sampling.filter(make_record(
+            'app.api.v1.building', logging.WARNING)))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = RequestQueueHandler(queue.Queue(1))
+        handler.handle(make_record())
+        handler.handle(make_record())
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(handler.queue.qsize(), 1)
+
+    def test_records_written_by_listener_with_request_context(self):
+        app = create_app('testing')
+        stop_logging()
+        for handler in list(app.logger.handlers):
+            app.logger.removeHandler(handler)
+        destination = ListHandler()
+        app.logger.addHandler(destination)
+        app.config.update(LOG_LEVEL='INFO',
+                          LOG_SAMPLING={'app.sampled': 0})
+        register_logging(app)
+        try:
+            with app.test_request_context('/v1/buildings', method='POST'):
+                logging.getLogger('app.api').info(
+                    'Creating building', extra={'payload': {'a': 1}})
+                logging.getLogger('app.sampled').info('dropped')
+                app.logger.debug('below the level')
+                try:
+                    raise ValueError('bad')
+                except ValueError:
+                    app.logger.exception('failed')
+        finally:
+            stop_logging()
+        entries = [json.loads(line) for line in destination.lines]
+        self.assertEqual([e['message'] for e in entries],
+                         ['Creating building', 'failed'])
+        self.assertEqual(entries[0]['payload'], {'a': 1})
+        self.assertEqual(entries[0]['endpoint'], 'BuildingList')
+        self.assertEqual(entries[0]['method'], 'POST')
+        self.assertIn('ValueError: bad', entries[1]['exception'])
+
+    def test_queue_handler_once_per_logger_until_stopped(self):
+        app = create_app('testing')
+        stop_logging()
+        loggers = [logging.getLogger(app.import_name), app.logger]
+        register_logging(app)
+        try:
+            for logger in loggers:
+                self.assertEqual(
+                    [type(h) for h in logger.handlers
+                     if isinstance(h, RequestQueueHandler)],
+                    [RequestQueueHandler])
+                self.assertFalse(logger.propagate)
+        finally:
+            stop_logging()
+        for logger in loggers:
+            self.assertTrue(logger.propagate)
+            self.assertFalse(any(isinstance(h, RequestQueueHandler)
+                                 for h in logger.handlers))
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from config import ProductionConfig
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_metrics_endpoint(self):
+        self.client.get('/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.data.decode()
+        self.assertIn('http_request_duration_seconds_count{'
+                      'endpoint="main.index",method="GET",status="200"}', body)
+        self.assertIn('http_request_sql_statements_bucket', body)
+        self.assertIn('http_response_size_bytes_sum', body)
+
+    def test_sql_statements_are_counted(self):
+        self.client.get('/v1/buildings/1?access_token=missing')
+        body = self.client.get('/metrics').data.decode()
+        self.assertIn('http_request_sql_statements_sum{'
+                      'endpoint="Building",method="GET",status="401"}', body)
+        line = [l for l in body.splitlines() if l.startswith(
+            'http_request_sql_statements_sum{endpoint="Building"')][0]
+        self.assertGreater(float(line.split()[-1]), 0)
+
+    def test_metrics_rejected_from_outside(self):
+        outside = {'REMOTE_ADDR': '203.0.113.5'}
+        response = self.client.get('/metrics', environ_base=outside)
+        self.assertEqual(response.status_code, 403)
+
+    def test_metrics_token(self):
+        with mock.patch.multiple('config.TestingConfig',
+                                 METRICS_TOKEN='scrape'):
+            client = create_app('testing').test_client()
+        outside = {'REMOTE_ADDR': '203.0.113.5'}
+        for header, status in [('Bearer scrape', 200), ('Bearer wrong', 403),
+                               ('', 403)]:
+            response = client.get('/metrics', environ_base=outside,
+                                  headers={'Authorization': header})
+            self.assertEqual(response.status_code, status, header)
+
+    def test_production_trusts_no_network_by_default(self):
+        self.assertEqual(ProductionConfig.METRICS_ALLOWED_NETWORKS, [])
+        with mock.patch.multiple('config.TestingConfig',
+                                 METRICS_ALLOWED_NETWORKS=[]):
+            client = create_app('testing').test_client()
+        # As through a local reverse proxy
+        loopback = {'REMOTE_ADDR': '127.0.0.1'}
+        response = client.get('/metrics', environ_base=loopback)
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import Migrate, downgrade, upgrade
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.models.building import (BuildingChangeModel, BuildingModel,
+                                 BuildingStatsModel)
+from app.models.user import User
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# The first revision: the tables as they were before migrations
+BASELINE = '5b167399c80f'
+
+
+class MigrationsTestCase(unittest.TestCase):
+    """Migrates a new database that starts at the baseline schema."""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + \
+            os.path.join(self.workdir, 'migrations.sqlite')
+        Migrate(self.app, db, directory=os.path.join(ROOT, 'migrations'))
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        upgrade(revision=BASELINE)
+        # Rows as they would be before any later migration ran.
+        db.engine.execute('INSERT INTO roles (id, name, permissions) '
+                          "VALUES (1, 'User', 1), (2, 'Administrator', 255)")
+        for building_id, city in [(1, 'Boston'), (2, 'Boston'), (3, None)]:
+            db.engine.execute(
+                'INSERT INTO "BUILDING" ("BUILDINGID", "BUILDINGNAME", '
+                '"BUILDINGCITY", "BUILDINGCOUNTRY") VALUES (?, ?, ?, ?)',
+                building_id, 'Building {}'.format(building_id), city, 'US')
+
+    def tearDown(self):
+        db.session.remove()
+        db.get_engine().dispose()
+        self.app_context.pop()
+        shutil.rmtree(self.workdir)
+
+    def test_upgrade_adds_building_coordinates(self):
+        with self.assertRaises(OperationalError):
+            BuildingModel.query.first()
+        db.session.rollback()
+        upgrade()
+        BuildingModel.query.first()
+        db.session.add(BuildingModel(BUILDINGNAME='Mapped', BUILDINGLATITUDE=1,
+                                     BUILDINGLONGITUDE=2))
+        db.session.commit()
+        self.assertIsNotNone(BuildingModel.query.filter_by(
+            BUILDINGNAME='Mapped').one().BUILDINGCELL)
+
+    def test_upgrade_counts_existing_buildings(self):
+        upgrade()
+        self.assertEqual(
+            sorted((s.BUILDINGCITY, s.BUILDINGCOUNT)
+                   for s in BuildingStatsModel.query),
+            [('', 1), ('Boston', 2)])
+
+    def test_upgrade_logs_existing_buildings_as_changes(self):
+        upgrade()
+        self.assertEqual(
+            [(c.BUILDINGID, c.OPERATION) for c in
+             BuildingChangeModel.query.order_by(BuildingChangeModel.CHANGEID)],
+            [(1, 'upsert'), (2, 'upsert'), (3, 'upsert')])
+        self.assertIsInstance(BuildingChangeModel.query.first().CHANGEDAT,
+                              datetime)
+
+    def test_upgrade_copies_role_permissions_to_users(self):
+        for user_id, role_id in [(10, 2), (11, None)]:
+            db.engine.execute(
+                'INSERT INTO users (id, email, role_id) VALUES (?, ?, ?)',
+                user_id, 'user{}@example.com'.format(user_id), role_id)
+        with self.assertRaises(OperationalError):
+            User.query.first()
+        db.session.rollback()
+        upgrade()
+        self.assertEqual(
+            [(u.id, u.permissions) for u in User.query.order_by(User.id)],
+            [(10, 255), (11, 0)])
+
+    def test_head_matches_models_and_downgrades_to_nothing(self):
+        upgrade()
+        with db.engine.connect() as conn:
+            differences = compare_metadata(MigrationContext.configure(conn),
+                                           db.metadata)
+        # SQLite's own table for AUTOINCREMENT counters
+        self.assertEqual([d for d in differences
+                          if d[1].name != 'sqlite_sequence'], [])
+        downgrade(revision='base')
+        self.assertEqual(set(inspect(db.engine).get_table_names()) -
+                         {'sqlite_sequence'}, {'alembic_version'})
+
+    def test_database_from_before_migrations(self):
+        # Its tables exist, but it was never stamped.
+        db.engine.execute('DROP TABLE alembic_version')
+        upgrade()
+        self.assertEqual(BuildingModel.query.count(), 3)
+        self.assertIsNone(BuildingModel.query.get(1).BUILDINGLATITUDE)
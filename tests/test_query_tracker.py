@@ -0,0 +1,53 @@
+import json
+import unittest
+
+from app import create_app, db
+from app.models import Role
+from app.models.building import BuildingModel
+from app.query_tracker import QueryBudgetExceeded, query_budget
+
+from api_base import add_client_token
+
+
+class QueryTrackerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+
+        @self.app.route('/_test/queries/<int:count>')
+        @query_budget(2)
+        def run_queries(count):
+            for _ in range(count):
+                Role.query.filter_by(name='User').first()
+            return 'ok'
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_budget_exceeded_raises(self):
+        self.assertEqual(self.client.get('/_test/queries/2').status_code, 200)
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/_test/queries/3')
+
+    def test_repeated_statement_is_reported(self):
+        self.app.config['QUERY_BUDGET_RAISE'] = False
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            self.client.get('/_test/queries/3')
+        self.assertTrue(any('Possible N+1: run_queries ran the same '
+                            'statement 3 times' in line
+                            for line in logs.output))
+
+    def test_building_endpoint_within_budget(self):
+        add_client_token('building', _default_scopes='building')
+        db.session.add(BuildingModel(BUILDINGID=1, BUILDINGNAME='A'))
+        db.session.commit()
+        response = self.client.get('/v1/buildings/1?access_token=t')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data.decode())['BUILDINGNAME'],
+                         'A')
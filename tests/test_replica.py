@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import time
+from datetime import datetime, timedelta
+
+from redis.exceptions import ConnectionError
+
+from app import create_app, db
+from app.models import Client, Token
+from app.models.building import BuildingModel
+
+
+class MemoryRedis(object):
+    """The part of the Redis client the replica bookkeeping uses."""
+
+    def __init__(self):
+        self.values = {}
+        self.down = False
+
+    def setex(self, key, seconds, value):
+        if self.down:
+            raise ConnectionError()
+        self.values[key] = (value, time.time() + seconds)
+
+    def exists(self, key):
+        if self.down:
+            raise ConnectionError()
+        return key in self.values and self.values[key][1] > time.time()
+
+
+class ReplicaRoutingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.redis = MemoryRedis()
+        self.app = self.make_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            db.Model.metadata.create_all(db.get_engine(bind='replica'))
+            self.add_building(db.engine, 'Primary')
+            self.add_building(db.get_engine(bind='replica'), 'Replica')
+            self.add_token(db.engine, 'both')
+            self.add_token(db.get_engine(bind='replica'), 'both')
+            self.add_token(db.engine, 'other')
+            self.add_token(db.get_engine(bind='replica'), 'other')
+            self.add_token(db.engine, 'primary-only')
+
+    def make_app(self):
+        app = create_app('testing')
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + \
+            os.path.join(self.workdir, 'primary.sqlite')
+        app.config['SQLALCHEMY_BINDS'] = {
+            'replica': 'sqlite:///' +
+            os.path.join(self.workdir, 'replica.sqlite')
+        }
+        app.extensions['sqlalchemy_replica'].redis = self.redis
+        return app
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.get_engine().dispose()
+            db.get_engine(bind='replica').dispose()
+        shutil.rmtree(self.workdir)
+
+    def add_building(self, engine, name):
+        engine.execute(BuildingModel.__table__.insert(), BUILDINGID=1,
+                       BUILDINGNAME=name)
+
+    def add_token(self, engine, access_token):
+        engine.execute(Client.__table__.insert(), client_id=access_token,
+                       client_secret='secret',
+                       _default_scopes='building buildings')
+        engine.execute(Token.__table__.insert(), client_id=access_token,
+                       access_token=access_token, token_type='Bearer',
+                       _scopes='building buildings',
+                       expires=datetime.utcnow() + timedelta(hours=1))
+
+    def get_building(self, token, client=None):
+        response = (client or self.client).get(
+            '/v1/buildings/1?access_token={}'.format(token))
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data.decode())['BUILDINGNAME']
+
+    def test_get_reads_from_replica(self):
+        self.assertEqual(self.get_building('both'), 'Replica')
+
+    def test_token_missing_on_replica_falls_back_to_primary(self):
+        self.assertEqual(self.get_building('primary-only'), 'Replica')
+
+    def test_client_reads_own_writes_from_primary(self):
+        response = self.client.post(
+            '/v1/buildings?access_token=both',
+            data=json.dumps({'BUILDINGNAME': 'New'}),
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_building('both'), 'Primary')
+        self.assertEqual(self.get_building('other'), 'Replica')
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.app.config['SQLALCHEMY_REPLICA_MAX_LAG'] = -1
+        self.assertEqual(self.get_building('both'), 'Primary')
+
+    def test_own_writes_seen_by_other_workers(self):
+        response = self.client.post(
+            '/v1/buildings?access_token=both',
+            data=json.dumps({'BUILDINGNAME': 'New'}),
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        other_worker = self.make_app().test_client()
+        self.assertEqual(self.get_building('both', other_worker), 'Primary')
+        self.assertEqual(self.get_building('other', other_worker), 'Replica')
+        # Only a hash of the credential is stored.
+        self.assertTrue(self.redis.values)
+        self.assertFalse(any('both' in key for key in self.redis.values))
+
+    def test_unreachable_redis_reads_from_primary(self):
+        self.redis.down = True
+        self.assertEqual(self.get_building('both'), 'Primary')
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import tempfile
+
+from app import db
+from app.models.building import BuildingModel
+from app.search import rebuild_index
+
+from api_base import ApiTestCase
+
+
+class SearchTestCase(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.workdir = tempfile.mkdtemp()
+        self.index_dir = os.path.join(self.workdir, 'index')
+        self.app.config['SEARCH_INDEX_DIR'] = self.index_dir
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.workdir)
+
+    def send(self, method, path, body=None):
+        response = self.client.open(
+            path + '?access_token=t', method=method,
+            data=json.dumps(body) if body else None,
+            content_type='application/json')
+        return json.loads(response.data.decode()) if response.data else None
+
+    def search(self, q, **args):
+        response = self.client.get('/v1/buildings/search', query_string=dict(
+            args, q=q, access_token='t'))
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data.decode())
+
+    def test_write_handlers_keep_index_current(self):
+        self.send('POST', '/v1/buildings', {
+            'BUILDINGNAME': 'Harbour Tower', 'BUILDINGCITY': 'Boston',
+            'BUILDINGSTATE': 'MA', 'BUILDINGCOUNTRY': 'US'})
+        self.send('POST', '/v1/buildings', {
+            'BUILDINGNAME': 'Boston House', 'BUILDINGCITY': 'London',
+            'BUILDINGCOUNTRY': 'UK'})
+        result = self.search('boston')
+        self.assertEqual(result['total'], 2)
+        # Matches in the name rank above matches in the city.
+        self.assertEqual([b['BUILDINGNAME'] for b in result['buildings']],
+                         ['Boston House', 'Harbour Tower'])
+        self.assertEqual(self.search('tower boston')['total'], 1)
+
+        self.send('PATCH', '/v1/buildings/1', {'BUILDINGCITY': 'Salem'})
+        self.assertEqual(self.search('boston')['total'], 1)
+        self.assertEqual(self.search('salem')['buildings'][0]['BUILDINGID'],
+                         1)
+
+        self.send('DELETE', '/v1/buildings/2')
+        self.assertEqual(self.search('boston')['total'], 0)
+
+    def test_pagination_and_rebuild(self):
+        with self.app.app_context():
+            db.session.add_all([
+                BuildingModel(BUILDINGNAME='Tower {}'.format(i))
+                for i in range(25)])
+            db.session.commit()
+            self.assertEqual(
+                rebuild_index(BuildingModel.query, self.index_dir, 10), 25)
+        result = self.search('tower', page=3, per_page=10)
+        self.assertEqual(result['total'], 25)
+        self.assertEqual(len(result['buildings']), 5)
+
+    def test_invalid_requests(self):
+        response = self.client.get('/v1/buildings/search?access_token=t')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(
+            '/v1/buildings/search?q=x&per_page=1000&access_token=t')
+        self.assertEqual(response.status_code, 400)
+        self.app.config['SEARCH_INDEX_DIR'] = None
+        response = self.client.get('/v1/buildings/search?q=x&access_token=t')
+        self.assertEqual(response.status_code, 503)
@@ -0,0 +1,79 @@
+import unittest
+
+from app import create_app, db
+from app.building_stats import building_stats
+from app.models import App, Client, Role, Token, User
+from app.models.building import BuildingChangeModel, BuildingModel
+from app.seed import seed_database
+
+
+class SeedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        Role.insert_roles()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_seed_in_chunks(self):
+        chunks = []
+        totals = seed_database(
+            db.engine, users=25, apps=5, buildings=30, chunk_size=10,
+            seed=1, on_chunk=lambda *chunk: chunks.append(chunk))
+        self.assertEqual(totals, {'users': 25, 'apps': 5, 'buildings': 30})
+        self.assertEqual(chunks, [
+            ('users', 10), ('users', 20), ('users', 25), ('apps', 5),
+            ('buildings', 10), ('buildings', 20), ('buildings', 30)])
+        users = User.query.all()
+        self.assertEqual(len({u.email for u in users}), 25)
+        self.assertEqual({u.role.name for u in users}, {'User'})
+        self.assertTrue(users[-1].verify_password('password'))
+        self.assertEqual((App.query.count(), Client.query.count(),
+                          Token.query.count()), (5, 5, 5))
+        self.assertEqual(BuildingChangeModel.query.count(), 30)
+        self.assertEqual(sum(count for _, count in building_stats('city')),
+                         30)
+
+    def test_seeded_token_authenticates(self):
+        seed_database(db.engine, users=1, apps=1, buildings=1, seed=2)
+        token = Token.query.one()
+        response = self.client.get(
+            '/v1/buildings/1?access_token=' + token.access_token)
+        self.assertEqual(response.status_code, 200)
+
+    def test_workers_append_the_same_rows(self):
+        seed_database(db.engine, users=3, seed=3)
+        seed_database(db.engine, apps=4, buildings=20, chunk_size=5,
+                      workers=2, seed=4)
+        one_process = [(b.BUILDINGID, b.BUILDINGNAME, b.BUILDINGCELL)
+                       for b in BuildingModel.query.order_by('BUILDINGID')]
+        self.assertEqual(len(one_process), 20)
+        # Apps belong to the existing users when no users are created.
+        self.assertEqual({a.user_id for a in App.query} - {1, 2, 3}, set())
+
+        db.session.query(BuildingModel).delete()
+        db.session.commit()
+        seed_database(db.engine, buildings=20, chunk_size=5, seed=4)
+        self.assertEqual(
+            [(b.BUILDINGID, b.BUILDINGNAME, b.BUILDINGCELL)
+             for b in BuildingModel.query.order_by('BUILDINGID')],
+            one_process)
+
+    def test_apps_only_belong_to_existing_users(self):
+        seed_database(db.engine, users=10, seed=5)
+        User.query.filter(User.id.between(2, 9)).delete(
+            synchronize_session=False)
+        db.session.commit()
+        seed_database(db.engine, apps=20, seed=5)
+        self.assertEqual({c.user_id for c in Client.query}, {1, 10})
+        self.assertEqual({a.user_id for a in App.query}, {1, 10})
+
+    def test_apps_need_users(self):
+        with self.assertRaises(ValueError):
+            seed_database(db.engine, apps=1)
@@ -0,0 +1,70 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from app import create_app, db
+from app.models import Role, User
+
+
+class SlowQueryLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config['SLOW_QUERY_LOG'] = os.path.join(
+            self.logdir, 'slow.log')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            Role.insert_roles()
+            admin = Role.query.filter_by(name='Administrator').first()
+            db.session.add(User(first_name='Ad', last_name='Min',
+                                email='admin@example.com', password='pw',
+                                confirmed=True, role=admin))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        shutil.rmtree(self.logdir)
+
+    def read_log(self):
+        with open(self.app.config['SLOW_QUERY_LOG']) as f:
+            return [json.loads(line) for line in f]
+
+    def test_slow_statement_logged_with_plan(self):
+        self.app.config['SLOW_QUERY_THRESHOLD'] = 0
+        self.client.get('/v1/buildings/1?access_token=missing')
+        entries = [e for e in self.read_log() if e['endpoint'] == 'Building']
+        self.assertTrue(entries)
+        entry = entries[0]
+        self.assertIn('FROM token', entry['statement'])
+        self.assertNotIn('parameters', entry)
+        self.assertEqual(entry['method'], 'GET')
+        self.assertTrue(any('token' in line for line in entry['plan']))
+        with open(self.app.config['SLOW_QUERY_LOG']) as f:
+            self.assertNotIn('missing', f.read())
+
+    def test_parameters_logged_when_enabled(self):
+        self.app.config.update(SLOW_QUERY_THRESHOLD=0,
+                               SLOW_QUERY_LOG_PARAMETERS=True)
+        self.client.get('/v1/buildings/1?access_token=missing')
+        entry = [e for e in self.read_log() if e['endpoint'] == 'Building'
+                 and 'FROM token' in e['statement']][0]
+        self.assertEqual(entry['parameters'][0], 'missing')
+
+    def test_fast_statements_not_logged(self):
+        self.app.config['SLOW_QUERY_THRESHOLD'] = 60
+        self.client.get('/v1/buildings/1?access_token=missing')
+        self.assertFalse(os.path.exists(self.app.config['SLOW_QUERY_LOG']))
+
+    def test_admin_view(self):
+        self.client.post('/account/login', data={
+            'email': 'admin@example.com', 'password': 'pw'})
+        self.app.config['SLOW_QUERY_THRESHOLD'] = 0
+        self.client.get('/v1/buildings/1?access_token=missing')
+        response = self.client.get('/admin/slow-queries')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'FROM token', response.data)
@@ -0,0 +1,62 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+
+from app.static_files import compress_static_files, \
+    register_precompressed_static
+
+
+class PrecompressedStaticTestCase(unittest.TestCase):
+    def setUp(self):
+        self.static_folder = tempfile.mkdtemp()
+        self.source = b'var answer = 42;\n' * 100
+        with open(os.path.join(self.static_folder, 'app.js'), 'wb') as f:
+            f.write(self.source)
+        compress_static_files([self.static_folder])
+
+        self.app = Flask(__name__, static_folder=self.static_folder,
+                         static_url_path='/static',
+                         root_path=self.static_folder,
+                         instance_path=self.static_folder)
+        self.app.config['STATIC_PRECOMPRESSED'] = True
+        register_precompressed_static(self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.static_folder)
+
+    def test_gzip_variant_is_written(self):
+        with gzip.open(os.path.join(self.static_folder, 'app.js.gz')) as f:
+            self.assertEqual(f.read(), self.source)
+
+    def test_serves_gzip_variant(self):
+        response = self.client.get(
+            '/static/app.js', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.mimetype,
+                         self.client.get('/static/app.js').mimetype)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.data), self.source)
+
+    def test_serves_identity_without_accept_encoding(self):
+        response = self.client.get('/static/app.js')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.data, self.source)
+
+    def test_versioned_url_is_immutable(self):
+        version = hashlib.md5(self.source).hexdigest()[:8]
+        response = self.client.get('/static/app.js?' + version)
+        self.assertIn('immutable', response.headers['Cache-Control'])
+
+    def test_other_query_string_is_not_immutable(self):
+        response = self.client.get('/static/app.js?x=1')
+        self.assertNotIn('immutable',
+                         response.headers.get('Cache-Control', ''))
+        with self.app.app_context():
+            max_age = self.app.get_send_file_max_age('app.js')
+        self.assertEqual(response.cache_control.max_age, max_age)
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from app import create_app
+from app.template_cache import compile_templates
+
+
+class TemplateCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_app(self):
+        with mock.patch.multiple('config.TestingConfig',
+                                 TEMPLATE_CACHE='filesystem',
+                                 TEMPLATE_CACHE_DIR=self.directory):
+            return create_app('testing')
+
+    def test_no_cache_by_default_in_tests(self):
+        self.assertIsNone(create_app('testing').jinja_env.bytecode_cache)
+
+    def test_precompiled_templates_are_not_compiled_again(self):
+        names = compile_templates(self.make_app())
+        self.assertIn('account/login.html', names)
+        self.assertIn('layouts/base.html', names)
+        self.assertIn('account/email/confirm.txt', names)
+        self.assertEqual(len(os.listdir(self.directory)), len(names))
+
+        app = self.make_app()
+        with mock.patch.object(app.jinja_env, 'compile',
+                               wraps=app.jinja_env.compile) as compiled:
+            response = app.test_client().get('/account/login')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(compiled.call_count, 0)
+
+    def test_email_templates_are_precompiled(self):
+        compile_templates(self.make_app())
+        app = self.make_app()
+        with mock.patch.object(app.jinja_env, 'compile',
+                               wraps=app.jinja_env.compile) as compiled:
+            app.jinja_env.get_template('account/email/confirm.txt')
+        self.assertEqual(compiled.call_count, 0)
@@ -0,0 +1,79 @@
+import time
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from app.models import ApiUsage, App, Role, User
+from app.usage import recent_app_usage, register_usage_metering
+
+from api_base import add_client_token
+
+
+class UsageTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['USAGE_METERING'] = True
+        register_usage_metering(self.app)
+        self.meter = self.app.extensions['usage_meter']
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+        Role.insert_roles()
+        user = User(first_name='Ap', last_name='Owner', confirmed=True,
+                    email='owner@example.com', password='pw')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(App(application_id=7, application_name='Seven',
+                           user_id=user.id))
+        add_client_token('building buildings', app_id=7, user_id=user.id)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def usage_rows(self):
+        return sorted((u.client_id, u.endpoint, u.count)
+                      for u in ApiUsage.query)
+
+    def test_counts_saved_in_batches(self):
+        for _ in range(3):
+            self.client.get('/v1/buildings?access_token=t')
+        self.client.get('/v1/buildings/1?access_token=t')
+        self.client.get('/v1/buildings?access_token=wrong')
+        self.assertEqual(self.usage_rows(), [])
+
+        self.assertEqual(self.meter.flush(), 4)
+        self.assertEqual(self.usage_rows(), [('c', 'Building', 1),
+                                             ('c', 'BuildingList', 3)])
+        self.client.get('/v1/buildings?access_token=t')
+        self.assertEqual(self.meter.flush(), 1)
+        self.assertEqual(self.meter.flush(), 0)
+        self.assertEqual(self.usage_rows(), [('c', 'Building', 1),
+                                             ('c', 'BuildingList', 4)])
+
+    def test_failed_flush_keeps_counts(self):
+        self.meter.record('c', 'BuildingList')
+        with mock.patch('app.usage.add_usage', side_effect=RuntimeError):
+            self.assertEqual(self.meter.flush(), 0)
+        self.assertEqual(self.meter.flush(), 1)
+        self.assertEqual(self.usage_rows(), [('c', 'BuildingList', 1)])
+
+    def test_recent_usage_by_app(self):
+        minute = int(time.time()) // 60
+        self.meter.counts.update({('c', 'BuildingList', minute): 5,
+                                  ('c', 'Building', minute - 60 * 48): 2,
+                                  ('c', 'Building', minute - 60 * 24 * 40): 9,
+                                  ('other', 'Building', minute): 1})
+        self.meter.flush()
+        self.assertEqual(recent_app_usage([7, 8]), {7: (5, 7), 8: (0, 0)})
+
+        self.client.post('/account/login', data={
+            'email': 'owner@example.com', 'password': 'pw'})
+        response = self.client.get('/account/manage/apps')
+        self.assertEqual(response.status_code, 200)
+        html = response.get_data(as_text=True)
+        self.assertIn('<td style="text-align: center;">5</td>', html)
+        self.assertIn('<td style="text-align: center;">7</td>', html)
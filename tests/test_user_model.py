@@ -1,6 +1,8 @@
 import time
 import unittest
 
+from sqlalchemy import inspect
+
 from app import create_app, db
 from app.models import AnonymousUser, Permission, Role, User
 
@@ -131,3 +133,28 @@ class UserModelTestCase(unittest.TestCase):
     def test_anonymous(self):
         u = AnonymousUser()
         self.assertFalse(u.can(Permission.GENERAL))
+
+    def test_permissions_checked_without_loading_role(self):
+        Role.insert_roles()
+        r = Role.query.filter_by(permissions=Permission.ADMINISTER).first()
+        db.session.add(User(email='user@example.com', password='password',
+                            role=r))
+        db.session.commit()
+        db.session.remove()
+        u = User.query.filter_by(email='user@example.com').first()
+        self.assertTrue(u.is_admin())
+        self.assertNotIn('role', inspect(u).dict)
+        u.role = None
+        self.assertFalse(u.can(Permission.GENERAL))
+
+    def test_insert_roles_updates_user_permissions(self):
+        Role.insert_roles()
+        u = User(email='user@example.com', password='password')
+        db.session.add(u)
+        db.session.commit()
+        Role.query.filter_by(name='User').update({'permissions': 0})
+        User.query.update({'permissions': 0})
+        db.session.commit()
+        self.assertFalse(u.can(Permission.GENERAL))
+        Role.insert_roles()
+        self.assertTrue(u.can(Permission.GENERAL))